@@ -101,6 +101,30 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Cache
+# The search result / map tile generation, owner entitlements, analytics
+# buckets and the autocomplete version live in the cache, and their
+# invalidation only reaches the processes that share it. Set REDIS_URL
+# (e.g. redis://127.0.0.1:6379/1, needs the redis package) whenever more
+# than one server process runs; without it each process has its own
+# in-memory cache, which is only correct for a single-process dev server.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -136,6 +160,26 @@ RAZORPAY_KEY_SECRET = 'keecJz4GkIFsN5ONPYWfRfDd'  # Your Razorpay test secret
 RAZORPAY_WEBHOOK_SECRET = ''  # Optional: Add webhook secret from Razorpay dashboard
 PROPERTY_REGISTRATION_FEE = 100  # Amount in INR (e.g., 100 INR)
 
+# Tenant search
+TENANT_SEARCH_PAGE_SIZE = 24  # Listings per page / infinite-scroll batch
+TENANT_SEARCH_RESULT_CACHE_SECONDS = 300  # How long the ordered result ids of a search are reused
+TENANT_SEARCH_RESULT_CACHE_MAX_IDS = 1000  # Results per search kept in the cache
+MAP_CLUSTER_TILE_CACHE_SECONDS = 600  # How long the marker clusters of a map tile are reused
+MAP_CLUSTER_MAX_TILES = 64  # Largest viewport (in tiles) the cluster endpoint will answer
+
+# Admin dashboard
+ADMIN_SECTION_PAGE_SIZE = 25  # Rows per lazily loaded admin dashboard section page
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched (and written) per chunk by the streaming CSV/NDJSON exports
+ANALYTICS_MAX_BUCKETS = 366  # Longest analytics series; longer ranges are downsampled to coarser buckets
+ANALYTICS_CLOSED_BUCKET_CACHE_SECONDS = 60 * 60 * 24 * 7  # How long values of buckets that have ended are kept
+
+# Owner plans
+OWNER_ENTITLEMENT_CACHE_SECONDS = 600  # Longest an owner's cached plan limits are reused (also dropped on changes and plan expiry)
+
+# Property view counter
+VIEW_COUNT_FLUSH_SECONDS = 10  # Batch window: buffered views are written at least this often (0 writes every view)
+VIEW_COUNT_FLUSH_THRESHOLD = 100  # Pending views that trigger a write before the window ends
+
 
 # Email Configuration
 # For development, we'll use console backend (prints emails to console)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import User, Property, PropertyImage, Payment, Conversation, Message, Wishlist, WebsiteFeedback
+from .models import User, Property, PropertyImage, Amenity, Payment, RevenueDaily, PropertyViewDaily, Conversation, Message, Wishlist, WebsiteFeedback
+from .unread_utils import recount_conversations
 
 # Custom Admin configuration
 class PropertyImageInline(admin.TabularInline):
@@ -18,13 +19,28 @@ class PropertyAdmin(admin.ModelAdmin):
     search_fields = ('title', 'location')
     inlines = [PropertyImageInline]
 
+@admin.register(Amenity)
+class AmenityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key')
+    search_fields = ('name', 'key')
+
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
-    list_display = ('property', 'owner', 'amount', 'status', 'created_at')
-    list_filter = ('status', 'created_at')
+    list_display = ('property', 'owner', 'amount', 'plan_type', 'status', 'created_at')
+    list_filter = ('status', 'plan_type', 'created_at')
     search_fields = ('razorpay_order_id', 'razorpay_payment_id', 'property__title')
     readonly_fields = ('razorpay_order_id', 'razorpay_payment_id', 'razorpay_signature', 'created_at', 'updated_at')
 
+@admin.register(RevenueDaily)
+class RevenueDailyAdmin(admin.ModelAdmin):
+    list_display = ('date', 'plan_type', 'status', 'count', 'total')
+    list_filter = ('status', 'plan_type', 'date')
+
+@admin.register(PropertyViewDaily)
+class PropertyViewDailyAdmin(admin.ModelAdmin):
+    list_display = ('property', 'date', 'views')
+    list_filter = ('date',)
+
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
     list_display = ('property', 'tenant', 'owner', 'created_at', 'updated_at')
@@ -39,6 +55,22 @@ class MessageAdmin(admin.ModelAdmin):
     search_fields = ('sender__username', 'content')
     readonly_fields = ('created_at',)
 
+    # Keep the unread counters right when messages are edited or deleted here
+    def save_model(self, request, obj, form, change):
+        old_conversation_id = Message.objects.filter(pk=obj.pk).values_list('conversation_id', flat=True).first() if change else None
+        super().save_model(request, obj, form, change)
+        if change:
+            recount_conversations({old_conversation_id, obj.conversation_id})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        recount_conversations([obj.conversation_id])
+
+    def delete_queryset(self, request, queryset):
+        conversation_ids = set(queryset.values_list('conversation_id', flat=True))
+        super().delete_queryset(request, queryset)
+        recount_conversations(conversation_ids)
+
 @admin.register(Wishlist)
 class WishlistAdmin(admin.ModelAdmin):
     list_display = ('tenant', 'property', 'created_at')
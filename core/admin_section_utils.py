@@ -0,0 +1,87 @@
+"""
+Paginated sections of the admin dashboard
+
+The owners, tenants, properties and transactions lists are no longer
+rendered with the dashboard page. Each one is loaded on demand from
+`admin-sections/<section>/`, one keyset page at a time, optionally narrowed
+by a search term, and rendered with its own row template.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch, Q
+
+from .models import Property, Payment
+from .pagination_utils import keyset_page
+
+User = get_user_model()
+
+
+def _owners():
+    return User.objects.filter(role='OWNER', is_superuser=False).prefetch_related(
+        Prefetch('properties', queryset=Property.objects.with_plan_status())
+    )
+
+
+def _tenants():
+    return User.objects.filter(role='TENANT', is_superuser=False)
+
+
+def _properties():
+    # Only paid properties are listed; cards use the stored cover photo and
+    # the plan status annotations
+    return Property.objects.filter(is_paid=True).select_related('owner').with_plan_status()
+
+
+def _payments():
+    # Only successful (completed) payments are listed
+    return Payment.objects.filter(status=Payment.PaymentStatus.SUCCESS).select_related('property', 'owner')
+
+
+# section -> queryset, keyset ordering, searched fields, row template
+ADMIN_SECTIONS = {
+    'owners': {
+        'queryset': _owners,
+        'ordering': ['-date_joined', '-id'],
+        'search_fields': ['username', 'email', 'phone_number'],
+        'template': 'core/includes/admin_owner_rows.html',
+    },
+    'tenants': {
+        'queryset': _tenants,
+        'ordering': ['-date_joined', '-id'],
+        'search_fields': ['username', 'email', 'phone_number'],
+        'template': 'core/includes/admin_tenant_rows.html',
+    },
+    'properties': {
+        'queryset': _properties,
+        'ordering': ['-created_at', '-id'],
+        'search_fields': ['title', 'location', 'owner__username'],
+        'template': 'core/includes/admin_property_cards.html',
+    },
+    'payments': {
+        'queryset': _payments,
+        'ordering': ['-created_at', '-id'],
+        'search_fields': ['razorpay_order_id', 'razorpay_payment_id', 'property__title', 'owner__username'],
+        'template': 'core/includes/admin_payment_rows.html',
+    },
+}
+
+
+def admin_section_page(section, search='', cursor=None):
+    """
+    One page of an admin dashboard section.
+
+    Returns (items, next_cursor), or None for an unknown section.
+    """
+    config = ADMIN_SECTIONS.get(section)
+    if config is None:
+        return None
+
+    queryset = config['queryset']()
+    search = search.strip()
+    if search:
+        condition = Q()
+        for field in config['search_fields']:
+            condition |= Q(**{f'{field}__icontains': search})
+        queryset = queryset.filter(condition)
+
+    return keyset_page(queryset, config['ordering'], cursor, settings.ADMIN_SECTION_PAGE_SIZE)
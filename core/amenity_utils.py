@@ -0,0 +1,116 @@
+"""
+Amenity utility functions for RentEase
+
+Property.amenities is free text typed by owners ("Wi-Fi, car parking, GYM").
+These helpers parse it into a canonical vocabulary that is stored in the
+Amenity / PropertyAmenity tables so tenant filtering can be done with an
+indexed join instead of LIKE scans.
+"""
+import re
+
+from django.db.models import Count
+
+
+# Canonical amenity names and other spellings of the same amenity. Only true
+# variants belong here - a related but different amenity ("kitchen" vs
+# "Modular Kitchen", "terrace" vs "Balcony") must stay separate, or the
+# amenity filter matches listings that do not have what the tenant asked for.
+AMENITY_ALIASES = {
+    'Wi-Fi': ['wifi', 'wi fi', 'wireless internet'],
+    'Parking': ['car parking', 'car park', 'parking space'],
+    'Gym': ['gymnasium', 'fitness centre', 'fitness center'],
+    'Swimming Pool': ['swimming pool'],
+    'Air Conditioning': ['ac', 'a c', 'air conditioner', 'air conditioners', 'air conditioned'],
+    'Lift': ['lifts', 'elevator', 'elevators'],
+    'Security': ['24x7 security', '24 7 security'],
+    'CCTV': ['cctv camera', 'cctv cameras'],
+    'Power Backup': ['power back up'],
+    'Water Supply': ['24x7 water supply', '24 7 water supply'],
+    'Garden': [],
+    'Balcony': ['balconies'],
+    'Modular Kitchen': [],
+    'Clubhouse': ['club house'],
+    'Play Area': ['kids play area', 'children play area'],
+    'Washing Machine': [],
+    'Refrigerator': ['fridge'],
+    'Pet Friendly': ['pets allowed'],
+}
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+# normalized alias -> canonical name
+_ALIAS_LOOKUP = {}
+for _canonical, _aliases in AMENITY_ALIASES.items():
+    for _alias in [_canonical, *_aliases]:
+        _ALIAS_LOOKUP[_NON_ALNUM_RE.sub(' ', _alias.lower()).strip()] = _canonical
+
+
+def normalize_key(text):
+    """'  Wi-Fi ' -> 'wi fi' (lowercase, punctuation collapsed to spaces)"""
+    return _NON_ALNUM_RE.sub(' ', text.lower()).strip()
+
+
+def canonical_amenity(text):
+    """
+    Map one amenity as typed by a user to its canonical display name.
+    Returns None for blank input; unknown amenities are left as typed.
+    """
+    key = normalize_key(text)
+    if not key:
+        return None
+    return _ALIAS_LOOKUP.get(key) or ' '.join(text.split())
+
+
+def parse_amenities(text):
+    """Split a comma-separated amenities string into unique canonical names (in order)"""
+    names = []
+    for part in (text or '').split(','):
+        name = canonical_amenity(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def sync_property_amenities(property_obj):
+    """Rebuild the PropertyAmenity rows of a property from its amenities text"""
+    from .models import Amenity, PropertyAmenity
+
+    names = parse_amenities(property_obj.amenities)
+    amenities = []
+    for name in names:
+        amenity, created = Amenity.objects.get_or_create(key=normalize_key(name), defaults={'name': name})
+        amenities.append(amenity)
+
+    PropertyAmenity.objects.filter(property=property_obj).delete()
+    PropertyAmenity.objects.bulk_create([
+        PropertyAmenity(property=property_obj, amenity=amenity, position=position)
+        for position, amenity in enumerate(amenities)
+    ])
+
+
+def filter_by_amenities(queryset, text):
+    """
+    Restrict a Property (or ListingSearchDoc) queryset to listings that have
+    ALL the amenities in the comma-separated `text`.
+
+    The intersection is a single GROUP BY over the indexed
+    (amenity, property) join table, so it costs the same for 1 or 10 amenities.
+    """
+    from .models import Amenity, PropertyAmenity
+
+    keys = {normalize_key(name) for name in parse_amenities(text)}
+    if not keys:
+        return queryset
+
+    amenity_ids = list(Amenity.objects.filter(key__in=keys).values_list('id', flat=True))
+    if len(amenity_ids) < len(keys):
+        # At least one requested amenity is not offered by any listing
+        return queryset.none()
+
+    matching_ids = PropertyAmenity.objects.filter(
+        amenity_id__in=amenity_ids
+    ).values('property_id').annotate(
+        matched=Count('amenity_id')
+    ).filter(matched=len(amenity_ids)).values('property_id')
+
+    return queryset.filter(pk__in=matching_ids)
@@ -0,0 +1,243 @@
+"""
+Platform time-series analytics for admins
+
+A series (signups, new listings, approvals, messages, revenue) is a list of
+(bucket start, value) pairs for hour / day / week / month buckets. Values
+are computed in the database, one grouped query per request: the date column
+is truncated to the bucket (TruncHour/TruncDay/...) and counted or summed.
+
+Buckets that have already ended cannot gain rows, so their values are
+cached individually and never recomputed; only the current bucket and
+closed buckets missing from the cache are queried. The exception is
+revenue: a payment is bucketed by when it was created but counts only once
+it succeeds, possibly days later, so every payment status change drops the
+cached buckets containing that payment (invalidate_buckets, called from
+core/revenue_utils.py). A range with more than
+ANALYTICS_MAX_BUCKETS buckets is downsampled to the next coarser bucket
+size (hour -> day -> week -> month).
+
+Owners get per-listing analytics (owner_listing_analytics): daily page
+views from the PropertyViewDaily rows written by the buffered view counter,
+unique viewers over the range from their merged viewer sketches, plus wishlist adds and inquiries (conversations started) per listing, each
+from one grouped query over all the owner's listings.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .hll_utils import HyperLogLog
+from .models import User, Property, PropertyViewDaily, Payment, Conversation, Message, Wishlist
+
+
+# bucket size -> database truncation, finest first
+BUCKETS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+BUCKET_ORDER = list(BUCKETS)
+
+SERIES = ['signups', 'listings', 'approvals', 'messages', 'revenue']
+
+DEFAULT_RANGE_DAYS = 30
+
+
+def _series_sources():
+    # series -> (queryset, date column, aggregate)
+    return {
+        'signups': (User.objects.exclude(is_superuser=True), 'date_joined', Count('pk')),
+        'listings': (Property.objects.all(), 'created_at', Count('pk')),
+        'approvals': (Property.objects.all(), 'approved_at', Count('pk')),
+        'messages': (Message.objects.all(), 'created_at', Count('pk')),
+        'revenue': (Payment.objects.filter(status=Payment.PaymentStatus.SUCCESS), 'created_at', Sum('amount')),
+    }
+
+
+def bucket_start(moment, bucket):
+    """Start of the bucket containing a naive local datetime"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if bucket == 'hour':
+        return moment
+    moment = moment.replace(hour=0)
+    if bucket == 'week':
+        return moment - timedelta(days=moment.weekday())
+    if bucket == 'month':
+        return moment.replace(day=1)
+    return moment
+
+
+def next_bucket(start, bucket):
+    if bucket == 'hour':
+        return start + timedelta(hours=1)
+    if bucket == 'day':
+        return start + timedelta(days=1)
+    if bucket == 'week':
+        return start + timedelta(weeks=1)
+    return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+
+
+def bucket_starts(start, end, bucket):
+    """Starts of the buckets overlapping [start, end] (naive local datetimes)"""
+    starts = []
+    current = bucket_start(start, bucket)
+    while current <= end:
+        starts.append(current)
+        current = next_bucket(current, bucket)
+    return starts
+
+
+def parse_moment(value, end_of_day=False):
+    """'YYYY-MM-DD' or an ISO datetime -> naive local datetime (None if blank, ValueError if bad)"""
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is not None:
+                moment = datetime.combine(day, datetime.max.time() if end_of_day else datetime.min.time())
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD or an ISO datetime.")
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment).replace(tzinfo=None)
+    return moment
+
+
+def _aware(moment):
+    return timezone.make_aware(moment, timezone.get_current_timezone())
+
+
+def _cache_key(name, bucket, start):
+    return f'analytics:{name}:{bucket}:{timezone.get_current_timezone_name()}:{start.isoformat()}'
+
+
+def invalidate_buckets(name, moment):
+    """Drop the cached buckets of a series, of every size, that contain an aware datetime"""
+    moment = timezone.localtime(moment).replace(tzinfo=None)
+    cache.delete_many([_cache_key(name, bucket, bucket_start(moment, bucket)) for bucket in BUCKETS])
+
+
+def _query_buckets(name, bucket, low, high):
+    """{bucket start: value} for buckets starting in [low, high), from one grouped query"""
+    queryset, column, aggregate = _series_sources()[name]
+    rows = queryset.filter(**{
+        f'{column}__gte': _aware(low),
+        f'{column}__lt': _aware(high),
+    }).annotate(bucket=BUCKETS[bucket](column)).values('bucket').annotate(value=aggregate).order_by()
+    return {
+        timezone.localtime(row['bucket']).replace(tzinfo=None): row['value']
+        for row in rows
+    }
+
+
+def time_series(name, bucket, start, end):
+    """[(bucket start, value)] of one series over [start, end] (naive local datetimes)"""
+    starts = bucket_starts(start, end, bucket)
+    current = bucket_start(timezone.localtime().replace(tzinfo=None), bucket)
+
+    closed_keys = {moment: _cache_key(name, bucket, moment) for moment in starts if moment < current}
+    cached = cache.get_many(closed_keys.values())
+    values = {moment: cached[key] for moment, key in closed_keys.items() if key in cached}
+
+    missing = [moment for moment in starts if moment not in values]
+    if missing:
+        computed = _query_buckets(name, bucket, missing[0], next_bucket(missing[-1], bucket))
+        fresh = {}
+        for moment in missing:
+            value = computed.get(moment) or 0
+            values[moment] = value
+            if moment in closed_keys:
+                fresh[closed_keys[moment]] = value
+        if fresh:
+            cache.set_many(fresh, settings.ANALYTICS_CLOSED_BUCKET_CACHE_SECONDS)
+
+    return [(moment, values[moment]) for moment in starts]
+
+
+def analytics(names, bucket='day', start=None, end=None):
+    """
+    Series for the analytics API. Returns (bucket actually used, start, end,
+    {name: [(bucket start, value)]}). Raises ValueError for unknown series,
+    bucket sizes or an inverted range.
+    """
+    unknown = [name for name in names if name not in SERIES]
+    if unknown:
+        raise ValueError(f"Unknown series: {', '.join(unknown)}. Choose from: {', '.join(SERIES)}.")
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket '{bucket}'. Choose from: {', '.join(BUCKET_ORDER)}.")
+
+    end = end or timezone.localtime().replace(tzinfo=None)
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS)
+    if start > end:
+        raise ValueError("start must be before end.")
+
+    # Downsample: move to coarser buckets until the range fits
+    for bucket in BUCKET_ORDER[BUCKET_ORDER.index(bucket):]:
+        if len(bucket_starts(start, end, bucket)) <= settings.ANALYTICS_MAX_BUCKETS:
+            break
+    else:
+        raise ValueError("Date range is too long.")
+
+    return bucket, start, end, {name: time_series(name, bucket, start, end) for name in names}
+
+
+def owner_listing_analytics(owner, start=None, end=None, property_id=None):
+    """
+    Views per day, wishlist adds and inquiries of each of an owner's
+    listings over the days [start, end] (dates; the last DEFAULT_RANGE_DAYS
+    by default). Returns (days, [listing dicts]). Raises ValueError for an
+    inverted or too long range.
+    """
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise ValueError("start must be before end.")
+    if (end - start).days >= settings.ANALYTICS_MAX_BUCKETS:
+        raise ValueError("Date range is too long.")
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+    properties = Property.objects.filter(owner=owner)
+    if property_id is not None:
+        properties = properties.filter(pk=property_id)
+    listings = list(properties.order_by('-created_at').values('id', 'title', 'status', 'views_count'))
+    ids = [listing['id'] for listing in listings]
+
+    views = defaultdict(dict)
+    viewers = defaultdict(HyperLogLog)
+    for pk, day, count, sketch in PropertyViewDaily.objects.filter(
+        property_id__in=ids, date__gte=start, date__lte=end
+    ).values_list('property_id', 'date', 'views', 'viewer_sketch').iterator():
+        views[pk][day] = count
+        if sketch:
+            viewers[pk].merge(HyperLogLog.from_bytes(sketch))
+
+    # Created-at ranges on the raw column, in the current time zone
+    created = {
+        'created_at__gte': _aware(datetime.combine(start, datetime.min.time())),
+        'created_at__lt': _aware(datetime.combine(end + timedelta(days=1), datetime.min.time())),
+    }
+
+    def per_listing(model):
+        rows = model.objects.filter(property_id__in=ids, **created).values('property_id').annotate(count=Count('pk')).order_by()
+        return {row['property_id']: row['count'] for row in rows}
+
+    wishlist_adds = per_listing(Wishlist)
+    inquiries = per_listing(Conversation)
+
+    for listing in listings:
+        pk = listing['id']
+        listing['daily_views'] = [views[pk].get(day, 0) for day in days]
+        listing['views'] = sum(listing['daily_views'])
+        listing['unique_viewers'] = viewers[pk].count() if pk in viewers else 0
+        listing['wishlist_adds'] = wishlist_adds.get(pk, 0)
+        listing['inquiries'] = inquiries.get(pk, 0)
+    return days, listings
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Register signal handlers that maintain the search index
+        from . import signals  # noqa: F401
+
+        # Write buffered property views before the process exits
+        import atexit
+        from .view_count_utils import view_counts
+        atexit.register(view_counts.flush_on_exit)
@@ -0,0 +1,172 @@
+"""
+Location autocomplete for the tenant search box
+
+Suggestions come from an in-memory index of the distinct locations of
+visible listings, so a lookup per keystroke never touches the database.
+
+Locations are normalized (lowercase, punctuation dropped) and every word
+start of a location is stored in one sorted array, e.g. "Kakkanad, Kochi"
+is filed under both "kakkanad kochi" and "kochi". A prefix lookup is a
+bisect to the first key >= the prefix followed by a scan while keys still
+start with it; the matching locations are ranked by their listing count.
+
+Listing changes update the index in place (see core/signals.py). The index
+lives in each server process, so every change also bumps a version number
+in the shared cache; other processes notice the new version and rebuild
+from a single grouped query.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .search_utils import TOKEN_RE, visible_listings
+
+
+VERSION_KEY = 'location_index:version'
+
+# How often a process checks whether another process changed the listings
+VERSION_CHECK_SECONDS = 1.0
+
+DEFAULT_LIMIT = 8
+
+
+def normalize_location(location):
+    """'  Kakkanad,  KOCHI ' -> 'kakkanad kochi'"""
+    return ' '.join(TOKEN_RE.findall((location or '').lower()))
+
+
+def _word_starts(normalized):
+    """'kakkanad kochi' -> ['kakkanad kochi', 'kochi']"""
+    words = normalized.split(' ')
+    return [' '.join(words[position:]) for position in range(len(words))]
+
+
+def _shared_version():
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+class LocationIndex:
+    """Sorted-array prefix index of listing locations, ranked by listing count"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []       # sorted (word start, normalized location) pairs
+        self._counts = {}     # normalized location -> number of visible listings
+        self._labels = {}     # normalized location -> spelling shown to tenants
+        self._version = None  # shared version this index reflects; None = not built
+        self._checked_at = 0.0
+
+    def rebuild(self):
+        """Rebuild from the visible listings (one grouped query)"""
+        version = _shared_version()
+        rows = visible_listings().values('location').annotate(count=Count('pk')).order_by('-count')
+
+        counts, labels = {}, {}
+        for row in rows:
+            normalized = normalize_location(row['location'])
+            if not normalized:
+                continue
+            counts[normalized] = counts.get(normalized, 0) + row['count']
+            # Rows come most common first, so the label is the commonest spelling
+            labels.setdefault(normalized, row['location'].strip())
+
+        keys = sorted(
+            (word_start, normalized)
+            for normalized in counts
+            for word_start in _word_starts(normalized)
+        )
+        with self._lock:
+            self._keys, self._counts, self._labels = keys, counts, labels
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def _ensure_current(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < VERSION_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        if self._version != _shared_version():
+            self.rebuild()
+
+    def _add(self, location):
+        normalized = normalize_location(location)
+        if not normalized:
+            return
+        if normalized in self._counts:
+            self._counts[normalized] += 1
+            return
+        self._counts[normalized] = 1
+        self._labels[normalized] = location.strip()
+        for word_start in _word_starts(normalized):
+            insort(self._keys, (word_start, normalized))
+
+    def _remove(self, location):
+        normalized = normalize_location(location)
+        if normalized not in self._counts:
+            return
+        self._counts[normalized] -= 1
+        if self._counts[normalized] > 0:
+            return
+        del self._counts[normalized]
+        del self._labels[normalized]
+        for word_start in _word_starts(normalized):
+            position = bisect_left(self._keys, (word_start, normalized))
+            if position < len(self._keys) and self._keys[position] == (word_start, normalized):
+                del self._keys[position]
+
+    def listing_changed(self, old_location, new_location):
+        """
+        Apply one listing change: old_location / new_location are the
+        location it was / is now visible under (None if not visible).
+        """
+        if old_location == new_location:
+            return
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, None)
+            version = 1
+        with self._lock:
+            if self._version is None or self._version != version - 1:
+                # Not built yet, or already behind - the next lookup rebuilds
+                self._version = None
+                return
+            if old_location:
+                self._remove(old_location)
+            if new_location:
+                self._add(new_location)
+            self._version = version
+
+    def suggest(self, prefix, limit=DEFAULT_LIMIT):
+        """Up to `limit` {'location', 'count'} dicts for locations starting (at a word) with prefix"""
+        prefix = normalize_location(prefix)
+        if not prefix:
+            return []
+        self._ensure_current()
+
+        with self._lock:
+            keys = self._keys
+            matches = set()
+            position = bisect_left(keys, (prefix,))
+            while position < len(keys) and keys[position][0].startswith(prefix):
+                matches.add(keys[position][1])
+                position += 1
+            ranked = sorted(matches, key=lambda normalized: (-self._counts[normalized], normalized))
+            return [
+                {'location': self._labels[normalized], 'count': self._counts[normalized]}
+                for normalized in ranked[:limit]
+            ]
+
+
+location_index = LocationIndex()
+
+
+def invalidate_location_index():
+    """Make every process rebuild its index on the next lookup (bulk changes)"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
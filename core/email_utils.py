@@ -1,7 +1,7 @@
 """
 Email utility functions for RentEase
 """
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
@@ -337,9 +337,9 @@ def send_inquiry_notification(property_owner, tenant, property_title, inquiry_me
         return False
 
 
-def send_property_rejection_notification(property_owner, property_title, rejection_reason, dashboard_url):
+def _property_rejection_email(property_owner, property_title, rejection_reason, dashboard_url):
     """
-    Send email notification when a property is rejected by admin
+    Build (but don't send) the email telling an owner a property was rejected
     
     Args:
         property_owner: User object (property owner)
@@ -500,17 +500,53 @@ def send_property_rejection_notification(property_owner, property_title, rejecti
     © 2026 RentEase. All rights reserved.
     """
     
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=plain_message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[property_owner.email],
+    )
+    email.attach_alternative(html_message, 'text/html')
+    return email
+
+
+def send_property_rejection_notification(property_owner, property_title, rejection_reason, dashboard_url):
+    """
+    Send email notification when a property is rejected by admin
+    
+    Args:
+        property_owner: User object (property owner)
+        property_title: Title of the rejected property
+        rejection_reason: Reason for rejection provided by admin
+        dashboard_url: Full URL to the owner's dashboard
+    """
     try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[property_owner.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        _property_rejection_email(property_owner, property_title, rejection_reason, dashboard_url).send()
         return True
     except Exception as e:
         print(f"Error sending email: {e}")
         return False
 
+
+def send_property_rejection_notifications(rejections, dashboard_url):
+    """
+    Send the rejection emails of a bulk moderation in one batch, over a
+    single mail connection
+    
+    Args:
+        rejections: list of (property_owner, property_title, rejection_reason)
+        dashboard_url: Full URL to the owners' dashboard
+    
+    Returns the number of emails sent.
+    """
+    emails = [
+        _property_rejection_email(owner, title, reason, dashboard_url)
+        for owner, title, reason in rejections
+    ]
+    if not emails:
+        return 0
+    try:
+        return get_connection().send_messages(emails) or 0
+    except Exception as e:
+        print(f"Error sending email: {e}")
+        return 0
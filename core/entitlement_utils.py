@@ -0,0 +1,165 @@
+"""
+Owner plan entitlements
+
+An owner's listing allowance comes from the highest plan among their
+properties whose plan has not expired: Basic allows 1 listing, Standard 3 and
+Premium 10, and every property with an active plan (pending, live or rented)
+uses a slot. A brand-new owner may add a first property; an owner whose plans
+have all expired may not.
+
+owner_entitlement() answers everything the owner views need (current plan,
+limit, slots used / remaining, reusable plan expiry) from one aggregate
+query and caches the result per owner. The cache entry is dropped whenever
+one of the owner's properties or payments changes (core/signals.py) and
+never outlives the owner's next plan expiry. Like every invalidation here,
+dropping the entry reaches other server processes only through a shared
+cache (REDIS_URL in settings).
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import Property
+
+
+# Listings allowed per plan, highest plan first
+PLAN_LIMITS = {'premium': 10, 'standard': 3, 'basic': 1}
+
+PLAN_LABELS = {'premium': 'Premium', 'standard': 'Standard', 'basic': 'Basic'}
+
+_Entitlement = namedtuple('_Entitlement', [
+    'total_properties',  # every property the owner ever created
+    'total_active',      # paid properties with an unexpired plan (slots used)
+    'plan_counts',       # plan -> active properties on it
+    'plan_expiry',       # plan -> earliest active expiry on it
+    'next_expiry',       # earliest active expiry overall
+])
+
+
+class PlanEntitlement(_Entitlement):
+    __slots__ = ()
+
+    @property
+    def current_plan(self):
+        """Highest active plan ('premium' / 'standard' / 'basic') or None"""
+        for plan in PLAN_LIMITS:
+            if self.plan_counts.get(plan):
+                return plan
+        return None
+
+    @property
+    def current_plan_label(self):
+        return PLAN_LABELS.get(self.current_plan, 'No Plan')
+
+    @property
+    def plan_limit(self):
+        if self.current_plan:
+            return PLAN_LIMITS[self.current_plan]
+        # A new owner may start with one property
+        return 1 if self.total_properties == 0 else 0
+
+    @property
+    def remaining_slots(self):
+        if not self.current_plan:
+            return self.plan_limit
+        return max(0, self.plan_limit - self.total_active)
+
+    @property
+    def can_add_property(self):
+        return self.remaining_slots > 0
+
+    @property
+    def limit_message(self):
+        """Why the owner cannot add another property ('' if they can)"""
+        if self.can_add_property:
+            return ''
+        plan = self.current_plan
+        if plan is None:
+            return "Your listing limit is reached. You need an active subscription plan to list properties. Subscribe to a new plan to continue listing."
+        limit = PLAN_LIMITS[plan]
+        noun = 'property' if limit == 1 else 'properties'
+        advice = (
+            "Subscribe to a new plan or wait for existing properties to expire."
+            if plan == 'premium' else "Subscribe to a new plan to list more properties."
+        )
+        return f"Your listing limit is reached. You have reached your {PLAN_LABELS[plan]} Plan limit ({limit} {noun}). {advice}"
+
+    def reusable_plan(self, property_obj=None):
+        """
+        (plan, expiry) of an active plan with a free slot that another
+        property can join without paying, or None. property_obj, if it
+        already holds an active plan, is not counted against the limit and
+        its own plan is never the one reused.
+        """
+        plan_counts = dict(self.plan_counts)
+        total_active = self.total_active
+        holds_plan = property_obj is not None and property_obj.is_paid and property_obj.is_plan_active()
+        if holds_plan:
+            plan_counts[property_obj.plan_type] = plan_counts.get(property_obj.plan_type, 0) - 1
+            total_active -= 1
+        for plan, limit in PLAN_LIMITS.items():
+            if plan_counts.get(plan, 0) > 0:
+                # Only the highest active plan can be joined
+                if total_active >= limit:
+                    return None
+                if holds_plan and plan == property_obj.plan_type:
+                    # The cached earliest expiry may be the property's own
+                    expiry = Property.objects.filter(
+                        owner_id=property_obj.owner_id, plan_type=plan, is_paid=True,
+                        plan_expiry_date__gt=timezone.now(),
+                    ).exclude(pk=property_obj.pk).aggregate(expiry=Min('plan_expiry_date'))['expiry']
+                    return (plan, expiry) if expiry else None
+                return plan, self.plan_expiry[plan]
+        return None
+
+
+def _cache_key(owner_id):
+    return f'owner_entitlement:{owner_id}'
+
+
+def compute_entitlement(owner_id, now=None):
+    """An owner's entitlement from one aggregate query (uncached)"""
+    now = now or timezone.now()
+    active = Q(is_paid=True, plan_expiry_date__gt=now)
+    aggregates = {
+        'total_properties': Count('id'),
+        'total_active': Count('id', filter=active),
+        'next_expiry': Min('plan_expiry_date', filter=active),
+    }
+    for plan in PLAN_LIMITS:
+        aggregates[f'{plan}_count'] = Count('id', filter=active & Q(plan_type=plan))
+        aggregates[f'{plan}_expiry'] = Min('plan_expiry_date', filter=active & Q(plan_type=plan))
+    row = Property.objects.filter(owner_id=owner_id).aggregate(**aggregates)
+    return PlanEntitlement(
+        total_properties=row['total_properties'],
+        total_active=row['total_active'],
+        plan_counts={plan: row[f'{plan}_count'] for plan in PLAN_LIMITS},
+        plan_expiry={plan: row[f'{plan}_expiry'] for plan in PLAN_LIMITS},
+        next_expiry=row['next_expiry'],
+    )
+
+
+def owner_entitlement(owner):
+    """Cached plan entitlement of an owner (User or id)"""
+    owner_id = getattr(owner, 'pk', owner)
+    key = _cache_key(owner_id)
+    entitlement = cache.get(key)
+    if entitlement is not None and (entitlement.next_expiry is None or entitlement.next_expiry > timezone.now()):
+        return entitlement
+
+    now = timezone.now()
+    entitlement = compute_entitlement(owner_id, now)
+    timeout = settings.OWNER_ENTITLEMENT_CACHE_SECONDS
+    if entitlement.next_expiry is not None:
+        # Expire with the owner's next plan expiry
+        timeout = max(1, min(timeout, int((entitlement.next_expiry - now).total_seconds()) + 1))
+    cache.set(key, entitlement, timeout)
+    return entitlement
+
+
+def invalidate_entitlement(*owner_ids):
+    """Drop cached entitlements after an owner's properties or payments change"""
+    cache.delete_many([_cache_key(owner_id) for owner_id in owner_ids])
@@ -0,0 +1,156 @@
+"""
+Bulk exports of payments, properties and users for the finance team
+
+Exports are streamed: rows are read from the database with
+`.iterator(chunk_size=...)` as plain value tuples (no model instances) and
+written out a chunk at a time, so memory use stays flat however many rows
+are exported. The same generators back the admin download endpoint
+(StreamingHttpResponse) and the `export_data` management command.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Property, Payment
+
+User = get_user_model()
+
+
+# export name -> queryset, exported columns, date-range field, status field
+EXPORTS = {
+    'payments': {
+        'queryset': lambda: Payment.objects.all(),
+        'columns': [
+            'id', 'razorpay_order_id', 'razorpay_payment_id', 'property_id', 'property__title',
+            'owner_id', 'owner__username', 'amount', 'plan_type', 'status', 'created_at', 'updated_at',
+        ],
+        'date_field': 'created_at',
+        'status_field': 'status',
+        'statuses': Payment.PaymentStatus.values,
+    },
+    'properties': {
+        'queryset': lambda: Property.objects.all(),
+        'columns': [
+            'id', 'title', 'owner_id', 'owner__username', 'location', 'property_type', 'price', 'bhk',
+            'status', 'is_paid', 'plan_type', 'plan_expiry_date', 'views_count', 'created_at', 'updated_at',
+        ],
+        'date_field': 'created_at',
+        'status_field': 'status',
+        'statuses': Property.Status.values,
+    },
+    'users': {
+        'queryset': lambda: User.objects.all(),
+        'columns': ['id', 'username', 'email', 'phone_number', 'role', 'is_active', 'date_joined', 'last_login'],
+        'date_field': 'date_joined',
+        'status_field': 'role',
+        'statuses': User.Role.values,
+    },
+}
+
+# format -> content type
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(name, start=None, end=None, status=None):
+    """
+    Rows of an export as value tuples, in id order. start / end are
+    'YYYY-MM-DD' strings (both days included); status is one of the export's
+    statuses (the role for users). Raises ValueError for bad filters.
+    """
+    config = EXPORTS.get(name)
+    if config is None:
+        raise ValueError(f"Unknown export '{name}'. Choose from: {', '.join(EXPORTS)}.")
+
+    queryset = config['queryset']()
+    date_field = config['date_field']
+    for label, value in (('start', start), ('end', end)):
+        if not value:
+            continue
+        try:
+            day = parse_date(value) if isinstance(value, str) else value
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValueError(f"Invalid {label} date '{value}', expected YYYY-MM-DD.")
+        # Ranges on the raw column (not __date) so the date indexes are usable
+        if label == 'start':
+            queryset = queryset.filter(**{f'{date_field}__gte': _start_of_day(day)})
+        else:
+            queryset = queryset.filter(**{f'{date_field}__lt': _start_of_day(day + timedelta(days=1))})
+
+    if status:
+        if status not in config['statuses']:
+            raise ValueError(f"Invalid status '{status}'. Choose from: {', '.join(config['statuses'])}.")
+        queryset = queryset.filter(**{config['status_field']: status})
+
+    return queryset.order_by('pk').values_list(*config['columns'])
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+# Cells starting with these are run as formulas by spreadsheet applications
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # User-entered text (usernames, titles, locations): make it inert
+        return "'" + value
+    return value
+
+
+def _csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(_csv_cell(value) for value in row)
+
+
+def _ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def _chunked(lines, chunk_size):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_export(name, export_format='csv', start=None, end=None, status=None, chunk_size=None):
+    """
+    Generator of text chunks of an export. Filters are validated before the
+    first chunk, so bad input raises ValueError here rather than mid-stream.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{export_format}'. Choose from: {', '.join(EXPORT_FORMATS)}.")
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    rows = export_queryset(name, start, end, status)
+    columns = EXPORTS[name]['columns']
+    lines = (_csv_lines if export_format == 'csv' else _ndjson_lines)(columns, rows.iterator(chunk_size=chunk_size))
+    return _chunked(lines, chunk_size)
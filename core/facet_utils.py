@@ -0,0 +1,160 @@
+"""
+Facet counts for the tenant search filters
+
+All facets are computed from ONE grouped query: the visible listings that
+match the current search are grouped by (property_type, bhk, furnishing,
+bachelors_allowed, price bucket, area bucket). The handful of resulting rows
+is then summed per dimension in Python.
+
+The categorical filters (type, BHK, furnishing, bachelors) are left out of
+the SQL and applied to the grouped rows instead, so each of those facets
+shows what selecting a different value would return ("disjunctive" facets)
+rather than collapsing to the single value already selected.
+"""
+from django.db.models import Case, When, Value, IntegerField, Count
+
+from .models import Property
+from .search_utils import search_tenant_properties
+
+
+CATEGORICAL_FACETS = ['property_type', 'bhk', 'furnishing', 'bachelors_allowed']
+
+# (min, max) in INR per month; None means open-ended
+PRICE_BUCKETS = [
+    (None, 5000),
+    (5000, 10000),
+    (10000, 20000),
+    (20000, 35000),
+    (35000, 50000),
+    (50000, None),
+]
+
+# (min, max) in sqft
+AREA_BUCKETS = [
+    (None, 500),
+    (500, 1000),
+    (1000, 1500),
+    (1500, 2000),
+    (2000, 3000),
+    (3000, None),
+]
+
+
+def _bucket_expression(field, buckets):
+    """Case/When that maps a numeric column to the index of its bucket"""
+    whens = []
+    for index, (low, high) in enumerate(buckets):
+        if high is None:
+            continue
+        whens.append(When(**{f'{field}__lt': high}, then=Value(index)))
+    return Case(*whens, default=Value(len(buckets) - 1), output_field=IntegerField())
+
+
+def _bucket_value(low, high):
+    return f"{low or ''}-{high or ''}"
+
+
+def _bucket_label(low, high, unit_prefix='', unit_suffix=''):
+    if low is None:
+        return f"Under {unit_prefix}{high:,}{unit_suffix}"
+    if high is None:
+        return f"{unit_prefix}{low:,}{unit_suffix}+"
+    return f"{unit_prefix}{low:,} - {unit_prefix}{high:,}{unit_suffix}"
+
+
+def _row_matches(row, filters, skip):
+    """Apply the selected categorical filters (except `skip`) to a grouped row"""
+    if skip != 'property_type' and filters['property_type']:
+        if (row['property_type'] or '').lower() != filters['property_type'].lower():
+            return False
+    if skip != 'bhk' and filters['bhk']:
+        try:
+            if row['bhk'] != int(filters['bhk']):
+                return False
+        except ValueError:
+            pass
+    if skip != 'furnishing' and filters['furnishing']:
+        if row['furnishing'] != filters['furnishing']:
+            return False
+    if skip != 'bachelors_allowed' and filters['bachelors_allowed'] in ('yes', 'no'):
+        if row['bachelors_allowed'] != (filters['bachelors_allowed'] == 'yes'):
+            return False
+    return True
+
+
+def tenant_facets(filters):
+    """
+    Facet counts for the tenant dashboard filters.
+
+    Returns a dict of facet name -> list of {'value', 'label', 'count'},
+    e.g. facets['bhk'] == [{'value': '2', 'label': '2 BHK', 'count': 14}, ...]
+    """
+    base_filters = dict(filters, **{facet: '' for facet in CATEGORICAL_FACETS})
+    queryset = search_tenant_properties(base_filters)[0]
+
+    rows = list(
+        queryset.annotate(
+            price_bucket=_bucket_expression('price', PRICE_BUCKETS),
+            area_bucket=_bucket_expression('super_built_area', AREA_BUCKETS),
+        ).values(
+            'property_type', 'bhk', 'furnishing', 'bachelors_allowed', 'price_bucket', 'area_bucket'
+        ).annotate(count=Count('pk')).order_by()
+    )
+
+    counters = {facet: {} for facet in [*CATEGORICAL_FACETS, 'price', 'area']}
+    for row in rows:
+        for facet in CATEGORICAL_FACETS:
+            if _row_matches(row, filters, skip=facet):
+                counters[facet][row[facet]] = counters[facet].get(row[facet], 0) + row['count']
+        if _row_matches(row, filters, skip=None):
+            counters['price'][row['price_bucket']] = counters['price'].get(row['price_bucket'], 0) + row['count']
+            counters['area'][row['area_bucket']] = counters['area'].get(row['area_bucket'], 0) + row['count']
+
+    furnishing_labels = dict(Property.Furnishing.choices)
+
+    return {
+        'property_type': [
+            {'value': value, 'label': value, 'count': count}
+            for value, count in sorted(counters['property_type'].items())
+        ],
+        'bhk': [
+            {'value': str(value), 'label': f'{value} BHK', 'count': count}
+            for value, count in sorted(counters['bhk'].items())
+        ],
+        'furnishing': [
+            {'value': value, 'label': furnishing_labels.get(value, value), 'count': count}
+            for value, count in sorted(counters['furnishing'].items())
+        ],
+        'bachelors_allowed': [
+            {'value': 'yes' if value else 'no', 'label': 'Yes' if value else 'No', 'count': count}
+            for value, count in sorted(counters['bachelors_allowed'].items(), reverse=True)
+        ],
+        'price': [
+            {
+                'value': _bucket_value(low, high),
+                'label': _bucket_label(low, high, unit_prefix='₹'),
+                'min': low,
+                'max': high,
+                'count': counters['price'].get(index, 0),
+            }
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        'area': [
+            {
+                'value': _bucket_value(low, high),
+                'label': _bucket_label(low, high, unit_suffix=' sqft'),
+                'min': low,
+                'max': high,
+                'count': counters['area'].get(index, 0),
+            }
+            for index, (low, high) in enumerate(AREA_BUCKETS)
+        ],
+    }
+
+
+def facet_count_lookup(facets):
+    """{'bhk': {'2': 14, ...}, ...} so templates can do facet_counts.bhk.2"""
+    return {
+        facet: {str(item['value']): item['count'] for item in items}
+        for facet, items in facets.items()
+    }
@@ -0,0 +1,173 @@
+"""
+Geo search helpers for RentEase
+
+Every listing's search doc stores its coordinates and their geohash - a short
+string naming the grid cell the point falls in, where each extra character
+splits the cell into 32 smaller ones and nearby points share a prefix.
+
+A "within this box" query is answered in two steps:
+  1. the box is covered with a handful of geohash cells and each cell becomes
+     a range on the indexed geohash column (geohash >= 'tdr1' AND
+     geohash < 'tdr1~'), so only candidates close to the box are read;
+  2. the exact latitude/longitude bounds trim the corners the cells overhang.
+
+Radius queries search the bounding box of the circle and then compute the
+haversine distance of the remaining candidates inside the database, which
+also gives the distance to sort by.
+"""
+import math
+
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Precision stored on each search doc - a cell of about 150m x 150m
+GEOHASH_PRECISION = 7
+
+# Upper bound on the cells a query box is covered with; bigger boxes use
+# coarser (shorter) cells instead of more of them
+MAX_COVER_CELLS = 16
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Sorts past every geohash character, so [prefix, prefix + '~') is a prefix range
+PREFIX_RANGE_END = '~'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point, e.g. (9.9312, 76.2673) -> 't9y0rxb'"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash bits alternate longitude, latitude, longitude, ...
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def geohash_bounds(geohash):
+    """(south, west, north, east) of the cell a geohash names"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lng_range if even else lat_range
+            middle = (bounds[0] + bounds[1]) / 2
+            if bits >> shift & 1:
+                bounds[0] = middle
+            else:
+                bounds[1] = middle
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell of `precision` characters"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def covering_cells(south, west, north, east):
+    """
+    The geohash cells covering a bounding box, at the finest precision that
+    needs at most MAX_COVER_CELLS of them.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        columns = math.floor(east / width) - math.floor(west / width) + 1
+        if rows * columns <= MAX_COVER_CELLS:
+            break
+
+    cells = set()
+    # Step through the box one cell at a time, sampling each cell's centre
+    lat = (math.floor(south / height) + 0.5) * height
+    while lat < north + height / 2:
+        lng = (math.floor(west / width) + 0.5) * width
+        while lng < east + width / 2:
+            cells.add(encode_geohash(
+                min(max(lat, -90.0), 90.0), min(max(lng, -180.0), 180.0), precision
+            ))
+            lng += width
+        lat += height
+    return sorted(cells)
+
+
+def parse_bbox(value):
+    """'south,west,north,east' -> tuple of floats, or None if malformed"""
+    try:
+        south, west, north, east = (float(part) for part in value.split(','))
+    except (ValueError, AttributeError):
+        return None
+    if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+        return None
+    return south, west, north, east
+
+
+def bbox_around(latitude, longitude, radius_km):
+    """Bounding box (south, west, north, east) of a circle around a point"""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    lng_delta = 180.0 if cos_lat < 1e-6 else min(180.0, lat_delta / cos_lat)
+    return (
+        max(-90.0, latitude - lat_delta),
+        max(-180.0, longitude - lng_delta),
+        min(90.0, latitude + lat_delta),
+        min(180.0, longitude + lng_delta),
+    )
+
+
+def filter_within_bbox(queryset, south, west, north, east):
+    """Restrict a ListingSearchDoc queryset to listings inside a bounding box"""
+    cells = Q()
+    for cell in covering_cells(south, west, north, east):
+        cells |= Q(geohash__gte=cell, geohash__lt=cell + PREFIX_RANGE_END)
+    return queryset.filter(cells).filter(
+        latitude__range=(south, north),
+        longitude__range=(west, east),
+    )
+
+
+def haversine_km(latitude, longitude):
+    """Database expression for the great-circle distance (km) of each row to a point"""
+    lat = math.radians(latitude)
+    lng = math.radians(longitude)
+    d_lat = Radians(F('latitude')) - Value(lat)
+    d_lng = Radians(F('longitude')) - Value(lng)
+    a = (
+        Power(Sin(d_lat / 2), 2)
+        + Value(math.cos(lat)) * Cos(Radians(F('latitude'))) * Power(Sin(d_lng / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a))
+
+
+def filter_within_radius(queryset, latitude, longitude, radius_km):
+    """
+    Restrict a ListingSearchDoc queryset to listings within `radius_km` of a
+    point, annotated with their `distance_km`
+    """
+    queryset = filter_within_bbox(queryset, *bbox_around(latitude, longitude, radius_km))
+    return queryset.annotate(
+        distance_km=haversine_km(latitude, longitude)
+    ).filter(distance_km__lte=radius_km)
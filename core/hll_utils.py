@@ -0,0 +1,123 @@
+"""
+Unique listing viewers with HyperLogLog sketches
+
+views_count counts page loads, so a tenant refreshing a listing inflates
+it. Storing every (viewer, property, day) to count distinct viewers would
+grow with traffic. Instead, each PropertyViewDaily row keeps a HyperLogLog
+sketch of the ids of that day's viewers: 2**HLL_PRECISION one-byte
+registers (4 KB, zlib-compressed when stored, so quiet days take a few
+bytes) that estimate the number of distinct viewers to within about 1.6%.
+
+Sketches are merged by taking the maximum of each register, so the unique
+viewers of a week or a month are estimated by merging that period's daily
+sketches - a viewer seen on several days is counted once. The buffered
+view counter (core/view_count_utils.py) adds viewers to the day's sketch
+when it flushes.
+"""
+import hashlib
+import math
+import zlib
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import PropertyViewDaily
+
+
+# 2**12 registers: 4 KB per sketch, ~1.6% standard error
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+# Bits of the 64-bit hash left after the register index
+_VALUE_BITS = 64 - HLL_PRECISION
+_ALPHA = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+
+# Register ranks fit in 7 bits, so the registers of two sketches can be
+# compared all at once as one big integer: setting the high bit of every byte
+# of a and subtracting b leaves that bit set exactly where a >= b
+_HIGH_BITS = int.from_bytes(b'\x80' * HLL_REGISTERS, 'big')
+_ALL_BITS = (1 << (8 * HLL_REGISTERS)) - 1
+
+
+def _register_max(a, b):
+    """Byte-wise maximum of two register arrays"""
+    a, b = int.from_bytes(a, 'big'), int.from_bytes(b, 'big')
+    a_wins = (((a | _HIGH_BITS) - b) & _HIGH_BITS) >> 7
+    mask = a_wins * 0xFF
+    return ((a & mask) | (b & ~mask & _ALL_BITS)).to_bytes(HLL_REGISTERS, 'big')
+
+
+class HyperLogLog:
+    """Estimates the number of distinct values added to it"""
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers else bytearray(HLL_REGISTERS)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Sketch stored with to_bytes() (an empty value is an empty sketch)"""
+        return cls(zlib.decompress(data) if data else None)
+
+    def to_bytes(self):
+        return zlib.compress(bytes(self.registers))
+
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        index = hashed >> _VALUE_BITS
+        rest = hashed & ((1 << _VALUE_BITS) - 1)
+        # Position of the first 1 bit in the remaining bits
+        rank = _VALUE_BITS - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Add every value of another sketch to this one"""
+        self.registers = bytearray(_register_max(self.registers, other.registers))
+        return self
+
+    def count(self):
+        """Estimated number of distinct values added"""
+        registers = bytes(self.registers)
+        harmonic = sum(registers.count(rank) * 2.0 ** -rank for rank in set(registers))
+        estimate = _ALPHA * HLL_REGISTERS * HLL_REGISTERS / harmonic
+        zeros = registers.count(0)
+        if estimate <= 2.5 * HLL_REGISTERS and zeros:
+            # Small cardinalities: linear counting is more accurate
+            estimate = HLL_REGISTERS * math.log(HLL_REGISTERS / zeros)
+        return round(estimate)
+
+
+def sketch_with_viewers(data, viewer_ids):
+    """A stored sketch with viewer ids added, ready to store again"""
+    sketch = HyperLogLog.from_bytes(data)
+    for viewer_id in viewer_ids:
+        sketch.add(viewer_id)
+    return sketch.to_bytes()
+
+
+def unique_viewers(property_ids, periods=(7, 30), today=None):
+    """
+    Estimated unique viewers of each property over the last N days (today
+    included) for each N in periods, and of all the properties together,
+    from one query. Returns ({property id: {N: viewers}}, {N: viewers}).
+    """
+    today = today or timezone.localdate()
+    first_days = {days: today - timedelta(days=days - 1) for days in periods}
+    sketches = {pk: {days: HyperLogLog() for days in periods} for pk in property_ids}
+    overall = {days: HyperLogLog() for days in periods}
+
+    rows = PropertyViewDaily.objects.filter(
+        property_id__in=property_ids, date__gte=min(first_days.values()), date__lte=today
+    ).exclude(viewer_sketch=b'').values_list('property_id', 'date', 'viewer_sketch')
+    for pk, date, data in rows.iterator():
+        daily = HyperLogLog.from_bytes(data)
+        for days, first_day in first_days.items():
+            if date >= first_day:
+                sketches[pk][days].merge(daily)
+                overall[days].merge(daily)
+
+    return (
+        {pk: {days: sketch.count() for days, sketch in by_period.items()} for pk, by_period in sketches.items()},
+        {days: sketch.count() for days, sketch in overall.items()},
+    )
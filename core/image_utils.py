@@ -0,0 +1,30 @@
+"""
+Property photo summary
+
+Listing cards only need a property's first photo and how many photos it has.
+Both are stored on Property itself (cover_image, image_count) and copied to
+the listing's search doc, so rendering a list of properties never queries
+the images table once per card. The full photo list is only read when a
+gallery is opened.
+"""
+from .models import Property, PropertyImage, ListingSearchDoc
+
+
+def refresh_property_images(property_id):
+    """
+    Recompute the cover photo and photo count of a property after photos
+    were added or removed. Returns (cover_image, image_count).
+    """
+    names = list(
+        PropertyImage.objects.filter(property_id=property_id).order_by('id').values_list('image', flat=True)
+    )
+    cover_image = names[0] if names else ''
+    # Queryset updates: no post_save, so the search index is left alone
+    Property.objects.filter(pk=property_id).update(cover_image=cover_image, image_count=len(names))
+    ListingSearchDoc.objects.filter(pk=property_id).update(cover_image=cover_image)
+    return cover_image, len(names)
+
+
+def image_urls(property_obj):
+    """URLs of every photo of a property in upload order, for galleries"""
+    return [image.image.url for image in property_obj.images.order_by('id')]
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from core.models import Property
+from core.models import Property, ListingSearchDoc
+from core.search_utils import invalidate_search_cache
+from core.autocomplete_utils import invalidate_location_index
 
 class Command(BaseCommand):
     help = 'Check and hide properties with expired plans'
@@ -20,6 +22,12 @@ class Command(BaseCommand):
             # Change status to PENDING_APPROVAL or MAINTENANCE
             expired_properties.update(status=Property.Status.PENDING_APPROVAL)
             
+            # update() bypasses the model signals, so drop the search docs and
+            # cached search results and location suggestions here
+            ListingSearchDoc.objects.filter(plan_expiry_date__lte=now).delete()
+            invalidate_search_cache()
+            invalidate_location_index()
+            
             self.stdout.write(
                 self.style.SUCCESS(
                     f'Successfully hidden {count} expired properties'
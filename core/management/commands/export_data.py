@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from core.export_utils import EXPORTS, EXPORT_FORMATS, stream_export
+
+class Command(BaseCommand):
+    help = 'Stream payments, properties or users to a CSV / NDJSON file (or stdout) for offline reporting'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=list(EXPORTS), help='What to export')
+        parser.add_argument('--format', default='csv', choices=list(EXPORT_FORMATS), help='Output format')
+        parser.add_argument('--start', help='First day to include (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to include (YYYY-MM-DD)')
+        parser.add_argument('--status', help='Only rows with this status (role for users)')
+        parser.add_argument('--output', help='File to write; defaults to stdout')
+        parser.add_argument('--chunk-size', type=int, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        try:
+            chunks = stream_export(
+                options['name'],
+                options['format'],
+                start=options['start'],
+                end=options['end'],
+                status=options['status'],
+                chunk_size=options['chunk_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not options['output']:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for chunk in chunks:
+                output.write(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully exported {options['name']} to {options['output']}")
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from core.revenue_utils import rebuild_revenue_rollup
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue rollup (RevenueDaily) from the Payment table'
+
+    def handle(self, *args, **kwargs):
+        rows = rebuild_revenue_rollup()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {rows} daily revenue rows')
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from core import search_utils
+from core.autocomplete_utils import invalidate_location_index
+
+class Command(BaseCommand):
+    help = 'Rebuild the listing search docs and full-text search index used by the tenant dashboard'
+
+    def handle(self, *args, **kwargs):
+        docs = search_utils.rebuild_listing_docs()
+        search_utils.invalidate_search_cache()
+        invalidate_location_index()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {docs} listing search docs')
+        )
+
+        if not search_utils.fts_enabled():
+            self.stdout.write(
+                self.style.WARNING('Full-text index is only available on SQLite - skipped')
+            )
+            return
+
+        count = search_utils.rebuild_index()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully indexed {count} properties')
+        )
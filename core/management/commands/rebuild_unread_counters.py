@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from core.unread_utils import rebuild_unread_counters
+
+class Command(BaseCommand):
+    help = 'Recompute the unread message counters of every conversation and user from the Message table'
+
+    def handle(self, *args, **kwargs):
+        conversations = rebuild_unread_counters()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt unread counters for {conversations} conversations')
+        )
@@ -0,0 +1,155 @@
+"""
+Server-side marker clustering for the tenant map
+
+Markers are grouped on the geohash grid already stored on every search doc:
+at each zoom level a geohash prefix of suitable length names the grid cell,
+so clustering is a single GROUP BY substr(geohash, 1, n) with count, centroid
+and price range per cell - no per-zoom tables to maintain.
+
+The viewport is split into standard web-map tiles (the same z/x/y tiles
+Leaflet loads) and the clusters of each tile are cached separately, so
+panning only computes the tiles that scrolled into view. Geohash cells do not
+line up with tile edges, so each cell belongs to the one tile containing its
+centre and is clustered there whole - a cell never becomes two markers. Tile entries are
+keyed on the search cache generation and the filter set, so they expire
+together with the search results whenever listings change (in every process
+when the cache is shared, see REDIS_URL in settings).
+"""
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import Substr
+
+from .geo_utils import GEOHASH_PRECISION, cell_size, filter_within_bbox, geohash_bounds
+from .search_utils import filters_cache_key, search_cache_version, search_tenant_properties
+
+
+MIN_ZOOM = 0
+MAX_ZOOM = 19
+
+# Aim for roughly this many grid cells across one 256px tile
+CELLS_PER_TILE = 8
+
+# Mercator projection limit - tiles do not extend past these latitudes
+MAX_LATITUDE = 85.05112878
+
+
+def precision_for_zoom(zoom):
+    """Longest geohash prefix whose cells are still at least 1/CELLS_PER_TILE of a tile wide"""
+    tile_width = 360.0 / (2 ** zoom)
+    precision = 1
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        if cell_size(candidate)[1] >= tile_width / CELLS_PER_TILE:
+            precision = candidate
+    return precision
+
+
+def _tile_x(longitude, zoom):
+    return int((longitude + 180.0) / 360.0 * (2 ** zoom))
+
+
+def _tile_y(latitude, zoom):
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    lat = math.radians(latitude)
+    return int((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * (2 ** zoom))
+
+
+def tile_bbox(zoom, x, y):
+    """(south, west, north, east) of a z/x/y tile"""
+    n = 2 ** zoom
+
+    def latitude(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return latitude(y + 1), x / n * 360.0 - 180.0, latitude(y), (x + 1) / n * 360.0 - 180.0
+
+
+def tiles_for_bbox(south, west, north, east, zoom):
+    """The z/x/y tiles covering a viewport, as (x, y) pairs"""
+    last = 2 ** zoom - 1
+    x_range = range(max(0, _tile_x(west, zoom)), min(last, _tile_x(east, zoom)) + 1)
+    y_range = range(max(0, _tile_y(north, zoom)), min(last, _tile_y(south, zoom)) + 1)
+    return [(x, y) for x in x_range for y in y_range]
+
+
+def _owns_cell(cell, south, west, north, east):
+    """Whether a geohash cell's centre falls in a tile (edges shared with the next tile excluded)"""
+    cell_south, cell_west, cell_north, cell_east = geohash_bounds(cell)
+    latitude, longitude = (cell_south + cell_north) / 2, (cell_west + cell_east) / 2
+    return south <= latitude < north and west <= longitude < east
+
+
+def _tile_clusters(queryset, zoom, x, y):
+    """Clusters of one tile, straight from the database"""
+    precision = precision_for_zoom(zoom)
+    height, width = cell_size(precision)
+    south, west, north, east = tile_bbox(zoom, x, y)
+    # A cell belongs to the tile its centre is in, so read every listing of
+    # the cells centred in this tile, including the parts outside it
+    rows = filter_within_bbox(
+        queryset,
+        max(-90.0, south - height / 2), max(-180.0, west - width / 2),
+        min(90.0, north + height / 2), min(180.0, east + width / 2),
+    ).annotate(
+        cell=Substr('geohash', 1, precision)
+    ).values('cell').annotate(
+        count=Count('pk'),
+        lat=Avg('latitude'),
+        lng=Avg('longitude'),
+        min_price=Min('price'),
+        max_price=Max('price'),
+        property_id=Min('pk'),
+    ).order_by('cell')
+
+    return [
+        {
+            'geohash': row['cell'],
+            'count': row['count'],
+            'lat': round(row['lat'], 6),
+            'lng': round(row['lng'], 6),
+            'min_price': float(row['min_price']),
+            'max_price': float(row['max_price']),
+            # Single listings link straight to their details page
+            'property_id': row['property_id'] if row['count'] == 1 else None,
+        }
+        for row in rows
+        if _owns_cell(row['cell'], south, west, north, east)
+    ]
+
+
+def map_clusters(filters, bbox, zoom):
+    """
+    Marker clusters for a viewport at `zoom`, honouring the tenant `filters`
+    (the viewport replaces any bbox filter).
+
+    Returns None when the viewport spans more than MAP_CLUSTER_MAX_TILES tiles.
+    """
+    zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+    tiles = tiles_for_bbox(*bbox, zoom)
+    if len(tiles) > settings.MAP_CLUSTER_MAX_TILES:
+        return None
+
+    filters = dict(filters, bbox='', sort_by='')
+    queryset = search_tenant_properties(filters)[0]
+    key_prefix = f'map_tile:v{search_cache_version()}'
+
+    keys = {
+        (x, y): filters_cache_key(f'{key_prefix}:{zoom}/{x}/{y}', filters)
+        for x, y in tiles
+    }
+    cached = cache.get_many(list(keys.values()))
+
+    clusters = []
+    missing = {}
+    for tile, key in keys.items():
+        if key in cached:
+            clusters.extend(cached[key])
+        else:
+            tile_clusters = _tile_clusters(queryset, zoom, *tile)
+            missing[key] = tile_clusters
+            clusters.extend(tile_clusters)
+    if missing:
+        cache.set_many(missing, settings.MAP_CLUSTER_TILE_CACHE_SECONDS)
+    return clusters
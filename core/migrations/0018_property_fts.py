@@ -0,0 +1,40 @@
+# Full-text search index for the tenant dashboard search
+
+from django.db import migrations
+
+
+FTS_COLUMNS = ['title', 'ad_title', 'location', 'description', 'amenities']
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    columns = ', '.join(FTS_COLUMNS)
+    coalesced = ', '.join(f"COALESCE({column}, '')" for column in FTS_COLUMNS)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS core_property_fts USING fts5("
+            f"{columns}, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            f"INSERT INTO core_property_fts (rowid, {columns}) "
+            f"SELECT id, {coalesced} FROM core_property"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS core_property_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_property_latitude_property_longitude'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:57
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Amenity normalization as of this migration (copied so later changes to
+# core/amenity_utils.py do not change what this migration did)
+AMENITY_ALIASES = {
+    'Wi-Fi': ['wifi', 'wi fi', 'wireless internet', 'internet', 'broadband'],
+    'Parking': ['parking', 'car parking', 'car park', 'covered parking', 'garage', 'parking space'],
+    'Gym': ['gym', 'gymnasium', 'fitness centre', 'fitness center', 'fitness'],
+    'Swimming Pool': ['swimming pool', 'pool', 'swimming'],
+    'Air Conditioning': ['ac', 'a c', 'air conditioning', 'air conditioner', 'air conditioners', 'air conditioned', 'centralized ac', 'central ac'],
+    'Lift': ['lift', 'elevator', 'elevators', 'lifts'],
+    'Security': ['security', '24x7 security', '24 7 security', 'security guard', 'gated security', 'gated community'],
+    'CCTV': ['cctv', 'cctv camera', 'cctv cameras', 'cctv surveillance'],
+    'Power Backup': ['power backup', 'backup', 'generator', 'inverter', 'power back up'],
+    'Water Supply': ['water supply', '24x7 water', '24 7 water supply', 'water', 'borewell'],
+    'Garden': ['garden', 'park', 'lawn'],
+    'Balcony': ['balcony', 'balconies', 'terrace'],
+    'Modular Kitchen': ['modular kitchen', 'kitchen'],
+    'Clubhouse': ['clubhouse', 'club house', 'community hall'],
+    'Play Area': ['play area', 'kids play area', 'children play area', 'playground'],
+    'Washing Machine': ['washing machine', 'washer'],
+    'Refrigerator': ['refrigerator', 'fridge'],
+    'Pet Friendly': ['pet friendly', 'pets allowed', 'pets'],
+}
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_key(text):
+    return _NON_ALNUM_RE.sub(' ', text.lower()).strip()
+
+
+_ALIAS_LOOKUP = {
+    normalize_key(alias): canonical
+    for canonical, aliases in AMENITY_ALIASES.items()
+    for alias in [canonical, *aliases]
+}
+
+
+def parse_amenities(text):
+    names = []
+    for part in (text or '').split(','):
+        key = normalize_key(part)
+        if not key:
+            continue
+        name = _ALIAS_LOOKUP.get(key) or ' '.join(word.capitalize() for word in key.split())
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def backfill_property_amenities(apps, schema_editor):
+    Property = apps.get_model('core', 'Property')
+    Amenity = apps.get_model('core', 'Amenity')
+    PropertyAmenity = apps.get_model('core', 'PropertyAmenity')
+
+    amenity_ids = {}
+    links = []
+    for property_id, text in Property.objects.values_list('id', 'amenities').iterator():
+        for position, name in enumerate(parse_amenities(text)):
+            key = normalize_key(name)
+            if key not in amenity_ids:
+                amenity_ids[key] = Amenity.objects.create(key=key, name=name).id
+            links.append(PropertyAmenity(property_id=property_id, amenity_id=amenity_ids[key], position=position))
+    PropertyAmenity.objects.bulk_create(links, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_property_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Amenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(help_text='Normalized lookup key', max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Amenities',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyAmenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0, help_text="Order in the owner's amenities text")),
+                ('amenity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='property_amenities', to='core.amenity')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='property_amenities', to='core.property')),
+            ],
+            options={
+                'ordering': ['position'],
+                'indexes': [models.Index(fields=['amenity', 'property'], name='core_propamenity_lookup_idx')],
+                'unique_together': {('property', 'amenity')},
+            },
+        ),
+        migrations.RunPython(backfill_property_amenities, migrations.RunPython.noop),
+    ]
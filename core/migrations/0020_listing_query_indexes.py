@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_amenity_propertyamenity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['owner', '-updated_at'], name='core_conv_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['tenant', '-updated_at'], name='core_conv_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'is_read', 'sender'], name='core_message_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at'], name='core_payment_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['status', 'plan_expiry_date'], name='core_prop_status_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['owner', 'plan_type', 'plan_expiry_date'], name='core_prop_owner_plan_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_paid', True), ('status', 'PENDING')), fields=['-created_at'], name='core_prop_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_paid', True), ('status', 'AVAILABLE')), fields=['plan_expiry_date', 'plan_type'], name='core_prop_live_idx'),
+        ),
+    ]
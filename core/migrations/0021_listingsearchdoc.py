@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+PLAN_PRIORITY = {'premium': 3, 'standard': 2, 'basic': 1}
+
+
+def backfill_listing_docs(apps, schema_editor):
+    Property = apps.get_model('core', 'Property')
+    PropertyImage = apps.get_model('core', 'PropertyImage')
+    ListingSearchDoc = apps.get_model('core', 'ListingSearchDoc')
+
+    docs = []
+    listings = Property.objects.filter(
+        status='AVAILABLE', is_paid=True, plan_expiry_date__isnull=False
+    ).select_related('owner')
+    for prop in listings.iterator():
+        cover = PropertyImage.objects.filter(property_id=prop.id).order_by('id').first()
+        docs.append(ListingSearchDoc(
+            property_id=prop.id,
+            owner_id=prop.owner_id,
+            owner_name=prop.owner.username,
+            title=prop.title,
+            location=prop.location,
+            property_type=prop.property_type,
+            price=prop.price,
+            bhk=prop.bhk,
+            furnishing=prop.furnishing,
+            super_built_area=prop.super_built_area,
+            bachelors_allowed=prop.bachelors_allowed,
+            plan_type=prop.plan_type,
+            plan_priority=PLAN_PRIORITY.get(prop.plan_type, 0),
+            plan_expiry_date=prop.plan_expiry_date,
+            cover_image=cover.image.name if cover else '',
+            created_at=prop.created_at,
+        ))
+    ListingSearchDoc.objects.bulk_create(docs, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_listing_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSearchDoc',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_doc', serialize=False, to='core.property')),
+                ('owner_name', models.CharField(max_length=150)),
+                ('title', models.CharField(max_length=255)),
+                ('location', models.CharField(max_length=255)),
+                ('property_type', models.CharField(max_length=100)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('bhk', models.IntegerField(default=1)),
+                ('furnishing', models.CharField(max_length=50)),
+                ('super_built_area', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('bachelors_allowed', models.BooleanField(default=True)),
+                ('plan_type', models.CharField(max_length=20)),
+                ('plan_priority', models.PositiveSmallIntegerField(default=0, help_text='3 = premium, 2 = standard, 1 = basic')),
+                ('plan_expiry_date', models.DateTimeField()),
+                ('cover_image', models.ImageField(blank=True, upload_to='property_images/')),
+                ('created_at', models.DateTimeField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['plan_expiry_date'], name='core_doc_expiry_idx'), models.Index(fields=['-plan_priority', '-created_at'], name='core_doc_priority_idx'), models.Index(fields=['price', '-plan_priority'], name='core_doc_price_idx'), models.Index(fields=['super_built_area', '-plan_priority'], name='core_doc_area_idx'), models.Index(fields=['-created_at', '-plan_priority'], name='core_doc_newest_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_listing_docs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+# Geohash encoding as of this migration (copied so later changes to
+# core/geo_utils.py do not change what this migration did)
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 7
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash bits alternate longitude, latitude, longitude, ...
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def backfill_doc_coordinates(apps, schema_editor):
+    ListingSearchDoc = apps.get_model('core', 'ListingSearchDoc')
+    docs = ListingSearchDoc.objects.filter(
+        property__latitude__isnull=False, property__longitude__isnull=False
+    ).select_related('property')
+    for doc in docs.iterator():
+        doc.latitude = float(doc.property.latitude)
+        doc.longitude = float(doc.property.longitude)
+        doc.geohash = encode_geohash(doc.latitude, doc.longitude)
+        doc.save(update_fields=['latitude', 'longitude', 'geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_listingsearchdoc'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingsearchdoc',
+            name='geohash',
+            field=models.CharField(blank=True, help_text='Geohash of latitude/longitude, see core/geo_utils.py', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='listingsearchdoc',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='listingsearchdoc',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='listingsearchdoc',
+            index=models.Index(fields=['geohash'], name='core_doc_geohash_idx'),
+        ),
+        migrations.RunPython(backfill_doc_coordinates, migrations.RunPython.noop),
+    ]
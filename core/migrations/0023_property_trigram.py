@@ -0,0 +1,40 @@
+# Trigram index for typo-tolerant location/title matching
+
+from django.db import migrations
+
+
+TRIGRAM_COLUMNS = ['title', 'location']
+
+
+def create_trigram_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    columns = ', '.join(TRIGRAM_COLUMNS)
+    coalesced = ', '.join(f"COALESCE({column}, '')" for column in TRIGRAM_COLUMNS)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS core_property_trigram USING fts5("
+            f"{columns}, tokenize = 'trigram')"
+        )
+        cursor.execute(
+            f"INSERT INTO core_property_trigram (rowid, {columns}) "
+            f"SELECT id, {coalesced} FROM core_property"
+        )
+
+
+def drop_trigram_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS core_property_trigram")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_listingsearchdoc_geo'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_table, drop_trigram_table),
+    ]
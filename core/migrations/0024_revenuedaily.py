@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:14
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+PLAN_PRICES = {99: 'basic', 199: 'standard', 399: 'premium'}
+
+
+def backfill_revenue(apps, schema_editor):
+    Payment = apps.get_model('core', 'Payment')
+    RevenueDaily = apps.get_model('core', 'RevenueDaily')
+
+    # The plan used to be inferred from the amount
+    for amount, plan_type in PLAN_PRICES.items():
+        Payment.objects.filter(amount=amount).update(plan_type=plan_type)
+
+    rows = Payment.objects.filter(status__in=['SUCCESS', 'FAILED']).annotate(
+        date=TruncDate('created_at')
+    ).values('date', 'plan_type', 'status').annotate(
+        count=Count('id'), total=Sum('amount')
+    ).order_by()
+    RevenueDaily.objects.bulk_create([RevenueDaily(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_property_trigram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='plan_type',
+            field=models.CharField(choices=[('basic', 'Basic Plan'), ('standard', 'Standard Plan'), ('premium', 'Premium Plan')], default='basic', help_text='Plan this payment is for', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='RevenueDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Day the payment was created')),
+                ('plan_type', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SUCCESS', 'Success'), ('FAILED', 'Failed')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'unique_together': {('date', 'plan_type', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_revenue, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_image_summary(apps, schema_editor):
+    Property = apps.get_model('core', 'Property')
+    PropertyImage = apps.get_model('core', 'PropertyImage')
+
+    images = PropertyImage.objects.filter(property_id=OuterRef('pk'))
+    Property.objects.update(
+        cover_image=Coalesce(Subquery(images.order_by('id').values('image')[:1]), Value('')),
+        image_count=Coalesce(Subquery(
+            images.order_by().values('property_id').annotate(count=Count('id')).values('count')
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_revenuedaily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='cover_image',
+            field=models.ImageField(blank=True, editable=False, help_text='First uploaded photo', upload_to='property_images/'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='image_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of uploaded photos'),
+        ),
+        migrations.RunPython(backfill_image_summary, migrations.RunPython.noop),
+    ]
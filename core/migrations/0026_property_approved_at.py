@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_property_image_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='approved_at',
+            field=models.DateTimeField(blank=True, help_text='When an admin last approved the listing', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['approved_at'], name='core_prop_approved_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counters(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    Conversation = apps.get_model('core', 'Conversation')
+    Message = apps.get_model('core', 'Message')
+
+    def unread(participant):
+        return Coalesce(Subquery(
+            Message.objects.filter(conversation_id=OuterRef('pk'), is_read=False)
+            .exclude(sender_id=OuterRef(participant)).order_by()
+            .values('conversation_id').annotate(count=Count('id')).values('count')
+        ), 0)
+
+    Conversation.objects.update(owner_unread=unread('owner_id'), tenant_unread=unread('tenant_id'))
+
+    def total(role, field):
+        return Coalesce(Subquery(
+            Conversation.objects.filter(**{role: OuterRef('pk')}).order_by()
+            .values(role).annotate(total=Sum(field)).values('total')
+        ), 0)
+
+    User.objects.update(unread_messages=total('owner', 'owner_unread') + total('tenant', 'tenant_unread'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_property_approved_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='owner_unread',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='tenant_unread',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='unread_messages',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(condition=models.Q(('owner_unread__gt', 0)), fields=['owner', '-updated_at'], name='core_conv_owner_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(condition=models.Q(('tenant_unread__gt', 0)), fields=['tenant', '-updated_at'], name='core_conv_tenant_unread_idx'),
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_unread_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='core.property')),
+            ],
+            options={
+                'unique_together': {('property', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_propertyviewdaily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyviewdaily',
+            name='viewer_sketch',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:05
+
+import re
+
+from django.db import migrations
+
+
+# Amenity normalization as of this migration: only true spelling variants
+# are merged, unknown amenities keep the owner's wording
+AMENITY_ALIASES = {
+    'Wi-Fi': ['wifi', 'wi fi', 'wireless internet'],
+    'Parking': ['car parking', 'car park', 'parking space'],
+    'Gym': ['gymnasium', 'fitness centre', 'fitness center'],
+    'Swimming Pool': ['swimming pool'],
+    'Air Conditioning': ['ac', 'a c', 'air conditioner', 'air conditioners', 'air conditioned'],
+    'Lift': ['lifts', 'elevator', 'elevators'],
+    'Security': ['24x7 security', '24 7 security'],
+    'CCTV': ['cctv camera', 'cctv cameras'],
+    'Power Backup': ['power back up'],
+    'Water Supply': ['24x7 water supply', '24 7 water supply'],
+    'Garden': [],
+    'Balcony': ['balconies'],
+    'Modular Kitchen': [],
+    'Clubhouse': ['club house'],
+    'Play Area': ['kids play area', 'children play area'],
+    'Washing Machine': [],
+    'Refrigerator': ['fridge'],
+    'Pet Friendly': ['pets allowed'],
+}
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_key(text):
+    return _NON_ALNUM_RE.sub(' ', text.lower()).strip()
+
+
+_ALIAS_LOOKUP = {
+    normalize_key(alias): canonical
+    for canonical, aliases in AMENITY_ALIASES.items()
+    for alias in [canonical, *aliases]
+}
+
+
+def parse_amenities(text):
+    names = []
+    for part in (text or '').split(','):
+        key = normalize_key(part)
+        if not key:
+            continue
+        name = _ALIAS_LOOKUP.get(key) or ' '.join(part.split())
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def reparse_property_amenities(apps, schema_editor):
+    """Relink every property's amenities now that unrelated amenities are no longer merged"""
+    Property = apps.get_model('core', 'Property')
+    Amenity = apps.get_model('core', 'Amenity')
+    PropertyAmenity = apps.get_model('core', 'PropertyAmenity')
+
+    amenity_ids = dict(Amenity.objects.values_list('key', 'id'))
+    links = []
+    for property_id, text in Property.objects.values_list('id', 'amenities').iterator():
+        for position, name in enumerate(parse_amenities(text)):
+            key = normalize_key(name)
+            if key not in amenity_ids:
+                amenity_ids[key] = Amenity.objects.create(key=key, name=name).id
+            links.append(PropertyAmenity(property_id=property_id, amenity_id=amenity_ids[key], position=position))
+
+    PropertyAmenity.objects.all().delete()
+    PropertyAmenity.objects.bulk_create(links, batch_size=500)
+    Amenity.objects.filter(property_amenities__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_propertyviewdaily_viewer_sketch'),
+    ]
+
+    operations = [
+        migrations.RunPython(reparse_property_amenities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_reparse_amenities'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='property',
+            name='property_type',
+            field=models.CharField(choices=[('Apartment', 'Apartment'), ('Villa', 'Villa'), ('Independent House', 'Independent House'), ('Flat', 'Flat'), ('Duplex', 'Duplex'), ('Penthouse', 'Penthouse'), ('Studio', 'Studio'), ('Other', 'Other')], default='Apartment', max_length=100),
+        ),
+    ]
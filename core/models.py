@@ -13,6 +13,8 @@ class User(AbstractUser):
     role = models.CharField(max_length=50, choices=Role.choices, default=Role.TENANT)
     profile_image = models.ImageField(upload_to='profiles/', blank=True, null=True)
     phone_number = models.CharField(max_length=15, blank=True, null=True)
+    # Unread messages across all the user's conversations (core/unread_utils.py)
+    unread_messages = models.PositiveIntegerField(default=0, editable=False)
 
     groups = models.ManyToManyField(
         'auth.Group',
@@ -30,6 +32,53 @@ class User(AbstractUser):
     )
 
 # 2. Property Model
+class _DaysUntil(models.Func):
+    """Whole days from `now` until a datetime column (negative once it has passed)"""
+    template = 'EXTRACT(DAY FROM %(expressions)s)'
+    arg_joiner = ' - '
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, now):
+        super().__init__(expression, models.Value(now, output_field=models.DateTimeField()))
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context,
+        )
+
+
+class PropertyQuerySet(models.QuerySet):
+    def with_plan_status(self, now=None):
+        """
+        Annotate plan_active and plan_days_left (the SQL versions of
+        is_plan_active() / days_remaining()) so lists of properties can show
+        their plan status without per-row Python.
+        """
+        from django.db.models.functions import Coalesce, Greatest
+        from django.utils import timezone
+        now = now or timezone.now()
+        return self.annotate(
+            plan_active=models.Case(
+                models.When(plan_expiry_date__gt=now, then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+            plan_days_left=Coalesce(Greatest(_DaysUntil('plan_expiry_date', now), models.Value(0)), models.Value(0)),
+        )
+
+    def visible(self, now=None):
+        """Listings tenants can see: approved, paid and with an active plan"""
+        from django.utils import timezone
+        return self.filter(
+            status=Property.Status.AVAILABLE,
+            is_paid=True,
+            plan_expiry_date__gt=now or timezone.now(),
+        )
+
+
 class Property(models.Model):
     class Status(models.TextChoices):
         PENDING_APPROVAL = "PENDING", "Pending Approval"
@@ -83,6 +132,7 @@ class Property(models.Model):
     amenities = models.TextField(help_text="Comma-separated list of amenities", blank=True)
     status = models.CharField(max_length=50, choices=Status.choices, default=Status.PENDING_APPROVAL)
     rejection_reason = models.TextField(blank=True, null=True, help_text="Reason for rejection by admin")
+    approved_at = models.DateTimeField(blank=True, null=True, help_text="When an admin last approved the listing")
     # Added is_paid field
     is_paid = models.BooleanField(default=False)
     # Plan-related fields
@@ -93,11 +143,40 @@ class Property(models.Model):
     ], default='basic', help_text="Selected plan type")
     plan_expiry_date = models.DateTimeField(blank=True, null=True, help_text="Date when the plan expires")
     views_count = models.IntegerField(default=0, help_text="Number of times this property has been viewed")
+    # Photo summary kept in step with PropertyImage (see refresh_property_images)
+    # so listing cards never query the images table per property
+    cover_image = models.ImageField(upload_to='property_images/', blank=True, editable=False, help_text="First uploaded photo")
+    image_count = models.PositiveIntegerField(default=0, editable=False, help_text="Number of uploaded photos")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PropertyQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Properties"
+        # is_paid is left out of the column lists: a bare boolean filter cannot
+        # be used as an index equality on SQLite, so it lives in the partial
+        # index conditions instead.
+        indexes = [
+            # Listing visibility by status (plan_expiry_date > now) and check_expired_plans
+            models.Index(fields=['status', 'plan_expiry_date'], name='core_prop_status_expiry_idx'),
+            # Owner plan limits / dashboard (owner + plan type + active plan)
+            models.Index(fields=['owner', 'plan_type', 'plan_expiry_date'], name='core_prop_owner_plan_idx'),
+            # Admin approval queue (paid and pending, newest first)
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(status='PENDING', is_paid=True),
+                name='core_prop_pending_idx',
+            ),
+            # Approvals over time (admin analytics)
+            models.Index(fields=['approved_at'], name='core_prop_approved_idx'),
+            # Live listings only (tenant search, home page premium listings)
+            models.Index(
+                fields=['plan_expiry_date', 'plan_type'],
+                condition=models.Q(status='AVAILABLE', is_paid=True),
+                name='core_prop_live_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -125,6 +204,77 @@ class PropertyImage(models.Model):
     def __str__(self):
         return f"Image for {self.property.title}"
 
+# Normalized amenities (parsed from Property.amenities)
+class Amenity(models.Model):
+    """Canonical amenity name, e.g. 'Wi-Fi' for 'wifi' / 'wi fi' / 'Internet'"""
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=100, unique=True, help_text="Normalized lookup key")
+
+    class Meta:
+        verbose_name_plural = "Amenities"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+class PropertyAmenity(models.Model):
+    """Join table between Property and Amenity, maintained from Property.amenities"""
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='property_amenities')
+    amenity = models.ForeignKey(Amenity, on_delete=models.CASCADE, related_name='property_amenities')
+    position = models.PositiveSmallIntegerField(default=0, help_text="Order in the owner's amenities text")
+
+    class Meta:
+        unique_together = ('property', 'amenity')
+        ordering = ['position']
+        indexes = [
+            # Covers the amenity set-intersection filter (amenity -> properties)
+            models.Index(fields=['amenity', 'property'], name='core_propamenity_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.amenity.name} at {self.property.title}"
+
+# Read-optimized copy of each visible listing for tenant search
+class ListingSearchDoc(models.Model):
+    """
+    One row per approved, paid listing holding just the columns the tenant
+    search and listing cards need, so searches read a single narrow table.
+    Maintained by core/signals.py and the check_expired_plans command.
+    """
+    property = models.OneToOneField(Property, on_delete=models.CASCADE, primary_key=True, related_name='search_doc')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    owner_name = models.CharField(max_length=150)
+    title = models.CharField(max_length=255)
+    location = models.CharField(max_length=255)
+    property_type = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    bhk = models.IntegerField(default=1)
+    furnishing = models.CharField(max_length=50)
+    super_built_area = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    bachelors_allowed = models.BooleanField(default=True)
+    plan_type = models.CharField(max_length=20)
+    plan_priority = models.PositiveSmallIntegerField(default=0, help_text="3 = premium, 2 = standard, 1 = basic")
+    plan_expiry_date = models.DateTimeField()
+    cover_image = models.ImageField(upload_to='property_images/', blank=True)
+    created_at = models.DateTimeField()
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, help_text="Geohash of latitude/longitude, see core/geo_utils.py")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['plan_expiry_date'], name='core_doc_expiry_idx'),
+            # One index per tenant sort mode
+            models.Index(fields=['-plan_priority', '-created_at'], name='core_doc_priority_idx'),
+            models.Index(fields=['price', '-plan_priority'], name='core_doc_price_idx'),
+            models.Index(fields=['super_built_area', '-plan_priority'], name='core_doc_area_idx'),
+            models.Index(fields=['-created_at', '-plan_priority'], name='core_doc_newest_idx'),
+            models.Index(fields=['geohash'], name='core_doc_geohash_idx'),
+        ]
+
+    def __str__(self):
+        return f"Search doc for {self.title}"
+
 # 3. Payment Model for Property Registration Fee
 class Payment(models.Model):
     class PaymentStatus(models.TextChoices):
@@ -138,25 +288,91 @@ class Payment(models.Model):
     razorpay_payment_id = models.CharField(max_length=255, blank=True, null=True)
     razorpay_signature = models.CharField(max_length=255, blank=True, null=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)  # Amount in INR
+    plan_type = models.CharField(max_length=20, choices=[
+        ('basic', 'Basic Plan'),
+        ('standard', 'Standard Plan'),
+        ('premium', 'Premium Plan')
+    ], default='basic', help_text="Plan this payment is for")
     status = models.CharField(max_length=20, choices=PaymentStatus.choices, default=PaymentStatus.PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Revenue statistics and the transaction list (status filter, newest first)
+            models.Index(fields=['status', 'created_at'], name='core_payment_status_idx'),
+        ]
+
     def __str__(self):
         return f"Payment for {self.property.title} - {self.status}"
 
+# Daily revenue rollup
+class RevenueDaily(models.Model):
+    """
+    Number and sum of completed (successful or failed) payments per day,
+    plan and status. Kept up to date by core/revenue_utils.py whenever a
+    payment changes status, so revenue figures never scan the Payment table.
+    """
+    date = models.DateField(help_text="Day the payment was created")
+    plan_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, choices=Payment.PaymentStatus.choices)
+    count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('date', 'plan_type', 'status')
+
+    def __str__(self):
+        return f"{self.date} {self.plan_type} {self.status}: {self.count} / ₹{self.total}"
+
+# Daily listing views
+class PropertyViewDaily(models.Model):
+    """
+    Page views of a property per day. Written in batches by the buffered
+    view counter (core/view_count_utils.py) - one row per property and day,
+    not per view - and read by the owner analytics API.
+    """
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    # HyperLogLog sketch of the day's viewer ids (core/hll_utils.py)
+    viewer_sketch = models.BinaryField(default=b'', editable=False)
+
+    class Meta:
+        unique_together = ('property', 'date')
+
+    def __str__(self):
+        return f"{self.property_id} {self.date}: {self.views} views"
+
 # Messaging System
 class Conversation(models.Model):
     """Conversation between a tenant and owner about a property"""
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='conversations')
     tenant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tenant_conversations')
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owner_conversations')
+    # Messages each participant has not read yet (core/unread_utils.py)
+    tenant_unread = models.PositiveIntegerField(default=0, editable=False)
+    owner_unread = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('property', 'tenant', 'owner')
         ordering = ['-updated_at']
+        indexes = [
+            # Inbox listings for each participant, most recent first
+            models.Index(fields=['owner', '-updated_at'], name='core_conv_owner_idx'),
+            models.Index(fields=['tenant', '-updated_at'], name='core_conv_tenant_idx'),
+            # Conversations with unread messages, most recent first
+            models.Index(
+                fields=['owner', '-updated_at'], condition=models.Q(owner_unread__gt=0),
+                name='core_conv_owner_unread_idx',
+            ),
+            models.Index(
+                fields=['tenant', '-updated_at'], condition=models.Q(tenant_unread__gt=0),
+                name='core_conv_tenant_unread_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Conversation: {self.tenant.username} - {self.owner.username} about {self.property.title}"
@@ -164,6 +380,15 @@ class Conversation(models.Model):
     def get_last_message(self):
         return self.messages.last()
 
+    def unread_for(self, user):
+        """Messages in this conversation the given user has not read"""
+        if user.pk == self.owner_id:
+            return self.owner_unread
+        if user.pk == self.tenant_id:
+            return self.tenant_unread
+        # Admins: anything either participant has not read
+        return max(self.owner_unread, self.tenant_unread)
+
 class Message(models.Model):
     """Individual message in a conversation"""
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
@@ -174,6 +399,10 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Unread counts: conversation + is_read=False, excluding the viewer's own messages
+            models.Index(fields=['conversation', 'is_read', 'sender'], name='core_message_unread_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username} at {self.created_at}"
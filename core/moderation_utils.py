@@ -0,0 +1,75 @@
+"""
+Bulk moderation of pending property listings
+
+Approving or rejecting a batch is one `UPDATE ... WHERE id IN (...)`
+(rejection reasons are written per property with a CASE expression) instead
+of a save() per listing. Queryset updates skip post_save, so the derived
+search data of the whole batch is refreshed afterwards in bulk, and the
+owners' rejection emails are sent together once the transaction commits.
+"""
+from django.db import transaction
+from django.db.models import Case, TextField, Value, When
+from django.utils import timezone
+
+from .models import Property
+from .autocomplete_utils import invalidate_location_index
+from .email_utils import send_property_rejection_notifications
+from .entitlement_utils import invalidate_entitlement
+from .search_utils import invalidate_search_cache, rebuild_listing_docs
+
+
+MODERATION_ACTIONS = ('approve', 'reject')
+
+
+def bulk_moderate(action, property_ids, reasons=None, default_reason='', dashboard_url=''):
+    """
+    Approve or reject the pending properties among property_ids.
+
+    reasons maps property id -> rejection reason; properties without one use
+    default_reason. Raises ValueError for an unknown action or a rejection
+    without a reason. Returns the ids that were moderated (properties that
+    are no longer pending are skipped).
+    """
+    if action not in MODERATION_ACTIONS:
+        raise ValueError(f"Unknown action '{action}'.")
+    reasons = {pk: (reason or '').strip() for pk, reason in (reasons or {}).items()}
+    default_reason = (default_reason or '').strip()
+
+    with transaction.atomic():
+        pending = list(
+            Property.objects.select_for_update().filter(
+                id__in=property_ids, status=Property.Status.PENDING_APPROVAL
+            ).select_related('owner')
+        )
+        ids = [prop.id for prop in pending]
+        if not ids:
+            return []
+
+        batch = Property.objects.filter(id__in=ids)
+        now = timezone.now()
+        if action == 'approve':
+            batch.update(status=Property.Status.AVAILABLE, rejection_reason=None, approved_at=now, updated_at=now)
+        else:
+            rejections = [(prop, reasons.get(prop.id) or default_reason) for prop in pending]
+            missing = [prop.title for prop, reason in rejections if not reason]
+            if missing:
+                raise ValueError(f"Please provide a reason for rejecting: {', '.join(missing)}.")
+            batch.update(
+                status=Property.Status.REJECTED,
+                rejection_reason=Case(
+                    *[When(id=prop.id, then=Value(reason)) for prop, reason in rejections],
+                    output_field=TextField(),
+                ),
+                updated_at=now,
+            )
+            notifications = [(prop.owner, prop.title, reason) for prop, reason in rejections]
+            transaction.on_commit(
+                lambda: send_property_rejection_notifications(notifications, dashboard_url)
+            )
+
+        # Listing status changed for the whole batch
+        rebuild_listing_docs(ids)
+        invalidate_search_cache()
+        invalidate_location_index()
+        invalidate_entitlement(*{prop.owner_id for prop in pending})
+    return ids
@@ -0,0 +1,93 @@
+"""
+Keyset (cursor) pagination helpers for RentEase
+
+Instead of OFFSET pagination, each page remembers the sort-key values of its
+last row and the next page asks for rows strictly "after" them. Every page is
+then a single indexed range scan, no matter how deep the user scrolls, and
+rows inserted while scrolling never shift or duplicate results.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder cuts datetimes down to milliseconds, which would make
+    rows sharing a millisecond be skipped or repeated; keep microseconds.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    """Serialize the sort-key values of a row into an opaque URL-safe token"""
+    raw = json.dumps(values, cls=_CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor token; returns None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _field_name(ordering_field):
+    return ordering_field.lstrip('-')
+
+
+def _after_filter(ordering, values):
+    """
+    Build the lexicographic "row comes after values" condition for ordering,
+    e.g. ['-price', 'id'] -> (price < p) OR (price = p AND id > i)
+    """
+    condition = Q()
+    for position, ordering_field in enumerate(ordering):
+        lookup = 'lt' if ordering_field.startswith('-') else 'gt'
+        branch = Q(**{f'{_field_name(ordering_field)}__{lookup}': values[position]})
+        for previous_field, previous_value in zip(ordering[:position], values[:position]):
+            branch &= Q(**{_field_name(previous_field): previous_value})
+        condition |= branch
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=20):
+    """
+    Return (items, next_cursor) for one page of `queryset` ordered by `ordering`.
+
+    `ordering` must end with a unique column (normally 'id' / '-id') so the
+    order is total and the cursor is unambiguous. `next_cursor` is None on the
+    last page.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor, len(ordering))
+    if values is not None:
+        queryset = queryset.filter(_after_filter(ordering, values))
+
+    try:
+        items = list(queryset[:page_size + 1])
+    except (ValidationError, ValueError, TypeError):
+        # Tampered cursor values that cannot be coerced to the column types
+        items = []
+
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, _field_name(field)) for field in ordering])
+    return items, next_cursor
@@ -0,0 +1,122 @@
+"""
+Daily revenue rollup (RevenueDaily)
+
+Every time a payment changes status, the views take a snapshot of it before
+the change and call record_payment_change() afterwards. The payment is moved
+from its old (day, plan, status) bucket to the new one with two F()
+updates, so revenue reports read a few rollup rows instead of aggregating
+every payment. Only completed payments (SUCCESS / FAILED) are rolled up.
+
+The browser's verify request and the Razorpay webhook usually arrive
+together for the same payment, so both complete it through
+complete_payment(), which claims the row with a conditional UPDATE on its
+status: only one of them moves the payment into the rollup.
+
+`python manage.py rebuild_revenue_rollup` recomputes the table from Payment.
+"""
+from collections import namedtuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .analytics_utils import invalidate_buckets
+from .models import Payment, RevenueDaily
+
+
+# Plan prices in INR
+PLAN_PRICES = {'basic': 99, 'standard': 199, 'premium': 399}
+
+# How long a paid plan keeps a listing visible
+PLAN_DURATION_DAYS = {'basic': 90, 'standard': 180, 'premium': 365}
+
+ROLLUP_STATUSES = (Payment.PaymentStatus.SUCCESS, Payment.PaymentStatus.FAILED)
+
+PaymentSnapshot = namedtuple('PaymentSnapshot', ['date', 'plan_type', 'status', 'amount'])
+
+
+def payment_snapshot(payment):
+    """The rollup bucket and amount of a payment, taken before it is changed"""
+    return PaymentSnapshot(
+        date=timezone.localdate(payment.created_at),
+        plan_type=payment.plan_type,
+        status=payment.status,
+        amount=payment.amount,
+    )
+
+
+def _bump(snapshot, sign):
+    if snapshot.status not in ROLLUP_STATUSES:
+        return
+    bucket = RevenueDaily.objects.filter(
+        date=snapshot.date, plan_type=snapshot.plan_type, status=snapshot.status
+    )
+    changes = {'count': F('count') + sign, 'total': F('total') + sign * snapshot.amount}
+    if bucket.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            RevenueDaily.objects.create(
+                date=snapshot.date, plan_type=snapshot.plan_type, status=snapshot.status,
+                count=sign, total=sign * snapshot.amount,
+            )
+    except IntegrityError:
+        # Another request created the bucket in the meantime
+        bucket.update(**changes)
+
+
+def record_payment_change(before, payment):
+    """Move a saved payment from its `before` snapshot's bucket to its current one"""
+    after = payment_snapshot(payment)
+    if after == before:
+        return
+    with transaction.atomic():
+        _bump(before, -1)
+        _bump(after, +1)
+    if Payment.PaymentStatus.SUCCESS in (before.status, after.status):
+        # The revenue series counts successful payments in the bucket they were created in
+        invalidate_buckets('revenue', payment.created_at)
+
+
+def complete_payment(payment, status, **fields):
+    """
+    Move a payment to `status` (SUCCESS / FAILED), setting `fields` (e.g.
+    the Razorpay payment id), and record it in the rollup. A pending payment
+    can succeed or fail, and a failed one can still succeed (Razorpay
+    captured it after all). Returns False, leaving the payment alone, when
+    another request already completed it; `payment` is refreshed from the
+    database either way.
+    """
+    previous = [Payment.PaymentStatus.PENDING]
+    if status == Payment.PaymentStatus.SUCCESS:
+        previous.append(Payment.PaymentStatus.FAILED)
+
+    with transaction.atomic():
+        for claimed_from in previous:
+            if Payment.objects.filter(pk=payment.pk, status=claimed_from).update(status=status):
+                break
+        else:
+            payment.refresh_from_db()
+            return False
+        payment.refresh_from_db()
+        before = payment_snapshot(payment)._replace(status=claimed_from)
+        for field, value in fields.items():
+            setattr(payment, field, value)
+        payment.save()
+        record_payment_change(before, payment)
+    return True
+
+
+def rebuild_revenue_rollup():
+    """Recompute every RevenueDaily row from the Payment table"""
+    rows = Payment.objects.filter(status__in=ROLLUP_STATUSES).annotate(
+        date=TruncDate('created_at')
+    ).values('date', 'plan_type', 'status').annotate(
+        count=Count('id'), total=Sum('amount')
+    ).order_by()
+
+    with transaction.atomic():
+        RevenueDaily.objects.all().delete()
+        RevenueDaily.objects.bulk_create([RevenueDaily(**row) for row in rows])
+    return RevenueDaily.objects.count()
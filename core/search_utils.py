@@ -0,0 +1,588 @@
+"""
+Search utility functions for RentEase
+
+Tenant searches read ListingSearchDoc, a narrow denormalized copy of every
+visible listing, and match text through a SQLite FTS5 virtual table
+(core_property_fts) that mirrors the searchable text columns of Property.
+When nothing matches, a second FTS5 table using the trigram tokenizer
+(core_property_trigram) finds listings whose title or location is spelled
+similarly ("Kakanad" -> "Kakkanad"). All of these are kept in sync by the signal handlers in core/signals.py and can be
+rebuilt with `python manage.py rebuild_search_index`.
+
+The tenant dashboard filters (get_tenant_filters / search_tenant_properties)
+also live here so the dashboard page and the infinite-scroll API build
+exactly the same query, together with the result cache in front of it.
+"""
+import hashlib
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q, Case, When, Value, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .models import Property, ListingSearchDoc
+from .amenity_utils import filter_by_amenities
+from .geo_utils import encode_geohash, parse_bbox, filter_within_bbox, filter_within_radius, haversine_km
+from .pagination_utils import decode_cursor, encode_cursor, keyset_page
+
+
+FTS_TABLE = 'core_property_fts'
+
+# Columns indexed in the FTS table, in table order
+FTS_COLUMNS = ['title', 'ad_title', 'location', 'description', 'amenities']
+
+# bm25() column weights - a hit in the title or location matters far more
+# than a hit somewhere in a long description
+FTS_WEIGHTS = {
+    'title': 10.0,
+    'ad_title': 5.0,
+    'location': 8.0,
+    'description': 1.0,
+    'amenities': 2.0,
+}
+
+FTS_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(FTS_COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+TRIGRAM_TABLE = 'core_property_trigram'
+
+# Columns indexed in the trigram table, in table order
+TRIGRAM_COLUMNS = ['title', 'location']
+
+TRIGRAM_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TRIGRAM_TABLE} USING fts5("
+    f"{', '.join(TRIGRAM_COLUMNS)}, tokenize = 'trigram')"
+)
+
+# Fuzzy matches must share at least this fraction of trigrams with the query
+FUZZY_MIN_SIMILARITY = 0.3
+
+# Candidates (best bm25 first) scored for similarity per fuzzy search
+FUZZY_MAX_CANDIDATES = 200
+
+
+def fts_enabled():
+    """FTS5 is only available on the SQLite backend"""
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """
+    Turn free text typed by a tenant into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term so user input can never be parsed
+    as FTS syntax, and terms are implicitly AND-ed together.
+    e.g. 'Kochi 2bhk' -> '"kochi"* "2bhk"*'
+    """
+    tokens = TOKEN_RE.findall(text.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _bm25_expression():
+    weights = ', '.join(str(FTS_WEIGHTS[column]) for column in FTS_COLUMNS)
+    return f"bm25({FTS_TABLE}, {weights})"
+
+
+def index_property(property_obj):
+    """Insert or refresh the FTS and trigram rows of a single property"""
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        for table, columns in ((FTS_TABLE, FTS_COLUMNS), (TRIGRAM_TABLE, TRIGRAM_COLUMNS)):
+            values = [getattr(property_obj, column) or '' for column in columns]
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [property_obj.pk])
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(columns))})",
+                [property_obj.pk, *values]
+            )
+
+
+def remove_property(property_id):
+    """Drop a property from the FTS and trigram indexes"""
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [property_id])
+        cursor.execute(f"DELETE FROM {TRIGRAM_TABLE} WHERE rowid = %s", [property_id])
+
+
+def rebuild_index():
+    """Re-create the whole FTS and trigram indexes from the core_property table"""
+    if not fts_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        for table, columns, create_sql in (
+            (FTS_TABLE, FTS_COLUMNS, FTS_CREATE_SQL),
+            (TRIGRAM_TABLE, TRIGRAM_COLUMNS, TRIGRAM_CREATE_SQL),
+        ):
+            coalesced = ', '.join(f"COALESCE({column}, '')" for column in columns)
+            cursor.execute(create_sql)
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+                f"SELECT id, {coalesced} FROM core_property"
+            )
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def apply_text_search(queryset, text):
+    """
+    Restrict a Property (or ListingSearchDoc) queryset to listings matching
+    `text` and annotate each row with `search_rank` (lower is a better match).
+
+    On SQLite this is a single FTS5 MATCH; other backends fall back to the
+    old icontains filter with a constant rank.
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if not fts_enabled():
+        return queryset.filter(
+            Q(location__icontains=text) | Q(title__icontains=text)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    matching_ids = RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+        (match,)
+    )
+    opts = queryset.model._meta
+    rank = RawSQL(
+        f"SELECT {_bm25_expression()} FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND rowid = {opts.db_table}.{opts.pk.column}",
+        (match,),
+        output_field=FloatField()
+    )
+    return queryset.filter(pk__in=matching_ids).annotate(search_rank=rank)
+
+
+def trigrams(word):
+    """Trigrams of a word padded like pg_trgm: 'kochi' -> {'  k', ' ko', 'koc', 'och', 'chi', 'hi '}"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query, text):
+    """
+    How well `text` matches `query`, 0..1: every query word is compared with
+    its most similar word in text (shared / total trigrams) and the scores
+    are averaged, so 'kakanad' scores 0.7 against 'Kakkanad, Kochi'.
+    """
+    query_words = TOKEN_RE.findall(query.lower())
+    text_grams = [trigrams(word) for word in TOKEN_RE.findall((text or '').lower())]
+    if not query_words or not text_grams:
+        return 0.0
+    total = 0.0
+    for word in query_words:
+        grams = trigrams(word)
+        total += max(len(grams & other) / len(grams | other) for other in text_grams)
+    return total / len(query_words)
+
+
+def build_trigram_query(text):
+    """
+    FTS5 MATCH expression selecting rows that share any trigram with text,
+    e.g. 'Kakanad' -> '"kak" OR "aka" OR "kan" OR "ana" OR "nad"'
+    """
+    grams = set()
+    for word in TOKEN_RE.findall(text.lower()):
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return ' OR '.join(f'"{gram}"' for gram in sorted(grams))
+
+
+def apply_fuzzy_search(queryset, text):
+    """
+    Restrict a ListingSearchDoc queryset to listings whose title or location
+    is spelled similarly to `text`, annotated with `search_rank` (lower is a
+    better match, like apply_text_search).
+
+    The trigram index picks the FUZZY_MAX_CANDIDATES listed properties that
+    share the most trigrams with the text; only those are scored with
+    similarity(). Returns an empty queryset when fuzzy search is unavailable.
+    """
+    no_matches = queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    match = build_trigram_query(text)
+    if not match or not fts_enabled():
+        return no_matches
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, title, location FROM {TRIGRAM_TABLE} "
+            f"WHERE {TRIGRAM_TABLE} MATCH %s "
+            f"AND rowid IN (SELECT property_id FROM {ListingSearchDoc._meta.db_table}) "
+            f"ORDER BY rank LIMIT %s",
+            [match, FUZZY_MAX_CANDIDATES]
+        )
+        candidates = cursor.fetchall()
+
+    scores = {}
+    for property_id, title, location in candidates:
+        score = max(similarity(text, location), similarity(text, title))
+        if score >= FUZZY_MIN_SIMILARITY:
+            scores[property_id] = score
+    if not scores:
+        return no_matches
+
+    rank = Case(
+        *[When(pk=property_id, then=Value(-score)) for property_id, score in scores.items()],
+        output_field=FloatField()
+    )
+    return queryset.filter(pk__in=list(scores)).annotate(search_rank=rank)
+
+
+# Listing search documents
+PLAN_PRIORITY = {'premium': 3, 'standard': 2, 'basic': 1}
+
+
+def is_listed(property_obj):
+    return (
+        property_obj.status == Property.Status.AVAILABLE
+        and property_obj.is_paid
+        and property_obj.plan_expiry_date is not None
+    )
+
+
+def _geo_fields(latitude, longitude):
+    """latitude/longitude/geohash values of a search doc"""
+    if latitude is None or longitude is None:
+        return {'latitude': None, 'longitude': None, 'geohash': ''}
+    latitude, longitude = float(latitude), float(longitude)
+    return {'latitude': latitude, 'longitude': longitude, 'geohash': encode_geohash(latitude, longitude)}
+
+
+def _listing_doc_fields(property_obj):
+    """Column values of a property's ListingSearchDoc (owner must be loaded)"""
+    return {
+        'owner_id': property_obj.owner_id,
+        'owner_name': property_obj.owner.username,
+        'title': property_obj.title,
+        'location': property_obj.location,
+        'property_type': property_obj.property_type,
+        'price': property_obj.price,
+        'bhk': property_obj.bhk,
+        'furnishing': property_obj.furnishing,
+        'super_built_area': property_obj.super_built_area,
+        'bachelors_allowed': property_obj.bachelors_allowed,
+        'plan_type': property_obj.plan_type,
+        'plan_priority': PLAN_PRIORITY.get(property_obj.plan_type, 0),
+        'plan_expiry_date': property_obj.plan_expiry_date,
+        'cover_image': property_obj.cover_image.name,
+        'created_at': property_obj.created_at,
+        **_geo_fields(property_obj.latitude, property_obj.longitude),
+    }
+
+
+def sync_listing_doc(property_obj):
+    """Create, refresh or drop the ListingSearchDoc row of a property"""
+    if not is_listed(property_obj):
+        ListingSearchDoc.objects.filter(pk=property_obj.pk).delete()
+        return
+
+    ListingSearchDoc.objects.update_or_create(
+        property_id=property_obj.pk,
+        defaults=_listing_doc_fields(property_obj),
+    )
+
+
+def rebuild_listing_docs(property_ids=None):
+    """
+    Re-create the ListingSearchDoc rows of the given properties, or of every
+    property, from the Property table (used after bulk updates that skip
+    post_save)
+    """
+    docs = ListingSearchDoc.objects.all()
+    listings = Property.objects.filter(
+        status=Property.Status.AVAILABLE, is_paid=True, plan_expiry_date__isnull=False
+    ).select_related('owner')
+    if property_ids is not None:
+        docs = docs.filter(pk__in=property_ids)
+        listings = listings.filter(pk__in=property_ids)
+    docs.delete()
+
+    docs = [
+        ListingSearchDoc(property_id=prop.pk, **_listing_doc_fields(prop))
+        for prop in listings.iterator(chunk_size=500)
+    ]
+    ListingSearchDoc.objects.bulk_create(docs, batch_size=500)
+    return len(docs)
+
+
+# Tenant dashboard search
+TENANT_FILTER_FIELDS = [
+    'location', 'property_type', 'min_price', 'max_price', 'bhk', 'furnishing',
+    'bachelors_allowed', 'min_area', 'max_area', 'amenities',
+    'lat', 'lng', 'radius_km', 'bbox',
+]
+
+# Every ordering ends with the primary key so keyset cursors are unambiguous
+TENANT_SORT_ORDERINGS = {
+    'priority': ['-plan_priority', '-created_at', '-pk'],
+    'price_low': ['price', '-plan_priority', 'pk'],
+    'price_high': ['-price', '-plan_priority', '-pk'],
+    'newest': ['-created_at', '-plan_priority', '-pk'],
+    'area_low': ['super_built_area', '-plan_priority', 'pk'],
+    'area_high': ['-super_built_area', '-plan_priority', '-pk'],
+}
+
+# sort_by=distance, only available when a point (lat/lng) is given
+DISTANCE_ORDERING = ['distance_km', '-plan_priority', 'pk']
+
+# Default sort when a text search is active - best matches first within each plan tier
+RELEVANCE_ORDERING = ['-plan_priority', 'search_rank', '-created_at', '-pk']
+
+
+def get_tenant_filters(params):
+    """Read the tenant dashboard filter values from a QueryDict"""
+    filters = {field: params.get(field, '').strip() for field in TENANT_FILTER_FIELDS}
+    filters['sort_by'] = params.get('sort_by', 'priority').strip()
+    return filters
+
+
+def filters_cache_key(prefix, filters):
+    """Stable cache key for a set of tenant filters (order/blank values don't matter)"""
+    canonical = sorted((key, value) for key, value in filters.items() if value)
+    digest = hashlib.md5(json.dumps(canonical).encode()).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+def visible_listings():
+    """
+    Search docs of the listings tenants can see. Docs only exist for approved,
+    paid listings, so the active-plan check is all that is left to do.
+    """
+    return ListingSearchDoc.objects.filter(plan_expiry_date__gt=timezone.now())
+
+
+def _apply_float_filter(queryset, lookup, value):
+    if value:
+        try:
+            return queryset.filter(**{lookup: float(value)})
+        except ValueError:
+            pass
+    return queryset
+
+
+def _parse_point(filters):
+    """(lat, lng) from the filters, or None if missing or out of range"""
+    try:
+        lat, lng = float(filters['lat']), float(filters['lng'])
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def _apply_geo_filters(queryset, filters):
+    """Viewport (bbox) and radius / distance-to-point filters"""
+    bbox = parse_bbox(filters['bbox']) if filters['bbox'] else None
+    if bbox:
+        queryset = filter_within_bbox(queryset, *bbox)
+
+    point = _parse_point(filters)
+    if point is None:
+        return queryset, False
+
+    try:
+        radius_km = float(filters['radius_km']) if filters['radius_km'] else None
+    except ValueError:
+        radius_km = None
+    if radius_km and radius_km > 0:
+        queryset = filter_within_radius(queryset, *point, radius_km)
+    else:
+        queryset = queryset.filter(latitude__isnull=False, longitude__isnull=False).annotate(
+            distance_km=haversine_km(*point)
+        )
+    return queryset, True
+
+
+def search_tenant_properties(filters):
+    """
+    Build the tenant search queryset (over ListingSearchDoc) for `filters`.
+
+    Returns (queryset, ordering); the queryset is annotated with search_rank
+    for text searches and distance_km when a point is given, but not ordered - pass ordering to keyset_page() or
+    order_by().
+    """
+    queryset = visible_listings()
+
+    if filters['location']:
+        matches = apply_text_search(queryset, filters['location'])
+        if not matches.exists():
+            # Nothing spelled exactly like that - try similar spellings
+            matches = apply_fuzzy_search(queryset, filters['location'])
+        queryset = matches
+
+    if filters['property_type']:
+        queryset = queryset.filter(property_type__iexact=filters['property_type'])
+
+    queryset = _apply_float_filter(queryset, 'price__gte', filters['min_price'])
+    queryset = _apply_float_filter(queryset, 'price__lte', filters['max_price'])
+
+    if filters['bhk']:
+        try:
+            queryset = queryset.filter(bhk=int(filters['bhk']))
+        except ValueError:
+            pass
+
+    if filters['furnishing']:
+        queryset = queryset.filter(furnishing=filters['furnishing'])
+
+    if filters['bachelors_allowed'] == 'yes':
+        queryset = queryset.filter(bachelors_allowed=True)
+    elif filters['bachelors_allowed'] == 'no':
+        queryset = queryset.filter(bachelors_allowed=False)
+
+    queryset = _apply_float_filter(queryset, 'super_built_area__gte', filters['min_area'])
+    queryset = _apply_float_filter(queryset, 'super_built_area__lte', filters['max_area'])
+
+    if filters['amenities']:
+        # Must have all of the requested amenities
+        queryset = filter_by_amenities(queryset, filters['amenities'])
+
+    queryset, has_distance = _apply_geo_filters(queryset, filters)
+
+    if filters['sort_by'] == 'distance' and has_distance:
+        ordering = DISTANCE_ORDERING
+    elif filters['sort_by'] in TENANT_SORT_ORDERINGS and filters['sort_by'] != 'priority':
+        ordering = TENANT_SORT_ORDERINGS[filters['sort_by']]
+    elif filters['location']:
+        ordering = RELEVANCE_ORDERING
+    else:  # priority (default)
+        ordering = TENANT_SORT_ORDERINGS['priority']
+
+    return queryset, ordering
+
+
+# Result cache
+#
+# The ordered ids of a search are cached under its canonical filter set. All
+# entries share a generation number that is bumped whenever listings change
+# (see invalidate_search_cache), which orphans every cached result at once
+# without having to know which filter sets a listing appeared in. The bump
+# reaches every server process only through a shared cache (REDIS_URL).
+RESULT_CACHE_VERSION_KEY = 'tenant_results:version'
+RESULT_CACHE_HITS_KEY = 'tenant_results:hits'
+RESULT_CACHE_MISSES_KEY = 'tenant_results:misses'
+
+# Fields that never affect which listings match or how they are ordered
+NON_SEARCH_FIELDS = {'views_count', 'updated_at'}
+
+
+def search_cache_version():
+    """Current generation of the search caches; part of every cache key"""
+    return cache.get_or_set(RESULT_CACHE_VERSION_KEY, 1, None)
+
+
+def invalidate_search_cache():
+    """Drop every cached search result and count (called when listings change)"""
+    try:
+        cache.incr(RESULT_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(RESULT_CACHE_VERSION_KEY, 2, None)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def search_cache_stats():
+    """Hit/miss counters of the result cache, for sizing it"""
+    hits = cache.get(RESULT_CACHE_HITS_KEY, 0)
+    misses = cache.get(RESULT_CACHE_MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+        'version': search_cache_version(),
+    }
+
+
+def cached_result_ids(queryset, ordering, filters):
+    """
+    Ordered ids of every result for `filters` (at most
+    TENANT_SEARCH_RESULT_CACHE_MAX_IDS), from the cache when possible.
+
+    Returns (ids, truncated).
+    """
+    key = filters_cache_key(f'tenant_results:v{search_cache_version()}', filters)
+    entry = cache.get(key)
+    if entry is not None:
+        _count(RESULT_CACHE_HITS_KEY)
+        return entry['ids'], entry['truncated']
+
+    _count(RESULT_CACHE_MISSES_KEY)
+    max_ids = settings.TENANT_SEARCH_RESULT_CACHE_MAX_IDS
+    rows = list(queryset.order_by(*ordering).values_list('pk', 'plan_expiry_date')[:max_ids + 1])
+    truncated = len(rows) > max_ids
+    rows = rows[:max_ids]
+    ids = [row[0] for row in rows]
+
+    # Never keep a result past the moment one of its listings' plan expires
+    timeout = settings.TENANT_SEARCH_RESULT_CACHE_SECONDS
+    if rows:
+        seconds_to_expiry = (min(row[1] for row in rows) - timezone.now()).total_seconds()
+        timeout = max(1, min(timeout, int(seconds_to_expiry)))
+
+    cache.set(key, {'ids': ids, 'truncated': truncated}, timeout)
+    return ids, truncated
+
+
+def tenant_results_page(queryset, ordering, filters, cursor=None, page_size=20):
+    """
+    One page of tenant results, served from the result cache.
+
+    Same contract and cursor format as pagination_utils.keyset_page(), which
+    is used directly when the cursor points past the cached window.
+    """
+    ids, truncated = cached_result_ids(queryset, ordering, filters)
+
+    start = 0
+    values = decode_cursor(cursor, len(ordering))
+    if values is not None:
+        try:
+            # Every ordering ends with the primary key
+            start = ids.index(values[-1]) + 1
+        except ValueError:
+            return keyset_page(queryset, ordering, cursor, page_size)
+
+    page_ids = ids[start:start + page_size]
+    if not page_ids and truncated:
+        return keyset_page(queryset, ordering, cursor, page_size)
+
+    # Re-apply the search filters so a listing that stopped being visible since
+    # the ids were cached is never shown
+    rows = queryset.in_bulk(page_ids)
+    items = [rows[property_id] for property_id in page_ids if property_id in rows]
+
+    next_cursor = None
+    if items and (start + page_size < len(ids) or truncated):
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+    return items, next_cursor
+
+
+def tenant_results_count(queryset, ordering, filters):
+    """
+    Total number of results for a filter set. Comes straight from the cached
+    ids unless the result set is larger than the cached window.
+    """
+    ids, truncated = cached_result_ids(queryset, ordering, filters)
+    if not truncated:
+        return len(ids)
+    key = filters_cache_key(f'tenant_count:v{search_cache_version()}', filters)
+    return cache.get_or_set(key, queryset.count, settings.TENANT_SEARCH_RESULT_CACHE_SECONDS)
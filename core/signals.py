@@ -0,0 +1,90 @@
+"""
+Signal handlers that keep derived search data (full-text index, amenities,
+listing search docs, location suggestions, cached results, photo summary,
+owner plan entitlements) in sync with Property, and unread message counters
+in sync with Message and Conversation
+"""
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import User, Property, PropertyImage, Payment, ListingSearchDoc, Conversation, Message
+from . import search_utils
+from .amenity_utils import sync_property_amenities
+from .autocomplete_utils import location_index
+from .image_utils import refresh_property_images
+from .entitlement_utils import invalidate_entitlement
+from .unread_utils import message_created, conversation_deleted
+
+
+def _suggested_location(property_obj):
+    """Location a property contributes to autocomplete, or None if tenants can't see it"""
+    if search_utils.is_listed(property_obj) and property_obj.plan_expiry_date > timezone.now():
+        return property_obj.location
+    return None
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, **kwargs):
+    """Refresh the full-text index, parsed amenities, search doc and search cache whenever a property is saved"""
+    update_fields = set(kwargs.get('update_fields') or [])
+    if update_fields and update_fields <= search_utils.NON_SEARCH_FIELDS:
+        # e.g. save(update_fields=['views_count']) - nothing searchable changed
+        return
+    search_utils.invalidate_search_cache()
+    old_location = ListingSearchDoc.objects.filter(
+        pk=instance.pk, plan_expiry_date__gt=timezone.now()
+    ).values_list('location', flat=True).first()
+    search_utils.sync_listing_doc(instance)
+    location_index.listing_changed(old_location, _suggested_location(instance))
+    if not update_fields or update_fields & set(search_utils.FTS_COLUMNS):
+        search_utils.index_property(instance)
+    if not update_fields or 'amenities' in update_fields:
+        sync_property_amenities(instance)
+
+
+@receiver(post_delete, sender=Property)
+def property_deleted(sender, instance, **kwargs):
+    """Remove deleted properties from the full-text index, suggestions and search cache"""
+    search_utils.remove_property(instance.pk)
+    search_utils.invalidate_search_cache()
+    location_index.listing_changed(_suggested_location(instance), None)
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=Payment)
+def owner_plans_changed(sender, instance, **kwargs):
+    """An owner's plan limits depend on their properties' plans and payments"""
+    invalidate_entitlement(instance.owner_id)
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+def property_image_changed(sender, instance, **kwargs):
+    """Keep the cover photo and photo count of the property and its search doc current"""
+    refresh_property_images(instance.property_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Owner names are copied onto their listings' search docs"""
+    if not created:
+        ListingSearchDoc.objects.filter(owner=instance).exclude(
+            owner_name=instance.username
+        ).update(owner_name=instance.username)
+
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, **kwargs):
+    """New messages are unread for everyone in the conversation but the sender"""
+    if created and not instance.is_read:
+        message_created(instance)
+
+
+# No post_delete receiver on Message: it would stop Django from deleting a
+# conversation's messages in one statement (see core/unread_utils.py)
+@receiver(pre_delete, sender=Conversation)
+def conversation_removed(sender, instance, **kwargs):
+    """A deleted conversation's unread messages no longer count towards its participants' totals"""
+    conversation_deleted(instance)
@@ -0,0 +1,85 @@
+"""
+Statistics for the admin dashboard and reports
+
+Each function answers all of its numbers with ONE query over its table,
+using conditional aggregates (COUNT/SUM ... FILTER (WHERE ...)) instead of
+a separate COUNT query per number. Payment figures come from the
+RevenueDaily rollup (see core/revenue_utils.py), not the Payment table.
+"""
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import User, Property, Payment, RevenueDaily
+from .revenue_utils import PLAN_PRICES
+
+
+def user_stats():
+    """Registered users (admins excluded), owners and tenants"""
+    return User.objects.exclude(is_superuser=True).aggregate(
+        total_users=Count('id'),
+        total_owners=Count('id', filter=Q(role='OWNER')),
+        total_tenants=Count('id', filter=Q(role='TENANT')),
+    )
+
+
+def property_stats():
+    """Paid listings and the ones waiting for approval"""
+    return Property.objects.aggregate(
+        total_properties=Count('id', filter=Q(is_paid=True)),
+        pending_count=Count('id', filter=Q(is_paid=True, status=Property.Status.PENDING_APPROVAL)),
+    )
+
+
+def owner_property_stats(owner, now=None):
+    """Listing counts of one owner's paid properties (admin owner profile)"""
+    active_plan = Q(plan_expiry_date__gt=now or timezone.now())
+    aggregates = {
+        'total_properties': Count('id'),
+        'active_properties': Count('id', filter=active_plan & Q(status=Property.Status.AVAILABLE)),
+        'pending_properties': Count('id', filter=Q(status=Property.Status.PENDING_APPROVAL)),
+        'rented_properties': Count('id', filter=Q(status=Property.Status.RENTED)),
+    }
+    for plan in PLAN_PRICES:
+        aggregates[f'{plan}_count'] = Count('id', filter=active_plan & Q(plan_type=plan))
+    return Property.objects.filter(owner=owner, is_paid=True).aggregate(**aggregates)
+
+
+def payment_stats(start_date=None, end_date=None):
+    """Revenue, payment outcome counts and revenue per plan, optionally for a date range"""
+    rollup = RevenueDaily.objects.all()
+    if start_date:
+        rollup = rollup.filter(date__gte=start_date)
+    if end_date:
+        rollup = rollup.filter(date__lte=end_date)
+
+    success = Q(status=Payment.PaymentStatus.SUCCESS)
+    aggregates = {
+        'total_revenue': Sum('total', filter=success),
+        'successful_payments_count': Sum('count', filter=success),
+        'failed_payments_count': Sum('count', filter=Q(status=Payment.PaymentStatus.FAILED)),
+    }
+    for plan in PLAN_PRICES:
+        aggregates[f'{plan}_total'] = Sum('total', filter=success & Q(plan_type=plan))
+        aggregates[f'{plan}_count'] = Sum('count', filter=success & Q(plan_type=plan))
+
+    row = rollup.aggregate(**aggregates)
+    return {
+        'total_revenue': row['total_revenue'] or 0,
+        'successful_payments_count': row['successful_payments_count'] or 0,
+        'failed_payments_count': row['failed_payments_count'] or 0,
+        'revenue_by_plan': {
+            plan: {'total': row[f'{plan}_total'], 'count': row[f'{plan}_count'] or 0}
+            for plan in PLAN_PRICES
+        },
+    }
+
+
+def admin_dashboard_stats():
+    """Every number shown on the admin dashboard, in three queries"""
+    stats = {}
+    stats.update(user_stats())
+    stats.update(property_stats())
+    stats.update(payment_stats())
+    # The transaction list only shows successful payments
+    stats['total_payments'] = stats['successful_payments_count']
+    return stats
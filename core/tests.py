@@ -1,3 +1,1392 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import re
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    User, Property, PropertyImage, ListingSearchDoc, Payment, RevenueDaily, PropertyViewDaily, Conversation, Message, Wishlist,
+)
+from .search_utils import (
+    apply_text_search, get_tenant_filters, invalidate_search_cache, rebuild_listing_docs, search_cache_stats,
+    search_cache_version, search_tenant_properties, tenant_results_page, visible_listings, TENANT_SORT_ORDERINGS,
+)
+from .autocomplete_utils import invalidate_location_index, location_index
+from .facet_utils import tenant_facets
+from .geo_utils import filter_within_bbox, filter_within_radius
+from .map_utils import map_clusters, tile_bbox, tiles_for_bbox
+from .revenue_utils import complete_payment, payment_snapshot, rebuild_revenue_rollup, record_payment_change
+from .entitlement_utils import compute_entitlement, owner_entitlement
+from .amenity_utils import filter_by_amenities, parse_amenities
+from .pagination_utils import keyset_page
+from .admin_section_utils import ADMIN_SECTIONS, admin_section_page
+from .unread_utils import rebuild_unread_counters, recount_conversations
+from .view_count_utils import view_counts
+from .hll_utils import HyperLogLog, unique_viewers
+
+
+def create_listing(owner, **fields):
+    """An approved, paid listing with an active plan"""
+    values = {
+        'title': 'Flat', 'description': 'Flat', 'price': 10000, 'location': 'Kochi',
+        'status': Property.Status.AVAILABLE, 'is_paid': True, 'plan_type': 'basic',
+        'plan_expiry_date': timezone.now() + timedelta(days=30),
+    }
+    values.update(fields)
+    return Property.objects.create(owner=owner, **values)
+
+
+def tenant_search(query=''):
+    """Ids of the tenant search results for a query string, in result order"""
+    queryset, ordering = search_tenant_properties(get_tenant_filters(QueryDict(query)))
+    return list(queryset.order_by(*ordering).values_list('pk', flat=True))
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN QUERY PLAN regression tests for the hot listing queries.
+
+    A plain "SCAN <table>" step means SQLite reads the whole table; every
+    query below must be answered from an index instead.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='x', role='TENANT')
+        cls.property = Property.objects.create(
+            owner=cls.owner, title='2BHK Flat', description='Near InfoPark', price=15000, location='Kochi',
+            status=Property.Status.AVAILABLE, is_paid=True, plan_type='premium',
+            plan_expiry_date=timezone.now() + timedelta(days=30),
+        )
+        cls.conversation = Conversation.objects.create(property=cls.property, tenant=cls.tenant, owner=cls.owner)
+        Message.objects.create(conversation=cls.conversation, sender=cls.tenant, content='Hi')
+        Payment.objects.create(
+            property=cls.property, owner=cls.owner, razorpay_order_id='order_1', amount=399,
+            status=Payment.PaymentStatus.SUCCESS,
+        )
+
+    def assertNoFullScan(self, queryset):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN checks are SQLite specific')
+        plan = queryset.explain()
+        full_scans = [
+            line for line in plan.splitlines()
+            if re.search(r'\bSCAN (core_\w+)\b(?! USING)', line) and 'core_property_fts' not in line
+        ]
+        self.assertEqual(full_scans, [], f'Full table scan in query plan:\n{plan}')
+
+    def visible(self):
+        return Property.objects.filter(
+            status=Property.Status.AVAILABLE,
+            is_paid=True,
+            plan_expiry_date__gt=timezone.now()
+        )
+
+    def test_tenant_visible_listings(self):
+        self.assertNoFullScan(self.visible())
+
+    def test_home_page_premium_listings(self):
+        self.assertNoFullScan(self.visible().filter(plan_type='premium').order_by('-created_at'))
+
+    def test_owner_active_plan_counts(self):
+        self.assertNoFullScan(Property.objects.filter(
+            owner=self.owner, is_paid=True, plan_type='standard', plan_expiry_date__gt=timezone.now()
+        ))
+
+    def test_admin_pending_approval_queue(self):
+        self.assertNoFullScan(Property.objects.filter(
+            status=Property.Status.PENDING_APPROVAL, is_paid=True
+        ).order_by('-created_at'))
+
+    def test_successful_payments(self):
+        self.assertNoFullScan(Payment.objects.filter(
+            status=Payment.PaymentStatus.SUCCESS
+        ).order_by('-created_at'))
+
+    def test_unread_messages(self):
+        self.assertNoFullScan(Message.objects.filter(
+            conversation=self.conversation, is_read=False
+        ).exclude(sender=self.owner))
+
+    def test_participant_conversations(self):
+        self.assertNoFullScan(Conversation.objects.filter(owner=self.owner).order_by('-updated_at'))
+        self.assertNoFullScan(Conversation.objects.filter(tenant=self.tenant).order_by('-updated_at'))
+
+    def test_listing_search_docs(self):
+        for ordering in TENANT_SORT_ORDERINGS.values():
+            self.assertNoFullScan(visible_listings().order_by(*ordering))
+
+    def test_geo_radius_search(self):
+        self.assertNoFullScan(filter_within_radius(visible_listings(), 9.95, 76.28, 10))
+
+
+class AmenityTests(TestCase):
+    """Amenity text is parsed into canonical names and filtered with the join table"""
+
+    def test_normalization(self):
+        self.assertEqual(
+            parse_amenities('WiFi, Wi-Fi, A/C,  Car   Parking, fridge, , Lifts'),
+            ['Wi-Fi', 'Air Conditioning', 'Parking', 'Refrigerator', 'Lift'],
+        )
+        # Related but different amenities are not merged; unknown ones stay as typed
+        self.assertEqual(
+            parse_amenities('kitchen, terrace, park, water, backup, internet, Car wash'),
+            ['kitchen', 'terrace', 'park', 'water', 'backup', 'internet', 'Car wash'],
+        )
+
+    def test_filter(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+
+        def add(amenities):
+            return Property.objects.create(
+                owner=owner, title='Flat', description='Flat', price=10000, location='Kochi', amenities=amenities,
+            )
+
+        both = add('wifi, Modular Kitchen')
+        kitchen = add('Wi-Fi, kitchen')
+        add('Parking')
+
+        def matches(text):
+            return set(filter_by_amenities(Property.objects.all(), text).values_list('id', flat=True))
+
+        self.assertEqual(matches('Wi-Fi'), {both.id, kitchen.id})
+        self.assertEqual(matches('WIFI, modular kitchen'), {both.id})
+        self.assertEqual(matches('kitchen'), {kitchen.id})
+        self.assertEqual(matches('Swimming Pool'), set())
+        self.assertEqual(
+            [item.amenity.name for item in both.property_amenities.select_related('amenity')],
+            ['Wi-Fi', 'Modular Kitchen'],
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    """Walking every cursor page returns each row exactly once, in the full ordering"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        base = timezone.now().replace(microsecond=500000)
+        # Several rows inside one millisecond, some with identical timestamps
+        for offset in [0, 1, 1, 250, 999, 999, 1000, 5000]:
+            prop = Property.objects.create(owner=owner, title='Flat', description='Flat', price=10000, location='Kochi')
+            Property.objects.filter(pk=prop.pk).update(created_at=base + timedelta(microseconds=offset))
+
+    def walk(self, ordering, page_size):
+        ids, cursor = [], None
+        while True:
+            items, cursor = keyset_page(Property.objects.all(), ordering, cursor, page_size)
+            ids += [item.id for item in items]
+            if cursor is None:
+                return ids
+
+    def test_pages_match_full_ordering(self):
+        for ordering in (['-created_at', '-id'], ['created_at', 'id'], ['-price', 'id']):
+            expected = list(Property.objects.order_by(*ordering).values_list('id', flat=True))
+            for page_size in (1, 2, 3):
+                self.assertEqual(self.walk(ordering, page_size), expected, (ordering, page_size))
+
+    def test_bad_cursor_starts_over(self):
+        items, _ = keyset_page(Property.objects.all(), ['-created_at', '-id'], 'not-a-cursor', 3)
+        self.assertEqual(len(items), 3)
+
+
+class ListingSearchDocTests(TestCase):
+    """Every write that changes what tenants see is mirrored on the listing's search doc"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.property = create_listing(cls.owner, title='Sea view flat', price=15000, plan_type='premium')
+
+    def doc(self):
+        return ListingSearchDoc.objects.filter(pk=self.property.pk).values(
+            'title', 'price', 'plan_priority', 'owner_name', 'cover_image'
+        ).first()
+
+    def test_created_and_updated_with_property(self):
+        self.assertEqual(self.doc(), {
+            'title': 'Sea view flat', 'price': 15000, 'plan_priority': 3, 'owner_name': 'owner', 'cover_image': '',
+        })
+        self.property.title = 'Lake view flat'
+        self.property.price = 16000
+        self.property.save()
+        self.assertEqual((self.doc()['title'], self.doc()['price']), ('Lake view flat', 16000))
+
+        # Not listed until approved and paid
+        pending = create_listing(self.owner, status=Property.Status.PENDING_APPROVAL)
+        unpaid = create_listing(self.owner, is_paid=False)
+        self.assertFalse(ListingSearchDoc.objects.filter(pk__in=[pending.pk, unpaid.pk]).exists())
+
+    def test_status_changes(self):
+        for status in (Property.Status.RENTED, Property.Status.REJECTED):
+            self.property.status = status
+            self.property.save()
+            self.assertIsNone(self.doc(), status)
+            self.property.status = Property.Status.AVAILABLE
+            self.property.save()
+            self.assertEqual(self.doc()['title'], 'Sea view flat')
+
+        self.property.delete()
+        self.assertFalse(ListingSearchDoc.objects.exists())
+
+    def test_plan_expiry(self):
+        Property.objects.filter(pk=self.property.pk).update(plan_expiry_date=timezone.now() - timedelta(minutes=1))
+        ListingSearchDoc.objects.filter(pk=self.property.pk).update(plan_expiry_date=timezone.now() - timedelta(minutes=1))
+        # Hidden straight away, and dropped by the hourly command
+        self.assertFalse(visible_listings().exists())
+        call_command('check_expired_plans', stdout=io.StringIO())
+        self.assertIsNone(self.doc())
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.status, Property.Status.PENDING_APPROVAL)
+
+    def test_owner_rename(self):
+        self.owner.username = 'landlord'
+        self.owner.save()
+        self.assertEqual(self.doc()['owner_name'], 'landlord')
+
+    def test_cover_image(self):
+        first = PropertyImage.objects.create(property=self.property, image='property_images/a.jpg')
+        PropertyImage.objects.create(property=self.property, image='property_images/b.jpg')
+        self.assertEqual(self.doc()['cover_image'], 'property_images/a.jpg')
+        first.delete()
+        self.assertEqual(self.doc()['cover_image'], 'property_images/b.jpg')
+        PropertyImage.objects.filter(property=self.property).delete()
+        self.assertEqual(self.doc()['cover_image'], '')
+
+    def test_rebuild_command(self):
+        expected = self.doc()
+        # Bulk updates skip the signals
+        Property.objects.filter(pk=self.property.pk).update(price=17000)
+        ListingSearchDoc.objects.all().delete()
+        hidden = create_listing(self.owner)
+        Property.objects.filter(pk=hidden.pk).update(status=Property.Status.RENTED)
+
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.doc(), dict(expected, price=17000))
+        self.assertEqual(list(ListingSearchDoc.objects.values_list('pk', flat=True)), [self.property.pk])
+        self.assertEqual(tenant_search('location=kochi'), [self.property.pk])
+
+
+class TextSearchTests(TestCase):
+    """Tenant text search goes through the full-text index, best matches first"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.kochi = create_listing(owner, title='Sea view flat', location='Kakkanad, Kochi')
+        cls.metro = create_listing(owner, title='Garden villa', description='Walk to the Kochi metro', location='Aluva')
+        cls.pool = create_listing(owner, title='Studio', location='Thrissur', amenities='Swimming Pool, Gym')
+
+    def text_matches(self, text):
+        return set(apply_text_search(visible_listings(), text).values_list('pk', flat=True))
+
+    def test_ranked_matches(self):
+        # A location hit outranks a description hit
+        self.assertEqual(tenant_search('location=kochi'), [self.kochi.id, self.metro.id])
+        self.assertEqual(tenant_search('location=KAKK'), [self.kochi.id])
+        self.assertEqual(tenant_search('location=swimming pool'), [self.pool.id])
+
+    def test_index_follows_property_changes(self):
+        self.pool.location = 'Edappally, Kochi'
+        self.pool.save()
+        self.assertIn(self.pool.id, tenant_search('location=edappally'))
+        self.assertNotIn(self.pool.id, tenant_search('location=thrissur'))
+
+        self.kochi.delete()
+        self.assertEqual(tenant_search('location=kakkanad'), [])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.text_matches('kochi metro'), {self.metro.id})
+        self.assertEqual(self.text_matches('kochi thrissur'), set())
+        # FTS operators typed by a tenant are plain words
+        self.assertEqual(self.text_matches('kochi OR "thrissur'), set())
+        self.assertEqual(self.text_matches('NEAR(kochi'), set())
+
+
+class FacetTests(TestCase):
+    """Facet counts agree with the searches they lead to and take one query"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='x', role='TENANT')
+        listings = [
+            ('Apartment', 1, 'UNFURNISHED', True, 4000, 450),
+            ('Apartment', 2, 'SEMI_FURNISHED', True, 12000, 900),
+            ('Apartment', 2, 'FULLY_FURNISHED', False, 18000, 1100),
+            ('Villa', 3, 'FULLY_FURNISHED', False, 40000, 2500),
+            ('Villa', 2, 'SEMI_FURNISHED', True, 60000, 1800),
+        ]
+        for property_type, bhk, furnishing, bachelors, price, area in listings:
+            create_listing(
+                owner, property_type=property_type, bhk=bhk, furnishing=furnishing,
+                bachelors_allowed=bachelors, price=price, super_built_area=area,
+            )
+        create_listing(owner, bhk=2, status=Property.Status.RENTED)
+
+    def test_counts_match_searches(self):
+        for query in ('', 'bhk=2', 'bhk=2&property_type=Villa', 'furnishing=FULLY_FURNISHED&bachelors_allowed=no'):
+            with self.assertNumQueries(1):
+                facets = tenant_facets(get_tenant_filters(QueryDict(query)))
+            for facet in ('property_type', 'bhk', 'furnishing', 'bachelors_allowed'):
+                # Selecting a value of a facet replaces that facet's current selection
+                params = QueryDict(query, mutable=True)
+                for item in facets[facet]:
+                    params[facet] = item['value']
+                    self.assertEqual(item['count'], len(tenant_search(params.urlencode())), (query, facet, item))
+            for facet in ('price', 'area'):
+                for item in facets[facet]:
+                    params = QueryDict(query, mutable=True)
+                    if item['min'] is not None:
+                        params[f'min_{facet}'] = item['min']
+                    if item['max'] is not None:
+                        # Buckets exclude their upper bound, max_price / max_area include it
+                        params[f'max_{facet}'] = item['max'] - 0.01
+                    self.assertEqual(item['count'], len(tenant_search(params.urlencode())), (query, facet, item))
+
+    def test_selected_facet_keeps_other_values(self):
+        facets = tenant_facets(get_tenant_filters(QueryDict('bhk=2&property_type=Villa')))
+        self.assertEqual([(item['value'], item['count']) for item in facets['bhk']], [('2', 1), ('3', 1)])
+        self.assertEqual(
+            [(item['value'], item['count']) for item in facets['property_type']], [('Apartment', 2), ('Villa', 1)]
+        )
+        self.assertEqual(sum(item['count'] for item in facets['price']), 1)
+
+    def test_api(self):
+        self.client.force_login(self.tenant)
+        response = self.client.get(reverse('tenant_facets_api'), {'bhk': '2'})
+        self.assertEqual(response.json()['facets'], json.loads(json.dumps(
+            tenant_facets(get_tenant_filters(QueryDict('bhk=2')))
+        )))
+        owner = User.objects.get(username='owner')
+        self.client.force_login(owner)
+        self.assertEqual(self.client.get(reverse('tenant_facets_api')).status_code, 403)
+
+
+class ResultCacheTests(TestCase):
+    """Cached tenant results are reused for the same filters and dropped when listings change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.listings = [create_listing(cls.owner, price=10000 + i * 1000, bhk=1 + i % 2) for i in range(7)]
+
+    def page(self, query, cursor=None, page_size=3):
+        filters = get_tenant_filters(QueryDict(query))
+        queryset, ordering = search_tenant_properties(filters)
+        items, next_cursor = tenant_results_page(queryset, ordering, filters, cursor, page_size)
+        return [item.pk for item in items], next_cursor
+
+    def walk(self, query, page_size):
+        ids, cursor = [], None
+        while True:
+            page, cursor = self.page(query, cursor, page_size)
+            ids += page
+            if cursor is None:
+                return ids
+
+    def test_same_filters_hit(self):
+        before = search_cache_stats()
+        first = self.page('bhk=2&sort_by=price_low')
+        # Parameter order and blank values do not change the key
+        self.assertEqual(self.page('min_price=&sort_by=price_low&bhk=2'), first)
+        stats = search_cache_stats()
+        self.assertEqual((stats['hits'] - before['hits'], stats['misses'] - before['misses']), (1, 1))
+
+    def test_pages_match_full_ordering(self):
+        for query in ('', 'sort_by=price_high', 'bhk=1&sort_by=newest'):
+            expected = tenant_search(query)
+            for page_size in (1, 2, 3):
+                self.assertEqual(self.walk(query, page_size), expected, (query, page_size))
+            # Past the cached window pages come from the database
+            with override_settings(TENANT_SEARCH_RESULT_CACHE_MAX_IDS=4):
+                invalidate_search_cache()
+                self.assertEqual(self.walk(query, 3), expected, query)
+
+    def test_invalidated_by_listing_changes(self):
+        query = 'sort_by=price_high'
+        self.page(query, page_size=10)
+        new = create_listing(self.owner, price=99000)
+        self.assertEqual(self.page(query, page_size=10)[0][0], new.pk)
+
+        new.status = Property.Status.RENTED
+        new.save()
+        self.assertNotIn(new.pk, self.page(query, page_size=10)[0])
+
+        # A view count update does not throw the cached results away
+        version = search_cache_version()
+        self.listings[0].views_count = 5
+        self.listings[0].save(update_fields=['views_count'])
+        self.assertEqual(search_cache_version(), version)
+
+    def test_expired_listing_is_never_shown(self):
+        query = 'sort_by=price_low'
+        self.page(query, page_size=10)
+        # Plans run out without a save
+        ListingSearchDoc.objects.filter(pk=self.listings[0].pk).update(plan_expiry_date=timezone.now())
+        self.assertNotIn(self.listings[0].pk, self.page(query, page_size=10)[0])
+
+
+class MapClusterTests(TestCase):
+    """Map clusters count every listing of the viewport's tiles exactly once"""
+
+    KERALA = (9.5, 75.8, 10.8, 76.8)
+    KOCHI = (9.95, 76.25, 10.05, 76.40)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='x', role='TENANT')
+        points = [
+            (9.9931, 76.3012, 12000), (10.0152, 76.3419, 18000), (10.0261, 76.3125, 25000),  # Kochi
+            (10.5276, 76.2144, 9000),  # Thrissur
+            (28.6139, 77.2090, 40000),  # Delhi
+        ]
+        for latitude, longitude, price in points:
+            create_listing(cls.owner, latitude=latitude, longitude=longitude, price=price)
+        create_listing(cls.owner)  # No coordinates
+
+    def setUp(self):
+        # Cached tiles outlast each test's rolled back listings
+        invalidate_search_cache()
+
+    def clusters(self, bbox, zoom, query=''):
+        return map_clusters(get_tenant_filters(QueryDict(query)), bbox, zoom)
+
+    def test_counts_match_viewport(self):
+        for bbox, zoom, listings in [
+            (self.KERALA, 5, 4), (self.KERALA, 8, 4), (self.KERALA, 10, 4), (self.KOCHI, 12, 3), (self.KOCHI, 14, 3),
+        ]:
+            clusters = self.clusters(bbox, zoom)
+            self.assertEqual(filter_within_bbox(visible_listings(), *bbox).count(), listings, zoom)
+            self.assertEqual(sum(cluster['count'] for cluster in clusters), listings, zoom)
+            # One marker per grid cell
+            self.assertEqual(len({cluster['geohash'] for cluster in clusters}), len(clusters), zoom)
+            for cluster in clusters:
+                self.assertLessEqual(cluster['min_price'], cluster['max_price'])
+                self.assertEqual(cluster['property_id'] is None, cluster['count'] > 1)
+
+        # Zoomed out the Kerala listings share one cluster, zoomed in each has its own
+        self.assertEqual([cluster['count'] for cluster in self.clusters(self.KERALA, 5)], [4])
+        self.assertEqual([cluster['count'] for cluster in self.clusters(self.KOCHI, 14)], [1, 1, 1])
+
+    def test_cell_across_tile_edge(self):
+        zoom = 10
+        x, y = tiles_for_bbox(10.0, 76.3, 10.0, 76.3, zoom)[0]
+        edge = tile_bbox(zoom, x, y)[0]
+        # Both listings are in one grid cell, on either side of the tiles' shared edge
+        for latitude in (edge - 0.001, edge + 0.001):
+            create_listing(self.owner, latitude=latitude, longitude=76.3, price=5000)
+        bbox = (edge - 0.1, 76.29, edge + 0.1, 76.4)
+        self.assertEqual(len(tiles_for_bbox(*bbox, zoom)), 2)
+        clusters = [cluster for cluster in self.clusters(bbox, zoom) if cluster['min_price'] == 5000]
+        self.assertEqual([cluster['count'] for cluster in clusters], [2])
+        # Whichever tile owns the cell reports all of it (viewports just inside each tile)
+        owned = []
+        for tile in tiles_for_bbox(*bbox, zoom):
+            south, west, north, east = tile_bbox(zoom, *tile)
+            viewport = (south + 1e-6, west + 1e-6, north - 1e-6, east - 1e-6)
+            owned += [cluster for cluster in self.clusters(viewport, zoom) if cluster['min_price'] == 5000]
+        self.assertEqual([cluster['count'] for cluster in owned], [2])
+
+    def test_filters_and_cache_invalidation(self):
+        query = 'max_price=20000'
+        self.assertEqual(sum(cluster['count'] for cluster in self.clusters(self.KERALA, 8, query)), 3)
+        create_listing(self.owner, latitude=9.9800, longitude=76.2800, price=15000)
+        self.assertEqual(sum(cluster['count'] for cluster in self.clusters(self.KERALA, 8, query)), 4)
+
+    def test_api(self):
+        self.client.force_login(self.tenant)
+        url = reverse('tenant_map_clusters_api')
+        response = self.client.get(url, {'bbox': ','.join(map(str, self.KERALA)), 'zoom': 8})
+        self.assertEqual(sum(cluster['count'] for cluster in response.json()['clusters']), 4)
+        self.assertEqual(self.client.get(url, {'zoom': 8}).status_code, 400)
+        # Too many tiles
+        self.assertEqual(self.client.get(url, {'bbox': '-60,-170,60,170', 'zoom': 12}).status_code, 400)
+
+
+class LocationAutocompleteTests(TestCase):
+    """Location suggestions come from the in-memory index, most listed first"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='x', role='TENANT')
+        for location in ['Kakkanad, Kochi', 'kakkanad  kochi', 'Kakkanad, Kochi', 'Kalamassery', 'Kochi', 'Thrissur']:
+            create_listing(cls.owner, location=location)
+        create_listing(cls.owner, location='Kaloor', status=Property.Status.PENDING_APPROVAL)
+
+    def setUp(self):
+        # The index lives in the process and outlasts each test's rolled back data
+        location_index.rebuild()
+
+    def suggest(self, prefix):
+        return [(item['location'], item['count']) for item in location_index.suggest(prefix)]
+
+    def test_prefix_matches(self):
+        self.assertEqual(self.suggest('ka'), [('Kakkanad, Kochi', 3), ('Kalamassery', 1)])
+        # Any word of a location can start the match
+        self.assertEqual(self.suggest('KOCH'), [('Kakkanad, Kochi', 3), ('Kochi', 1)])
+        self.assertEqual(self.suggest('kakkanad ko'), [('Kakkanad, Kochi', 3)])
+        self.assertEqual(self.suggest('kaloor'), [])
+        self.assertEqual(self.suggest(' , '), [])
+
+    def test_lookup_does_not_query(self):
+        location_index.suggest('ka')
+        with self.assertNumQueries(0):
+            location_index.suggest('kak')
+
+    def test_follows_listing_changes(self):
+        kaloor = Property.objects.get(location='Kaloor')
+        kaloor.status = Property.Status.AVAILABLE
+        kaloor.save()
+        self.assertEqual(self.suggest('kalo'), [('Kaloor', 1)])
+
+        kalamassery = Property.objects.get(location='Kalamassery')
+        kalamassery.status = Property.Status.RENTED
+        kalamassery.save()
+        Property.objects.get(location='Thrissur').delete()
+        self.assertEqual(self.suggest('kal'), [('Kaloor', 1)])
+        self.assertEqual(self.suggest('thr'), [])
+
+    def test_rebuilt_after_bulk_change(self):
+        Property.objects.filter(location='Kochi').update(location='Cochin')
+        rebuild_listing_docs()
+        invalidate_location_index()
+        with mock.patch('core.autocomplete_utils.VERSION_CHECK_SECONDS', 0):
+            self.assertEqual(self.suggest('coc'), [('Cochin', 1)])
+
+    def test_api(self):
+        self.client.force_login(self.tenant)
+        response = self.client.get(reverse('location_autocomplete_api'), {'q': 'kak'})
+        self.assertEqual(response.json()['suggestions'], [{'location': 'Kakkanad, Kochi', 'count': 3}])
+
+
+class FuzzySearchTests(TestCase):
+    """Misspelled searches fall back to similar titles and locations"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.kakkanad = create_listing(cls.owner, title='Sea view flat', location='Kakkanad, Kochi')
+        # Newer, but spelled less like the searches below
+        cls.kakkanadu = create_listing(cls.owner, title='Flat', location='Kakkanadu')
+        cls.villa = create_listing(cls.owner, title='Riverside villa', location='Aluva')
+        create_listing(cls.owner, location='Kakanad', status=Property.Status.RENTED)
+
+    def test_similar_spellings(self):
+        self.assertEqual(tenant_search('location=Kakanad'), [self.kakkanad.id, self.kakkanadu.id])
+        self.assertEqual(tenant_search('location=riversid vila'), [self.villa.id])
+        self.assertEqual(tenant_search('location=Trivandrum'), [])
+
+    def test_only_when_nothing_matches_exactly(self):
+        create_listing(self.owner, location='Kakanad')
+        self.assertEqual(len(tenant_search('location=Kakanad')), 1)
+
+    def test_index_follows_property_changes(self):
+        self.villa.location = 'Kakkanad'
+        self.villa.save()
+        self.assertIn(self.villa.id, tenant_search('location=kakanad'))
+        self.kakkanad.delete()
+        self.assertNotIn(self.kakkanad.id, tenant_search('location=kakanad'))
+
+
+class GeoSearchTests(TestCase):
+    """Radius, viewport and distance searches return the right listings in distance order"""
+
+    CENTRE = 'lat=9.9312&lng=76.2673'
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        points = {
+            'centre': (9.9312, 76.2673),    # 0 km
+            'near': (9.9500, 76.2700),      # 2.1 km
+            'mid': (10.0000, 76.3000),      # 8.4 km
+            'edge': (10.0050, 76.3100),     # 9.4 km
+            'corner': (10.0000, 76.3300),   # 10.3 km, inside the circle's bounding box
+            'outside': (10.0200, 76.3100),  # 10.9 km
+            'thrissur': (10.5276, 76.2144), # 66.6 km
+        }
+        cls.ids = {
+            name: create_listing(owner, title=name, latitude=latitude, longitude=longitude).pk
+            for name, (latitude, longitude) in points.items()
+        }
+        create_listing(owner, title='No coordinates')
+
+    def names(self, ids):
+        by_id = {pk: name for name, pk in self.ids.items()}
+        return [by_id[pk] for pk in ids]
+
+    def test_radius(self):
+        self.assertEqual(
+            self.names(tenant_search(f'{self.CENTRE}&radius_km=10&sort_by=distance')),
+            ['centre', 'near', 'mid', 'edge'],
+        )
+        self.assertEqual(set(self.names(tenant_search(f'{self.CENTRE}&radius_km=3'))), {'centre', 'near'})
+        queryset = filter_within_radius(visible_listings(), 9.9312, 76.2673, 10)
+        distances = dict(queryset.values_list('title', 'distance_km'))
+        self.assertAlmostEqual(distances['near'], 2.11, places=2)
+        self.assertAlmostEqual(distances['edge'], 9.445, places=2)
+
+    def test_bbox_trims_cell_edges(self):
+        owner = User.objects.get(username='owner')
+        # Each pair shares a geohash cell of the box cover, one on each side of the edge
+        for name, latitude, longitude in [
+            ('south in', 9.9401, 76.27), ('south out', 9.9399, 76.27),
+            ('east in', 9.9550, 76.2799), ('east out', 9.9550, 76.2801),
+        ]:
+            self.ids[name] = create_listing(owner, title=name, latitude=latitude, longitude=longitude).pk
+        self.assertEqual(
+            set(self.names(tenant_search('bbox=9.94,76.26,9.96,76.28'))),
+            {'near', 'south in', 'east in'},
+        )
+
+    def test_distance_order_and_cursor(self):
+        query = f'{self.CENTRE}&sort_by=distance'
+        expected = ['centre', 'near', 'mid', 'edge', 'corner', 'outside', 'thrissur']
+        self.assertEqual(self.names(tenant_search(query)), expected)
+
+        filters = get_tenant_filters(QueryDict(query))
+        queryset, ordering = search_tenant_properties(filters)
+        for page in (
+            lambda cursor: keyset_page(queryset, ordering, cursor, 3),
+            lambda cursor: tenant_results_page(queryset, ordering, filters, cursor, 3),
+        ):
+            first, cursor = page(None)
+            self.assertEqual(self.names([item.pk for item in first]), expected[:3])
+            second, cursor = page(cursor)
+            self.assertEqual(self.names([item.pk for item in second]), expected[3:6])
+            third, cursor = page(cursor)
+            self.assertEqual((self.names([item.pk for item in third]), cursor), (expected[6:], None))
+
+    def test_distance_sort_needs_a_point(self):
+        # Without lat/lng, sort_by=distance falls back to the default order
+        self.assertEqual(tenant_search('sort_by=distance'), tenant_search())
+        self.assertEqual(len(tenant_search()), 8)
+
+
+class AdminDashboardQueryCountTests(TestCase):
+    """The admin dashboard must not issue more queries as the platform grows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x', role='ADMIN')
+        cls.add_data(1)
+
+    @classmethod
+    def add_data(cls, batch):
+        for index in range(3):
+            suffix = f'{batch}_{index}'
+            owner = User.objects.create_user(username=f'owner{suffix}', email=f'owner{suffix}@example.com', password=None, role='OWNER')
+            User.objects.create_user(username=f'tenant{suffix}', email=f'tenant{suffix}@example.com', password=None, role='TENANT')
+            for status, plan_type, amount in [
+                (Property.Status.AVAILABLE, 'premium', 399),
+                (Property.Status.PENDING_APPROVAL, 'basic', 99),
+            ]:
+                prop = Property.objects.create(
+                    owner=owner, title=f'Flat {suffix}', description='Flat', price=12000, location='Kochi',
+                    status=status, is_paid=True, plan_type=plan_type,
+                    plan_expiry_date=timezone.now() + timedelta(days=30),
+                )
+                PropertyImage.objects.create(property=prop, image='property_images/a.jpg')
+                PropertyImage.objects.create(property=prop, image='property_images/b.jpg')
+                Payment.objects.create(
+                    property=prop, owner=owner, razorpay_order_id=f'order_{prop.pk}', amount=amount,
+                    plan_type=plan_type, status=Payment.PaymentStatus.SUCCESS,
+                )
+        rebuild_revenue_rollup()
+
+    def dashboard_queries(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_is_constant(self):
+        baseline, _ = self.dashboard_queries()
+        self.add_data(2)
+        self.add_data(3)
+        grown, response = self.dashboard_queries()
+        self.assertEqual(grown, baseline)
+        self.assertEqual(response.context['total_owners'], 9)
+        self.assertEqual(response.context['pending_count'], 9)
+        self.assertEqual(response.context['revenue_by_plan']['premium']['count'], 9)
+
+    def test_property_section_query_count_is_constant(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin_section', args=['properties'])
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(url)
+        self.add_data(2)
+        with CaptureQueriesContext(connection) as grown:
+            response = self.client.get(url)
+        self.assertEqual(len(grown), len(baseline))
+        self.assertEqual(response.json()['count'], 12)
+
+    def test_owner_profile_query_count_is_constant(self):
+        self.client.force_login(self.admin)
+        owner = User.objects.get(username='owner1_0')
+        url = reverse('owner_profile', args=[owner.pk])
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(url)
+        for index in range(5):
+            Property.objects.create(
+                owner=owner, title=f'Extra {index}', description='Flat', price=9000, location='Kochi',
+                status=Property.Status.RENTED, is_paid=True, plan_type='standard',
+                plan_expiry_date=timezone.now() + timedelta(days=30),
+            )
+        with CaptureQueriesContext(connection) as grown:
+            response = self.client.get(url)
+        self.assertEqual(len(grown), len(baseline))
+        self.assertEqual(response.context['total_properties'], 7)
+        self.assertEqual(response.context['rented_properties'], 5)
+        self.assertEqual(response.context['standard_count'], 5)
+
+    def test_photo_summary_follows_images(self):
+        prop = Property.objects.filter(owner__username='owner1_0').first()
+        self.assertEqual((prop.cover_image.name, prop.image_count), ('property_images/a.jpg', 2))
+        prop.images.order_by('id').first().delete()
+        prop.refresh_from_db()
+        self.assertEqual((prop.cover_image.name, prop.image_count), ('property_images/b.jpg', 1))
+        self.assertEqual(ListingSearchDoc.objects.get(pk=prop.pk).cover_image.name, 'property_images/b.jpg')
+
+
+@override_settings(ADMIN_SECTION_PAGE_SIZE=2)
+class AdminSectionTests(TestCase):
+    """Admin dashboard sections page through every row once and search within a section"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x', role='ADMIN')
+        joined = timezone.now()
+        for index in range(5):
+            owner = User.objects.create_user(username=f'owner{index}', email=f'owner{index}@example.com', password=None, role='OWNER')
+            tenant = User.objects.create_user(username=f'tenant{index}', email=f'tenant{index}@example.com', password=None, role='TENANT')
+            # Users joining at the same moment must not be skipped or repeated
+            User.objects.filter(pk__in=[owner.pk, tenant.pk]).update(date_joined=joined - timedelta(days=index // 2))
+            prop = create_listing(owner, title=f'Flat {index}', location='Kochi' if index % 2 else 'Thrissur')
+            Payment.objects.create(
+                property=prop, owner=owner, razorpay_order_id=f'order_{index}', amount=99,
+                plan_type='basic', status=Payment.PaymentStatus.SUCCESS,
+            )
+        Payment.objects.create(property=prop, owner=owner, razorpay_order_id='order_failed', amount=99, plan_type='basic')
+
+    def walk(self, section, search=''):
+        ids, cursor = [], None
+        while True:
+            items, cursor = admin_section_page(section, search, cursor)
+            self.assertLessEqual(len(items), 2)
+            ids += [item.pk for item in items]
+            if cursor is None:
+                return ids
+
+    def test_pages_match_full_ordering(self):
+        for section, config in ADMIN_SECTIONS.items():
+            expected = list(config['queryset']().order_by(*config['ordering']).values_list('pk', flat=True))
+            self.assertEqual(len(expected), 5, section)
+            self.assertEqual(self.walk(section), expected, section)
+
+    def test_search(self):
+        self.assertEqual(self.walk('owners', 'OWNER3'), [User.objects.get(username='owner3').pk])
+        self.assertEqual(len(self.walk('properties', 'kochi')), 2)
+        self.assertEqual(len(self.walk('payments', 'order_')), 5)
+        self.assertEqual(self.walk('tenants', 'nobody'), [])
+
+    def test_view(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin_section', args=['tenants'])
+        response = self.client.get(url).json()
+        self.assertEqual(response['count'], 2)
+        self.assertIn('tenant0', response['html'])
+        response = self.client.get(url, {'cursor': response['next_cursor'], 'start': 2}).json()
+        self.assertEqual(response['count'], 2)
+        self.assertIn('<td>3</td>', response['html'])
+
+        self.assertEqual(self.client.get(reverse('admin_section', args=['secrets'])).status_code, 404)
+        self.client.force_login(User.objects.get(username='owner0'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class RevenueRollupTests(TestCase):
+    """Payment status changes keep the daily revenue rollup in step with the Payment table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.property = Property.objects.create(
+            owner=cls.owner, title='Flat', description='Flat', price=10000, location='Kochi',
+        )
+
+    def rollup(self):
+        return sorted(RevenueDaily.objects.values_list('plan_type', 'status', 'count', 'total'))
+
+    @override_settings(DEBUG=True, RAZORPAY_KEY_ID='rzp_test_key')
+    def test_verified_payment_uses_paid_plan(self):
+        # A price that no longer matches the plan table must not change the plan
+        payment = Payment.objects.create(
+            property=self.property, owner=self.owner, razorpay_order_id='order_1', amount=249, plan_type='standard',
+        )
+        response = self.client.post(reverse('verify_payment'), json.dumps({
+            'razorpay_order_id': 'order_1', 'razorpay_payment_id': 'pay_1', 'razorpay_signature': 'sig',
+        }), content_type='application/json')
+        self.assertTrue(response.json()['success'])
+
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.plan_type, 'standard')
+        self.assertEqual((self.property.plan_expiry_date - timezone.now()).days, 179)
+        self.assertEqual(self.rollup(), [('standard', 'SUCCESS', 1, 249)])
+
+        # e.g. a refund: the payment moves from the SUCCESS bucket to FAILED
+        payment.refresh_from_db()
+        before = payment_snapshot(payment)
+        payment.status = Payment.PaymentStatus.FAILED
+        payment.save()
+        record_payment_change(before, payment)
+        self.assertEqual(self.rollup(), [('standard', 'FAILED', 1, 249), ('standard', 'SUCCESS', 0, 0)])
+
+    @override_settings(DEBUG=True, RAZORPAY_KEY_ID='rzp_test_key')
+    def test_verify_and_webhook_count_once(self):
+        def verify(order_id):
+            return self.client.post(reverse('verify_payment'), json.dumps({
+                'razorpay_order_id': order_id, 'razorpay_payment_id': f'pay_{order_id}', 'razorpay_signature': 'sig',
+            }), content_type='application/json')
+
+        def webhook(order_id, event='payment.captured'):
+            return self.client.post(reverse('razorpay_webhook'), json.dumps({
+                'event': event, 'payload': {'payment': {'entity': {'id': f'pay_{order_id}', 'order_id': order_id}}},
+            }), content_type='application/json')
+
+        for order_id in ('order_1', 'order_2'):
+            Payment.objects.create(
+                property=self.property, owner=self.owner, razorpay_order_id=order_id, amount=99, plan_type='basic',
+            )
+        verify('order_1')
+        webhook('order_1')
+        webhook('order_2')
+        self.assertTrue(verify('order_2').json()['success'])
+        # A late failure event does not undo a captured payment
+        webhook('order_2', 'payment.failed')
+        self.assertEqual(self.rollup(), [('basic', 'SUCCESS', 2, 198)])
+        self.assertEqual(set(Payment.objects.values_list('status', flat=True)), {Payment.PaymentStatus.SUCCESS})
+
+        # A failed payment that Razorpay captures after all moves to SUCCESS
+        Payment.objects.create(
+            property=self.property, owner=self.owner, razorpay_order_id='order_3', amount=99, plan_type='basic',
+        )
+        webhook('order_3', 'payment.failed')
+        webhook('order_3', 'payment.failed')
+        self.assertEqual(self.rollup(), [('basic', 'FAILED', 1, 99), ('basic', 'SUCCESS', 2, 198)])
+        webhook('order_3')
+        self.assertEqual(self.rollup(), [('basic', 'FAILED', 0, 0), ('basic', 'SUCCESS', 3, 297)])
+
+    def test_rebuild_matches_incremental_rollup(self):
+        for i, (plan, status) in enumerate([('basic', 'SUCCESS'), ('premium', 'SUCCESS'), ('premium', 'FAILED')]):
+            payment = Payment.objects.create(
+                property=self.property, owner=self.owner, razorpay_order_id=f'order_{i}',
+                amount=99 if plan == 'basic' else 399, plan_type=plan,
+            )
+            before = payment_snapshot(payment)
+            payment.status = status
+            payment.save()
+            record_payment_change(before, payment)
+
+        incremental = [row for row in self.rollup() if row[2]]
+        rebuild_revenue_rollup()
+        self.assertEqual(self.rollup(), incremental)
+
+
+class PropertyQuerySetTests(TestCase):
+    """with_plan_status() must agree with is_plan_active() / days_remaining()"""
+
+    def test_plan_status_annotations(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password=None, role='OWNER')
+        now = timezone.now()
+        for expiry in [None, now - timedelta(days=3), now + timedelta(hours=5), now + timedelta(days=12, hours=7)]:
+            Property.objects.create(
+                owner=owner, title='Flat', description='Flat', price=10000, location='Kochi',
+                status=Property.Status.AVAILABLE, is_paid=True, plan_expiry_date=expiry,
+            )
+        for prop in Property.objects.with_plan_status(now):
+            plain = Property.objects.get(pk=prop.pk)
+            self.assertEqual(prop.plan_active, plain.is_plan_active())
+            self.assertEqual(prop.plan_days_left, plain.days_remaining())
+            # The model methods still work on annotated rows
+            self.assertEqual(prop.is_plan_active(), plain.is_plan_active())
+        self.assertEqual(Property.objects.visible().count(), 2)
+
+        # The wishlist only lists properties tenants can still see
+        tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password=None, role='TENANT')
+        for prop in Property.objects.all():
+            Wishlist.objects.create(tenant=tenant, property=prop)
+        self.client.force_login(tenant)
+        response = self.client.get(reverse('wishlist'))
+        self.assertEqual(
+            {item.property_id for item in response.context['wishlist_items']},
+            set(Property.objects.visible().values_list('id', flat=True)),
+        )
+        self.assertEqual(response.context['total_wishlist'], 2)
+
+        # Owner pages render the annotations
+        self.client.force_login(owner)
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, '12 days remaining')
+        self.assertContains(response, 'Plan Expired')
+
+
+class ExportTests(TestCase):
+    """Streaming exports honour their filters and are admin only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x', role='ADMIN')
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password=None, role='OWNER')
+        prop = Property.objects.create(owner=cls.owner, title='Flat', description='Flat', price=10000, location='Kochi')
+        for index, status in enumerate([Payment.PaymentStatus.SUCCESS, Payment.PaymentStatus.SUCCESS, Payment.PaymentStatus.FAILED]):
+            Payment.objects.create(property=prop, owner=cls.owner, razorpay_order_id=f'order_{index}', amount=99, status=status)
+        Payment.objects.filter(razorpay_order_id='order_0').update(created_at=timezone.now() - timedelta(days=10))
+
+    def export(self, name, **params):
+        response = self.client.get(reverse('admin_export', args=[name]), params)
+        return response, b''.join(response.streaming_content).decode() if response.streaming else None
+
+    def test_filtered_csv(self):
+        self.client.force_login(self.admin)
+        start = (timezone.localdate() - timedelta(days=1)).isoformat()
+        response, body = self.export('payments', status='SUCCESS', start=start)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = body.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('order_1', lines[1])
+
+    def test_ndjson_and_access(self):
+        self.client.force_login(self.admin)
+        _, body = self.export('users', format='ndjson', status='OWNER')
+        self.assertEqual([json.loads(line)['username'] for line in body.splitlines()], ['owner'])
+        self.assertEqual(self.export('payments', status='LOST')[0].status_code, 400)
+        self.client.force_login(self.owner)
+        self.assertEqual(self.export('payments')[0].status_code, 403)
+
+    def test_csv_formulas_are_escaped(self):
+        Property.objects.create(
+            owner=self.owner, title='=HYPERLINK("http://evil.example","x")', description='Flat', price=10000,
+            location='@SUM(A1)',
+        )
+        self.client.force_login(self.admin)
+        _, body = self.export('properties')
+        row = next(row for row in csv.reader(io.StringIO(body)) if 'HYPERLINK' in ''.join(row))
+        self.assertIn('\'=HYPERLINK("http://evil.example","x")', row)
+        self.assertIn("'@SUM(A1)", row)
+        self.assertIn('10000.00', row)
+
+
+class BulkModerationTests(TestCase):
+    """Bulk approve / reject updates a batch in one statement and notifies owners together"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x', role='ADMIN')
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password=None, role='OWNER')
+        cls.ids = [
+            Property.objects.create(
+                owner=cls.owner, title=f'Flat {index}', description='Flat', price=10000, location='Kochi',
+                is_paid=True, plan_expiry_date=timezone.now() + timedelta(days=30),
+            ).pk
+            for index in range(4)
+        ]
+
+    def moderate(self, payload):
+        self.client.force_login(self.admin)
+        return self.client.post(reverse('bulk_moderate_properties'), json.dumps(payload), content_type='application/json')
+
+    def test_approve(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.moderate({'action': 'approve', 'ids': self.ids[:3]})
+        self.assertEqual(response.json()['moderated'], self.ids[:3])
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "core_property"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Property.objects.filter(status=Property.Status.AVAILABLE).count(), 3)
+        self.assertEqual(ListingSearchDoc.objects.count(), 3)
+
+    def test_reject_with_reasons(self):
+        from django.core import mail
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.moderate({
+                'action': 'reject', 'ids': self.ids, 'reason': 'Blurry photos',
+                'reasons': {str(self.ids[0]): 'Wrong price'},
+            })
+        self.assertEqual(response.json()['moderated'], self.ids)
+        reasons = dict(Property.objects.values_list('pk', 'rejection_reason'))
+        self.assertEqual(reasons[self.ids[0]], 'Wrong price')
+        self.assertEqual(reasons[self.ids[1]], 'Blurry photos')
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_reject_requires_reason(self):
+        response = self.moderate({'action': 'reject', 'ids': self.ids[:1]})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Property.objects.filter(status=Property.Status.REJECTED).exists())
+
+
+class AnalyticsTests(TestCase):
+    """Time series match the raw rows and closed buckets come from the cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x', role='ADMIN')
+        now = timezone.now()
+        for days_ago in [0, 1, 1, 3]:
+            user = User.objects.create_user(username=f'user{User.objects.count()}', email=f'u{User.objects.count()}@example.com', password=None)
+            User.objects.filter(pk=user.pk).update(date_joined=now - timedelta(days=days_ago))
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def series(self):
+        start = (timezone.localdate() - timedelta(days=5)).isoformat()
+        return self.client.get(reverse('analytics_api'), {'series': 'signups', 'bucket': 'day', 'start': start}).json()
+
+    def test_daily_signups(self):
+        values = [point['value'] for point in self.series()['series']['signups']]
+        self.assertEqual(values, [0, 0, 1, 0, 2, 1])
+
+    def test_closed_buckets_are_cached(self):
+        self.series()
+        # A late row in a closed bucket is not picked up; today's bucket is live
+        user = User.objects.create_user(username='late', email='late@example.com', password=None)
+        User.objects.filter(pk=user.pk).update(date_joined=timezone.now() - timedelta(days=3))
+        User.objects.create_user(username='today', email='today@example.com', password=None)
+        values = [point['value'] for point in self.series()['series']['signups']]
+        self.assertEqual(values, [0, 0, 1, 0, 2, 2])
+
+
+    def test_late_payment_refreshes_revenue(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password=None, role='OWNER')
+        prop = create_listing(owner)
+        payments = [
+            Payment.objects.create(property=prop, owner=owner, razorpay_order_id=f'order_{i}', amount=99, plan_type='basic')
+            for i in range(2)
+        ]
+        Payment.objects.filter(pk__in=[payment.pk for payment in payments]).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        start = (timezone.localdate() - timedelta(days=2)).isoformat()
+
+        def revenue(bucket):
+            response = self.client.get(reverse('analytics_api'), {'series': 'revenue', 'bucket': bucket, 'start': start})
+            return [float(point['value']) for point in response.json()['series']['revenue']][0]
+
+        self.assertEqual((revenue('day'), revenue('month')), (0, 0))
+        # Paid two days after the order was created, once both buckets are closed
+        complete_payment(payments[0], Payment.PaymentStatus.SUCCESS)
+        self.assertEqual(revenue('day'), 99)
+        complete_payment(payments[1], Payment.PaymentStatus.SUCCESS)
+        self.assertEqual((revenue('day'), revenue('month')), (198, 198))
+
+
+class EntitlementTests(TestCase):
+    """Owner plan limits come from one cached query and follow property changes"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password=None, role='OWNER')
+
+    def add_property(self, plan_type, days=30):
+        return Property.objects.create(
+            owner=self.owner, title='Flat', description='Flat', price=10000, location='Kochi', is_paid=True,
+            plan_type=plan_type, plan_expiry_date=timezone.now() + timedelta(days=days),
+        )
+
+    def test_limits(self):
+        entitlement = owner_entitlement(self.owner)
+        self.assertEqual((entitlement.current_plan, entitlement.plan_limit, entitlement.can_add_property), (None, 1, True))
+
+        self.add_property('basic')
+        entitlement = owner_entitlement(self.owner)
+        self.assertEqual((entitlement.current_plan, entitlement.remaining_slots), ('basic', 0))
+        self.assertIn('Basic Plan limit', entitlement.limit_message)
+
+        standard = self.add_property('standard', days=60)
+        entitlement = owner_entitlement(self.owner)
+        self.assertEqual((entitlement.current_plan, entitlement.remaining_slots), ('standard', 1))
+        self.assertEqual(entitlement.reusable_plan(), ('standard', standard.plan_expiry_date))
+
+        Property.objects.filter(owner=self.owner).update(plan_expiry_date=timezone.now() - timedelta(days=1))
+        self.assertEqual(compute_entitlement(self.owner.pk).plan_limit, 0)
+
+    def test_reused_plan_is_not_the_propertys_own(self):
+        own = self.add_property('standard', days=10)
+        other = self.add_property('standard', days=60)
+        entitlement = owner_entitlement(self.owner)
+        self.assertEqual(entitlement.reusable_plan(), ('standard', own.plan_expiry_date))
+        self.assertEqual(entitlement.reusable_plan(own), ('standard', other.plan_expiry_date))
+        # The only property on its plan has no other plan to join
+        Property.objects.filter(pk=other.pk).delete()
+        self.assertIsNone(owner_entitlement(self.owner).reusable_plan(own))
+
+    def test_cached_until_changed(self):
+        owner_entitlement(self.owner)
+        with self.assertNumQueries(0):
+            owner_entitlement(self.owner)
+        self.add_property('premium')
+        self.assertEqual(owner_entitlement(self.owner).current_plan, 'premium')
+
+    def test_select_plan_for_new_owner(self):
+        prop = Property.objects.create(
+            owner=self.owner, title='Flat', description='Flat', price=10000, location='Kochi',
+        )
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('select_plan', args=[prop.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['can_use_existing_plan'])
+        self.assertEqual(response.context['total_active'], 0)
+
+
+class UnreadCounterTests(TestCase):
+    """Unread counters follow new messages and reads without counting messages"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='x', role='TENANT')
+        properties = [
+            Property.objects.create(
+                owner=cls.owner, title=f'Flat {i}', description='Flat', price=10000, location='Kochi',
+                is_paid=True, plan_type='basic', plan_expiry_date=timezone.now() + timedelta(days=30),
+            )
+            for i in range(2)
+        ]
+        cls.conversations = [
+            Conversation.objects.create(property=prop, tenant=cls.tenant, owner=cls.owner) for prop in properties
+        ]
+
+    def counters(self):
+        self.owner.refresh_from_db()
+        self.tenant.refresh_from_db()
+        return (
+            [(conv.owner_unread, conv.tenant_unread) for conv in Conversation.objects.order_by('pk')],
+            self.owner.unread_messages, self.tenant.unread_messages,
+        )
+
+    def test_send_and_read(self):
+        first, second = self.conversations
+        for conversation in (first, first, second):
+            Message.objects.create(conversation=conversation, sender=self.tenant, content='Hi')
+        Message.objects.create(conversation=second, sender=self.owner, content='Hello')
+        self.assertEqual(self.counters(), ([(2, 0), (1, 1)], 3, 1))
+
+        self.client.force_login(self.owner)
+        self.client.get(reverse('conversation_detail', args=[first.id]))
+        self.assertEqual(self.counters(), ([(0, 0), (1, 1)], 1, 1))
+        self.assertFalse(Message.objects.filter(conversation=first, is_read=False).exists())
+
+        Message.objects.filter(conversation=second, sender=self.tenant).delete()
+        recount_conversations([second.id])
+        self.assertEqual(self.counters(), ([(0, 0), (0, 1)], 0, 1))
+
+    def test_delete_conversation(self):
+        first, second = self.conversations
+        for conversation in (first, first, second):
+            Message.objects.create(conversation=conversation, sender=self.tenant, content='Hi')
+        with CaptureQueriesContext(connection) as queries:
+            first.delete()
+        self.assertEqual(self.counters(), ([(1, 0)], 1, 0))
+        # The messages go in one DELETE, without being loaded one by one
+        message_queries = [q['sql'] for q in queries if 'core_message' in q['sql']]
+        self.assertEqual(len(message_queries), 1)
+        self.assertTrue(message_queries[0].startswith('DELETE'))
+
+    def test_admin_delete(self):
+        first, second = self.conversations
+        for conversation in (first, first, second):
+            Message.objects.create(conversation=conversation, sender=self.tenant, content='Hi')
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:core_message_changelist'), {
+            'action': 'delete_selected', 'post': 'yes',
+            '_selected_action': list(Message.objects.filter(conversation=first).values_list('pk', flat=True)),
+        })
+        self.assertEqual(self.counters(), ([(0, 0), (1, 0)], 1, 0))
+
+    def test_dashboard_queries_do_not_grow(self):
+        self.client.force_login(self.owner)
+        self.client.get(reverse('dashboard'))  # warm the entitlement cache
+        for conversation in self.conversations:
+            Message.objects.create(conversation=conversation, sender=self.tenant, content='Hi')
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['unread_messages_count'], 2)
+
+        for conversation in self.conversations:
+            for _ in range(3):
+                Message.objects.create(conversation=conversation, sender=self.tenant, content='Hi')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['unread_messages_count'], 8)
+        self.assertEqual(len(many), len(few))
+
+    def test_rebuild(self):
+        Message.objects.create(conversation=self.conversations[0], sender=self.tenant, content='Hi')
+        Conversation.objects.update(owner_unread=5)
+        User.objects.update(unread_messages=0)
+        rebuild_unread_counters()
+        self.assertEqual(self.counters(), ([(1, 0), (0, 0)], 1, 0))
+
+
+class ViewCountTests(TestCase):
+    """Property views are buffered and written in batches"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='x', role='TENANT')
+        cls.property = Property.objects.create(
+            owner=cls.owner, title='Flat', description='Flat', price=10000, location='Kochi',
+            status=Property.Status.AVAILABLE, is_paid=True, plan_type='basic',
+            plan_expiry_date=timezone.now() + timedelta(days=30),
+        )
+
+    def setUp(self):
+        view_counts.flush()
+        self.client.force_login(self.tenant)
+
+    def views(self):
+        self.property.refresh_from_db()
+        return self.property.views_count
+
+    @override_settings(VIEW_COUNT_FLUSH_SECONDS=3600, VIEW_COUNT_FLUSH_THRESHOLD=3)
+    def test_flushed_at_threshold(self):
+        url = reverse('property_details', args=[self.property.id])
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual((self.views(), view_counts.pending(self.property.id)), (0, 2))
+        self.client.get(url)
+        self.assertEqual((self.views(), view_counts.pending()), (3, 0))
+        self.assertEqual(
+            list(PropertyViewDaily.objects.values_list('property_id', 'date', 'views')),
+            [(self.property.id, timezone.localdate(), 3)],
+        )
+
+    @override_settings(VIEW_COUNT_FLUSH_SECONDS=3600, VIEW_COUNT_FLUSH_THRESHOLD=1000)
+    def test_quiet_buffer_is_flushed_by_timer(self):
+        view_counts.record(self.property.id)
+        timer = view_counts._timer
+        self.assertIsNotNone(timer)
+        self.assertEqual(timer.interval, 3600)
+        view_counts.record(self.property.id)
+        self.assertIs(view_counts._timer, timer)  # one timer per batch window
+        # Run the end of the window now, in this thread (and its test transaction)
+        timer.cancel()
+        view_counts._timed_flush()
+        self.assertEqual((self.views(), view_counts.pending()), (2, 0))
+        self.assertIsNone(view_counts._timer)
+
+    @override_settings(VIEW_COUNT_FLUSH_SECONDS=3600, VIEW_COUNT_FLUSH_THRESHOLD=1000)
+    def test_flush_adds_to_stored_count(self):
+        view_counts.record(self.property.id)
+        view_counts.record(self.property.id)
+        # Another process flushed in the meantime
+        Property.objects.filter(pk=self.property.pk).update(views_count=5)
+        self.assertEqual(view_counts.flush(), 2)
+        self.assertEqual(self.views(), 7)
+
+
+class OwnerAnalyticsTests(TestCase):
+    """Per-listing owner analytics come from a fixed number of grouped queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        cls.tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='x', role='TENANT')
+        cls.today = timezone.localdate()
+        cls.properties = [
+            Property.objects.create(
+                owner=cls.owner, title=f'Flat {i}', description='Flat', price=10000, location='Kochi',
+                is_paid=True, plan_type='basic', plan_expiry_date=timezone.now() + timedelta(days=30),
+            )
+            for i in range(3)
+        ]
+        first = cls.properties[0]
+        PropertyViewDaily.objects.create(property=first, date=cls.today - timedelta(days=1), views=4)
+        PropertyViewDaily.objects.create(property=first, date=cls.today, views=2)
+        Wishlist.objects.create(tenant=cls.tenant, property=first)
+        Conversation.objects.create(property=first, tenant=cls.tenant, owner=cls.owner)
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def test_listing_analytics(self):
+        start = (self.today - timedelta(days=2)).isoformat()
+        with self.assertNumQueries(6):  # session, user, listings, views, wishlist, inquiries
+            data = self.client.get(reverse('owner_analytics_api'), {'start': start}).json()
+        self.assertEqual(len(data['days']), 3)
+        listing = next(item for item in data['listings'] if item['id'] == self.properties[0].id)
+        self.assertEqual(
+            (listing['daily_views'], listing['views'], listing['wishlist_adds'], listing['inquiries']),
+            ([0, 4, 2], 6, 1, 1),
+        )
+
+    def test_owner_only(self):
+        self.client.force_login(self.tenant)
+        self.assertEqual(self.client.get(reverse('owner_analytics_api')).status_code, 403)
+
+
+class UniqueViewerTests(TestCase):
+    """Daily viewer sketches are compact and merge into weekly / monthly unique viewers"""
+
+    def test_estimate(self):
+        sketch = HyperLogLog()
+        for viewer_id in range(20000):
+            sketch.add(viewer_id)
+            sketch.add(viewer_id)  # repeat views are not counted twice
+        self.assertAlmostEqual(sketch.count(), 20000, delta=20000 * 0.05)
+        self.assertEqual(HyperLogLog.from_bytes(sketch.to_bytes()).registers, sketch.registers)
+        self.assertLessEqual(len(sketch.to_bytes()), 4200)
+
+        small = HyperLogLog()
+        for viewer_id in range(50):
+            small.add(viewer_id)
+        self.assertEqual(small.count(), 50)
+
+    @override_settings(VIEW_COUNT_FLUSH_SECONDS=3600, VIEW_COUNT_FLUSH_THRESHOLD=1000)
+    def test_merged_across_days(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', role='OWNER')
+        prop = Property.objects.create(
+            owner=owner, title='Flat', description='Flat', price=10000, location='Kochi', is_paid=True,
+            plan_type='basic', plan_expiry_date=timezone.now() + timedelta(days=30),
+        )
+        view_counts.flush()
+        for viewer_id in (1, 2, 3, 1, 1):
+            view_counts.record(prop.id, viewer_id)
+        view_counts.flush()
+        # Earlier days: viewer 3 came back, viewer 4 only within the month
+        today = timezone.localdate()
+        for days_ago, viewer_ids in ((2, [3]), (20, [4])):
+            sketch = HyperLogLog()
+            for viewer_id in viewer_ids:
+                sketch.add(viewer_id)
+            PropertyViewDaily.objects.create(
+                property=prop, date=today - timedelta(days=days_ago), views=1, viewer_sketch=sketch.to_bytes()
+            )
+
+        per_property, overall = unique_viewers([prop.id])
+        self.assertEqual(per_property[prop.id], {7: 3, 30: 4})
+        self.assertEqual(overall, {7: 3, 30: 4})
+        self.assertEqual(PropertyViewDaily.objects.get(property=prop, date=today).views, 5)
+
+        self.client.force_login(owner)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual((response.context['unique_viewers_week'], response.context['unique_viewers_month']), (3, 4))
@@ -0,0 +1,143 @@
+"""
+Unread message counters
+
+Each conversation stores how many messages its owner and its tenant have
+not read (owner_unread / tenant_unread), and each user stores the total
+across all their conversations (User.unread_messages). Dashboards and the
+inbox read these columns instead of counting messages per conversation:
+the unread total is a field of request.user and "conversations with unread"
+is one query on a partial index.
+
+The counters are maintained with F() updates: a new message bumps the
+counters of every participant other than its sender (core/signals.py), and
+opening a conversation marks its messages read and lowers the reader's
+counters in the same transaction, with the conversation row locked so
+concurrent sends and reads cannot lose an update.
+
+Deletes do not use a post_delete receiver on Message: one would make Django
+load and signal every message of a deleted conversation or user instead of
+deleting them in one statement. Deleting a conversation takes its stored
+counters off its participants' totals (pre_delete on Conversation), and the
+Django admin recounts the conversations whose messages it edits or deletes
+(recount_conversations). `python manage.py rebuild_unread_counters`
+recomputes every counter from the Message table after any other change.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import User, Conversation, Message
+
+
+def _recipients(conversation, sender_id):
+    """Counter field -> participant id of everyone in the conversation except the sender"""
+    participants = {'owner_unread': conversation.owner_id, 'tenant_unread': conversation.tenant_id}
+    return {field: user_id for field, user_id in participants.items() if user_id != sender_id}
+
+
+def _bump(conversation, sender_id, sign, **changes):
+    recipients = _recipients(conversation, sender_id)
+    for field in recipients:
+        changes[field] = Greatest(F(field) + sign, 0)
+    Conversation.objects.filter(pk=conversation.pk).update(**changes)
+    if recipients:
+        User.objects.filter(pk__in=recipients.values()).update(
+            unread_messages=Greatest(F('unread_messages') + sign, 0)
+        )
+
+
+def message_created(message):
+    """Count a new message as unread for its recipients and move the conversation to the top"""
+    with transaction.atomic():
+        _bump(message.conversation, message.sender_id, +1, updated_at=timezone.now())
+
+
+def recount_conversations(conversation_ids):
+    """
+    Recompute the counters of some conversations from their messages and
+    move the participants' totals by the difference. Used after messages
+    were changed or deleted in bulk. Returns {conversation id: (owner_unread,
+    tenant_unread)}.
+    """
+    with transaction.atomic():
+        conversations = list(Conversation.objects.select_for_update().filter(pk__in=conversation_ids).values(
+            'id', 'owner_id', 'tenant_id', 'owner_unread', 'tenant_unread'
+        ))
+        # Messages from a third party (an admin) are unread for both participants
+        unread = {
+            row['conversation_id']: row
+            for row in Message.objects.filter(conversation_id__in=conversation_ids, is_read=False)
+            .values('conversation_id').annotate(
+                owner_unread=Count('id', filter=~Q(sender_id=F('conversation__owner_id'))),
+                tenant_unread=Count('id', filter=~Q(sender_id=F('conversation__tenant_id'))),
+            ).order_by()
+        }
+
+        counters = {}
+        user_changes = Counter()
+        for conversation in conversations:
+            row = unread.get(conversation['id'], {})
+            owner_unread, tenant_unread = row.get('owner_unread', 0), row.get('tenant_unread', 0)
+            counters[conversation['id']] = (owner_unread, tenant_unread)
+            if (owner_unread, tenant_unread) == (conversation['owner_unread'], conversation['tenant_unread']):
+                continue
+            Conversation.objects.filter(pk=conversation['id']).update(owner_unread=owner_unread, tenant_unread=tenant_unread)
+            user_changes[conversation['owner_id']] += owner_unread - conversation['owner_unread']
+            user_changes[conversation['tenant_id']] += tenant_unread - conversation['tenant_unread']
+
+        for user_id, change in user_changes.items():
+            if change:
+                User.objects.filter(pk=user_id).update(unread_messages=Greatest(F('unread_messages') + change, 0))
+    return counters
+
+
+def conversation_deleted(conversation):
+    """Take a deleted conversation's unread messages off its participants' totals"""
+    # The stored counters: the instance being deleted may have been loaded before newer messages
+    owner_unread, tenant_unread = Conversation.objects.filter(pk=conversation.pk).values_list(
+        'owner_unread', 'tenant_unread'
+    ).first() or (0, 0)
+    for user_id, unread in ((conversation.owner_id, owner_unread), (conversation.tenant_id, tenant_unread)):
+        if unread:
+            User.objects.filter(pk=user_id).update(unread_messages=Greatest(F('unread_messages') - unread, 0))
+
+
+def mark_conversation_read(conversation, reader):
+    """
+    Mark the messages the reader did not send as read and update the
+    counters of both participants. Returns the number of messages marked.
+    """
+    if reader.pk in (conversation.owner_id, conversation.tenant_id) and not conversation.unread_for(reader):
+        # Nothing to read: no writes on every page view
+        return 0
+
+    with transaction.atomic():
+        Conversation.objects.select_for_update().filter(pk=conversation.pk).exists()
+        marked = Message.objects.filter(conversation=conversation, is_read=False).exclude(sender=reader).update(is_read=True)
+        if marked:
+            conversation.owner_unread, conversation.tenant_unread = recount_conversations([conversation.pk])[conversation.pk]
+    return marked
+
+
+def rebuild_unread_counters():
+    """Recompute every conversation's and user's unread counters from the Message table"""
+    def unread(participant):
+        return Coalesce(Subquery(
+            Message.objects.filter(conversation_id=OuterRef('pk'), is_read=False)
+            .exclude(sender_id=OuterRef(participant)).order_by()
+            .values('conversation_id').annotate(count=Count('id')).values('count')
+        ), 0)
+
+    def total(role, field):
+        return Coalesce(Subquery(
+            Conversation.objects.filter(**{role: OuterRef('pk')}).order_by()
+            .values(role).annotate(total=Sum(field)).values('total')
+        ), 0)
+
+    with transaction.atomic():
+        conversations = Conversation.objects.update(owner_unread=unread('owner_id'), tenant_unread=unread('tenant_id'))
+        User.objects.update(unread_messages=total('owner', 'owner_unread') + total('tenant', 'tenant_unread'))
+    return conversations
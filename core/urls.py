@@ -12,6 +12,10 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('api/properties/', views.tenant_properties_api_view, name='tenant_properties_api'),
+    path('api/facets/', views.tenant_facets_api_view, name='tenant_facets_api'),
+    path('api/locations/', views.location_autocomplete_api_view, name='location_autocomplete_api'),
+    path('api/map-clusters/', views.tenant_map_clusters_api_view, name='tenant_map_clusters_api'),
     
     # Property Management
     path('add-property/', views.add_property_view, name='add_property'),
@@ -37,8 +41,15 @@ urlpatterns = [
     # Admin
     path('admin-approve/<int:id>/', views.approve_property_view, name='approve_property'),
     path('admin-reject/<int:id>/', views.reject_property_view, name='reject_property'),
+    path('admin-moderate/', views.bulk_moderate_properties_view, name='bulk_moderate_properties'),
     path('admin-delete-user/<int:id>/', views.delete_user_view, name='delete_user'),
     path('admin-owner-profile/<int:id>/', views.owner_profile_view, name='owner_profile'),
+    path('admin-sections/<str:section>/', views.admin_section_view, name='admin_section'),
+    path('api/properties/<int:id>/images/', views.property_images_api_view, name='property_images_api'),
+    path('admin-export/<str:name>/', views.admin_export_view, name='admin_export'),
+    path('api/analytics/', views.analytics_api_view, name='analytics_api'),
+    path('api/owner-analytics/', views.owner_analytics_api_view, name='owner_analytics_api'),
+    path('admin-search-cache-stats/', views.search_cache_stats_view, name='search_cache_stats'),
 
     # Messaging
     path('conversations/', views.conversations_view, name='conversations'),
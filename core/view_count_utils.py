@@ -0,0 +1,215 @@
+"""
+Write-behind listing view counter
+
+A property page view used to be `views_count += 1; save()`: a read-modify-
+write that loses increments when two requests race, and a database write
+(on SQLite, a lock on the whole database) on the most visited page.
+
+Views are now counted in memory, per server process and per (property,
+day), and written in batches: an UPDATE that adds each property's pending
+count with `views_count = views_count + CASE id WHEN ... END`, and the same
+for the day's PropertyViewDaily rows (created in bulk when missing), whose
+viewer sketches get the ids of the day's viewers (core/hll_utils.py). Adding
+to the stored values keeps concurrent flushes from several processes
+correct.
+
+A batch is written when VIEW_COUNT_FLUSH_THRESHOLD views are pending, and
+otherwise by a background timer VIEW_COUNT_FLUSH_SECONDS after the first
+unwritten view, so a quiet process does not hold views indefinitely;
+whatever is left is written when the process exits normally (see
+CoreConfig.ready). A VIEW_COUNT_FLUSH_SECONDS of 0 writes every view
+straight away.
+
+Loss window: a process that is killed without running exit handlers
+(SIGKILL, the OOM killer, a crash) loses the views it has not written yet -
+at most about VIEW_COUNT_FLUSH_SECONDS worth (and never more than
+VIEW_COUNT_FLUSH_THRESHOLD views) per process. Lifetime and daily view
+counts are statistics, so this is accepted in exchange for not writing on
+every page view.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import Property, PropertyViewDaily
+from .hll_utils import sketch_with_viewers
+
+
+# Properties per UPDATE statement (keeps the CASE within database parameter limits)
+FLUSH_BATCH_SIZE = 500
+
+
+def _add_views(queryset, key, column, counts):
+    """
+    Add {property id: views} to `column` of the rows of queryset whose `key`
+    is the property id, FLUSH_BATCH_SIZE properties per UPDATE. Returns the
+    number of rows updated.
+    """
+    items = list(counts.items())
+    updated = 0
+    for offset in range(0, len(items), FLUSH_BATCH_SIZE):
+        chunk = items[offset:offset + FLUSH_BATCH_SIZE]
+        updated += queryset.filter(**{f'{key}__in': [property_id for property_id, _ in chunk]}).update(**{
+            column: F(column) + Case(
+                *[When(**{key: property_id}, then=Value(views)) for property_id, views in chunk],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        })
+    return updated
+
+
+def _add_daily_views(date, counts, viewers):
+    """
+    Add {property id: views} to the PropertyViewDaily rows of one day, and
+    {property id: viewer ids} to their viewer sketches, creating missing rows
+    """
+    rows = PropertyViewDaily.objects.filter(date=date)
+    # Locked: sketches are read, merged and written back
+    existing = {
+        pk: (row_id, sketch)
+        for row_id, pk, sketch in rows.select_for_update().filter(property_id__in=counts).values_list(
+            'id', 'property_id', 'viewer_sketch'
+        )
+    }
+    _add_views(rows, 'property_id', 'views', {pk: views for pk, views in counts.items() if pk in existing})
+    PropertyViewDaily.objects.bulk_update([
+        PropertyViewDaily(id=row_id, viewer_sketch=sketch_with_viewers(sketch, viewers[pk]))
+        for pk, (row_id, sketch) in existing.items() if viewers.get(pk)
+    ], ['viewer_sketch'], batch_size=FLUSH_BATCH_SIZE)
+
+    missing = {pk: views for pk, views in counts.items() if pk not in existing}
+    if not missing:
+        return
+    # Skip properties deleted since they were viewed
+    missing = {pk: missing[pk] for pk in Property.objects.filter(pk__in=missing).values_list('pk', flat=True)}
+    try:
+        with transaction.atomic():
+            PropertyViewDaily.objects.bulk_create([
+                PropertyViewDaily(
+                    property_id=pk, date=date, views=views,
+                    viewer_sketch=sketch_with_viewers(b'', viewers[pk]) if viewers.get(pk) else b'',
+                )
+                for pk, views in missing.items()
+            ], batch_size=FLUSH_BATCH_SIZE)
+    except IntegrityError:
+        # Another process created some of the rows in the meantime
+        _add_daily_views(date, missing, viewers)
+
+
+def _write_views(batch, viewers):
+    """
+    Write a {(property id, date): views} batch to Property.views_count and
+    PropertyViewDaily, with {(property id, date): viewer ids} added to the
+    daily viewer sketches
+    """
+    totals = Counter()
+    by_date = defaultdict(dict)
+    for (property_id, date), views in batch.items():
+        totals[property_id] += views
+        by_date[date][property_id] = views
+    with transaction.atomic():
+        _add_views(Property.objects.all(), 'pk', 'views_count', totals)
+        for date, counts in by_date.items():
+            _add_daily_views(date, counts, {pk: viewers.get((pk, date), ()) for pk in counts})
+
+
+class ViewCountBuffer:
+    """Pending property views of this process, flushed to the database in batches"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()  # (property id, local date) -> views
+        self._viewers = defaultdict(set)  # (property id, local date) -> viewer ids
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def record(self, property_id, viewer_id=None):
+        """Count one view of a property (by a user), flushing the batch if its window is over"""
+        key = (property_id, timezone.localdate())
+        with self._lock:
+            self._pending[key] += 1
+            if viewer_id is not None:
+                self._viewers[key].add(viewer_id)
+            self._pending_total += 1
+            due = (
+                self._pending_total >= settings.VIEW_COUNT_FLUSH_THRESHOLD
+                or time.monotonic() - self._last_flush >= settings.VIEW_COUNT_FLUSH_SECONDS
+            )
+            if not due:
+                # Write this view within the batch window even if no other view arrives
+                self._schedule_flush()
+        if due:
+            try:
+                self.flush()
+            except DatabaseError as e:
+                # The views stay buffered for the next flush; the page still renders
+                print(f"Failed to flush property view counts: {e}")
+
+    def pending(self, property_id=None):
+        """Views not written yet, of one property or in total"""
+        with self._lock:
+            if property_id is None:
+                return self._pending_total
+            return sum(views for (pk, _), views in self._pending.items() if pk == property_id)
+
+    def flush(self):
+        """Write the pending views in batched UPDATEs. Returns the number of views written."""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+            viewers, self._viewers = self._viewers, defaultdict(set)
+            total, self._pending_total = self._pending_total, 0
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+        try:
+            _write_views(batch, viewers)
+        except DatabaseError:
+            with self._lock:
+                self._pending.update(batch)
+                for key, viewer_ids in viewers.items():
+                    self._viewers[key].update(viewer_ids)
+                self._pending_total += total
+            raise
+        return total
+
+    def _schedule_flush(self):
+        """Start the batch window timer unless one is running (call with the lock held)"""
+        if self._timer is None:
+            self._timer = threading.Timer(settings.VIEW_COUNT_FLUSH_SECONDS, self._run_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        """Background timer: write whatever is pending at the end of the batch window"""
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Failed to flush property view counts: {e}")
+            with self._lock:
+                # Try again after another window
+                self._schedule_flush()
+
+    def _run_timer(self):
+        try:
+            self._timed_flush()
+        finally:
+            # The timer thread's own database connection
+            connections.close_all()
+
+    def flush_on_exit(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Failed to flush property view counts on shutdown: {e}")
+
+
+view_counts = ViewCountBuffer()
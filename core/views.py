@@ -5,10 +5,26 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_POST
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.conf import settings
 from .models import Property, PropertyImage, Payment, Conversation, Message
 from .forms import PropertyForm
+from .search_utils import (
+    get_tenant_filters, search_tenant_properties, tenant_results_page, tenant_results_count, search_cache_stats
+)
+from .facet_utils import tenant_facets, facet_count_lookup
+from .geo_utils import parse_bbox
+from .map_utils import map_clusters
+from .autocomplete_utils import location_index
+from .admin_section_utils import ADMIN_SECTIONS, admin_section_page
+from .revenue_utils import PLAN_DURATION_DAYS, complete_payment, payment_snapshot, record_payment_change
+from .image_utils import refresh_property_images, image_urls
+from .export_utils import EXPORT_FORMATS, stream_export
+from .entitlement_utils import PLAN_LIMITS, owner_entitlement
+from .unread_utils import mark_conversation_read
+from .view_count_utils import view_counts
+from .hll_utils import unique_viewers
 import razorpay
 import json
 from django.views.decorators.csrf import csrf_exempt
@@ -17,15 +33,11 @@ User = get_user_model()
 
 # ... (Previous views: index, register, login, logout remain same) ...
 def index(request):
-    from django.utils import timezone
     from .models import WebsiteFeedback
     
     # Get premium properties for home page display
-    premium_properties = Property.objects.filter(
-        status=Property.Status.AVAILABLE,
-        is_paid=True,
-        plan_type='premium',
-        plan_expiry_date__gt=timezone.now()
+    premium_properties = Property.objects.visible().filter(
+        plan_type='premium'
     ).order_by('-created_at')[:6]  # Show top 6 premium properties
     
     # Get featured website feedbacks for home page
@@ -120,337 +132,356 @@ def dashboard_view(request):
     
     # Check if user is superuser (Admin)
     if request.user.is_superuser or request.user.role == 'ADMIN':
-        from django.utils import timezone
-        from django.db.models import Sum, Count, Q
+        from .stats_utils import admin_dashboard_stats
         
         # Admin Dashboard Logic
+        # Cards use the stored cover photo / photo count; the gallery fetches
+        # the full photo list when opened
+        
         # Show only PAID properties with PENDING status for approval
         pending_properties = Property.objects.filter(
             status=Property.Status.PENDING_APPROVAL,
             is_paid=True
-        ).order_by('-created_at')
-        
-        # Exclude admin/superuser from owners and tenants lists
-        owners = User.objects.filter(role='OWNER', is_superuser=False).order_by('-date_joined')
-        tenants = User.objects.filter(role='TENANT', is_superuser=False).order_by('-date_joined')
-        all_users = User.objects.exclude(is_superuser=True).order_by('-date_joined')
-        
-        # Show only paid properties in all properties section
-        all_properties = Property.objects.filter(is_paid=True).order_by('-created_at')
-        
-        # Add plan status to each property
-        for prop in all_properties:
-            if prop.plan_expiry_date:
-                prop.is_plan_active = prop.is_plan_active()
-                prop.days_left = prop.days_remaining()
-            else:
-                prop.is_plan_active = False
-                prop.days_left = 0
-        
-        # Revenue/Payment Analytics
-        # Show only successful (completed) payments in transaction list
-        all_payments = Payment.objects.filter(status=Payment.PaymentStatus.SUCCESS).select_related('property', 'owner').order_by('-created_at')
-        
-        # Calculate revenue statistics (using all payment statuses for stats)
-        all_payments_for_stats = Payment.objects.all()
-        
-        total_revenue = all_payments_for_stats.filter(status=Payment.PaymentStatus.SUCCESS).aggregate(
-            total=Sum('amount')
-        )['total'] or 0
+        ).select_related('owner').order_by('-created_at')
         
-        failed_payments_count = all_payments_for_stats.filter(status=Payment.PaymentStatus.FAILED).count()
-        successful_payments_count = all_payments_for_stats.filter(status=Payment.PaymentStatus.SUCCESS).count()
-        
-        # Revenue by plan type
-        revenue_by_plan = {
-            'basic': all_payments_for_stats.filter(status=Payment.PaymentStatus.SUCCESS, amount=99).aggregate(
-                total=Sum('amount'), count=Count('id')
-            ),
-            'standard': all_payments_for_stats.filter(status=Payment.PaymentStatus.SUCCESS, amount=199).aggregate(
-                total=Sum('amount'), count=Count('id')
-            ),
-            'premium': all_payments_for_stats.filter(status=Payment.PaymentStatus.SUCCESS, amount=399).aggregate(
-                total=Sum('amount'), count=Count('id')
-            ),
-        }
-        
-        # Recent payments (last 10 successful payments)
-        recent_payments = all_payments[:10]
+        # All counts and revenue figures (one conditional-aggregate query per table)
+        context.update(admin_dashboard_stats())
         
+        # Owners, tenants, all properties and transactions are loaded on
+        # demand from admin_section_view
         context['pending_properties'] = pending_properties
-        context['pending_count'] = pending_properties.count()
-        context['all_users'] = all_users
-        context['total_users'] = all_users.count()
-        context['owners'] = owners
-        context['total_owners'] = owners.count()
-        context['tenants'] = tenants
-        context['total_tenants'] = tenants.count()
-        context['all_properties'] = all_properties
-        context['total_properties'] = all_properties.count()
-        
-        # Payment/Revenue context
-        context['all_payments'] = all_payments
-        context['total_payments'] = all_payments.count()
-        context['total_revenue'] = total_revenue
-        context['failed_payments_count'] = failed_payments_count
-        context['successful_payments_count'] = successful_payments_count
-        context['revenue_by_plan'] = revenue_by_plan
-        context['recent_payments'] = recent_payments
         
         return render(request, 'core/admin_dashboard.html', context)
     
     elif request.user.role == 'OWNER':
-        from django.utils import timezone
-        
         # Only show properties that have completed payment (is_paid=True)
         properties = Property.objects.filter(owner=request.user, is_paid=True)
         
-        # Separate properties by status
-        rented_properties = properties.filter(status=Property.Status.RENTED).order_by('-updated_at')
-        rejected_properties = properties.filter(status=Property.Status.REJECTED).order_by('-updated_at')
-        active_properties = properties.exclude(status__in=[Property.Status.RENTED, Property.Status.REJECTED])
-        
-        # Add plan status to each property
-        for prop in properties:
-            if prop.plan_expiry_date:
-                prop.is_plan_active = prop.is_plan_active()
-                prop.days_left = prop.days_remaining()
-            else:
-                prop.is_plan_active = False
-                prop.days_left = 0
-        
-        # Get only conversations with unread messages for owner
-        all_conversations = Conversation.objects.filter(owner=request.user).order_by('-updated_at')
+        # Separate properties by status; plan status is computed in SQL and
+        # each list is loaded once
+        listed = properties.with_plan_status()
+        rented_properties = list(listed.filter(status=Property.Status.RENTED).order_by('-updated_at'))
+        rejected_properties = list(listed.filter(status=Property.Status.REJECTED).order_by('-updated_at'))
+        active_properties = list(listed.exclude(status__in=[Property.Status.RENTED, Property.Status.REJECTED]))
+        
+        # Latest conversations with unread messages (partial index on owner_unread)
+        conversations_with_unread = list(
+            Conversation.objects.filter(owner=request.user, owner_unread__gt=0)
+            .select_related('tenant', 'property').order_by('-updated_at')[:5]
+        )
+        for conversation in conversations_with_unread:
+            conversation.has_unread = True
         
-        # Filter to only show conversations with unread messages
-        conversations_with_unread = []
-        unread_messages_count = 0
-        for conversation in all_conversations:
-            unread_count = conversation.messages.filter(is_read=False).exclude(sender=request.user).count()
-            unread_messages_count += unread_count
-            if unread_count > 0:
-                conversation.has_unread = True
-                conversations_with_unread.append(conversation)
-                if len(conversations_with_unread) >= 5:  # Limit to 5 unread conversations
-                    break
+        # Unique viewers of each listing this week / month, from the merged daily viewer sketches
+        listed_properties = active_properties + rented_properties + rejected_properties
+        property_viewers, owner_viewers = unique_viewers([prop.id for prop in listed_properties])
+        for prop in listed_properties:
+            prop.unique_viewers_week = property_viewers[prop.id][7]
+            prop.unique_viewers_month = property_viewers[prop.id][30]
         
         # Count active properties (with valid plans)
-        active_properties_count = properties.filter(
-            status=Property.Status.AVAILABLE,
-            is_paid=True,
-            plan_expiry_date__gt=timezone.now()
-        ).count()
+        active_properties_count = properties.visible().count()
         
-        # Check property limits and calculate remaining slots
-        basic_count = properties.filter(plan_type='basic', plan_expiry_date__gt=timezone.now()).count()
-        standard_count = properties.filter(plan_type='standard', plan_expiry_date__gt=timezone.now()).count()
-        premium_count = properties.filter(plan_type='premium', plan_expiry_date__gt=timezone.now()).count()
-        
-        # Check if user has any properties at all (new user check)
-        total_properties_ever = Property.objects.filter(owner=request.user).count()
-        
-        # Determine current plan limits and remaining slots
-        can_add_property = True
-        remaining_slots = 0
-        plan_limit = 0
-        
-        if premium_count > 0:
-            plan_limit = 10
-            remaining_slots = max(0, 10 - active_properties_count)
-            can_add_property = active_properties_count < 10
-        elif standard_count > 0:
-            plan_limit = 3
-            remaining_slots = max(0, 3 - active_properties_count)
-            can_add_property = active_properties_count < 3
-        elif basic_count > 0:
-            plan_limit = 1
-            remaining_slots = max(0, 1 - active_properties_count)
-            can_add_property = active_properties_count < 1
-        else:
-            # New owner with no plans - allow them to start with first property
-            if total_properties_ever == 0:
-                plan_limit = 1
-                remaining_slots = 1
-                can_add_property = True
-            else:
-                # Existing owner with expired plans
-                plan_limit = 0
-                remaining_slots = 0
-                can_add_property = False
-        
-        # Get user's current subscription plan (from most recent active property)
-        current_plan = "No Plan"
-        if properties.exists():
-            # Get the most recent property with an active plan
-            recent_property = properties.filter(
-                plan_expiry_date__gt=timezone.now()
-            ).order_by('-plan_expiry_date').first()
-            
-            if recent_property and recent_property.plan_type:
-                current_plan = recent_property.plan_type.title()
-        
-        # Total listings count (all properties including inactive)
-        total_listings_count = Property.objects.filter(owner=request.user).count()
+        # Plan limits, remaining slots and current plan (cached per owner)
+        entitlement = owner_entitlement(request.user)
         
         context['properties'] = active_properties
         context['rented_properties'] = rented_properties
-        context['rented_count'] = rented_properties.count()
+        context['rented_count'] = len(rented_properties)
         context['rejected_properties'] = rejected_properties
-        context['rejected_count'] = rejected_properties.count()
+        context['rejected_count'] = len(rejected_properties)
         context['active_listings_count'] = active_properties_count
-        context['current_plan'] = current_plan
-        context['total_listings_count'] = total_listings_count
+        context['current_plan'] = entitlement.current_plan_label
+        context['total_listings_count'] = entitlement.total_properties
         context['recent_conversations'] = conversations_with_unread
-        context['unread_messages_count'] = unread_messages_count
-        context['can_add_property'] = can_add_property
-        context['remaining_slots'] = remaining_slots
-        context['plan_limit'] = plan_limit
+        context['unread_messages_count'] = request.user.unread_messages
+        context['can_add_property'] = entitlement.can_add_property
+        context['remaining_slots'] = entitlement.remaining_slots
+        context['plan_limit'] = entitlement.plan_limit
+        context['slots_used'] = entitlement.total_active
+        context['unique_viewers_week'] = owner_viewers[7]
+        context['unique_viewers_month'] = owner_viewers[30]
         return render(request, 'core/owner_dashboard.html', context)
     
     elif request.user.role == 'TENANT':
         from .models import Wishlist
         from django.utils import timezone
-        from django.db.models import Case, When, IntegerField, Q
         
         # Get filter parameters from request
-        location = request.GET.get('location', '').strip()
-        property_type = request.GET.get('property_type', '').strip()
-        min_price = request.GET.get('min_price', '').strip()
-        max_price = request.GET.get('max_price', '').strip()
-        bhk = request.GET.get('bhk', '').strip()
-        furnishing = request.GET.get('furnishing', '').strip()
-        bachelors_allowed = request.GET.get('bachelors_allowed', '').strip()
-        min_area = request.GET.get('min_area', '').strip()
-        max_area = request.GET.get('max_area', '').strip()
-        amenities = request.GET.get('amenities', '').strip()
-        sort_by = request.GET.get('sort_by', 'priority').strip()
-        
-        # Base queryset - only show properties that are available, paid, and have active plans
-        available_properties = Property.objects.filter(
-            status=Property.Status.AVAILABLE,
-            is_paid=True,
-            plan_expiry_date__gt=timezone.now()
-        ).prefetch_related('images').select_related('owner')
-        
-        # Apply filters
-        if location:
-            available_properties = available_properties.filter(
-                Q(location__icontains=location) | Q(title__icontains=location)
-            )
-        
-        if property_type:
-            available_properties = available_properties.filter(property_type__iexact=property_type)
-        
-        if min_price:
-            try:
-                available_properties = available_properties.filter(price__gte=float(min_price))
-            except ValueError:
-                pass
-        
-        if max_price:
-            try:
-                available_properties = available_properties.filter(price__lte=float(max_price))
-            except ValueError:
-                pass
-        
-        if bhk:
-            try:
-                available_properties = available_properties.filter(bhk=int(bhk))
-            except ValueError:
-                pass
-        
-        if furnishing:
-            available_properties = available_properties.filter(furnishing=furnishing)
-        
-        if bachelors_allowed == 'yes':
-            available_properties = available_properties.filter(bachelors_allowed=True)
-        elif bachelors_allowed == 'no':
-            available_properties = available_properties.filter(bachelors_allowed=False)
-        
-        if min_area:
-            try:
-                available_properties = available_properties.filter(super_built_area__gte=float(min_area))
-            except ValueError:
-                pass
-        
-        if max_area:
-            try:
-                available_properties = available_properties.filter(super_built_area__lte=float(max_area))
-            except ValueError:
-                pass
-        
-        if amenities:
-            # Filter by amenities (comma-separated)
-            amenity_list = [a.strip() for a in amenities.split(',')]
-            for amenity in amenity_list:
-                if amenity:
-                    available_properties = available_properties.filter(amenities__icontains=amenity)
-        
-        # Annotate with plan priority
-        available_properties = available_properties.annotate(
-            plan_priority=Case(
-                When(plan_type='premium', then=3),
-                When(plan_type='standard', then=2),
-                When(plan_type='basic', then=1),
-                default=0,
-                output_field=IntegerField()
-            )
+        filters = get_tenant_filters(request.GET)
+        
+        # Search docs of properties that are available, paid, and have active plans, with the filters applied
+        available_properties, ordering = search_tenant_properties(filters)
+        
+        # Keyset pagination over the cached result ids - only the current page is loaded
+        page_properties, next_cursor = tenant_results_page(
+            available_properties,
+            ordering,
+            filters,
+            cursor=request.GET.get('cursor'),
+            page_size=settings.TENANT_SEARCH_PAGE_SIZE
         )
         
-        # Apply sorting
-        if sort_by == 'price_low':
-            available_properties = available_properties.order_by('price', '-plan_priority')
-        elif sort_by == 'price_high':
-            available_properties = available_properties.order_by('-price', '-plan_priority')
-        elif sort_by == 'newest':
-            available_properties = available_properties.order_by('-created_at', '-plan_priority')
-        elif sort_by == 'area_low':
-            available_properties = available_properties.order_by('super_built_area', '-plan_priority')
-        elif sort_by == 'area_high':
-            available_properties = available_properties.order_by('-super_built_area', '-plan_priority')
-        else:  # priority (default)
-            available_properties = available_properties.order_by('-plan_priority', '-created_at')
-        
         # Get wishlist items
         wishlist_items = Wishlist.objects.filter(tenant=request.user).select_related('property')
         wishlist_property_ids = list(wishlist_items.values_list('property_id', flat=True))
         
-        # Count unread messages for tenant
-        tenant_conversations = Conversation.objects.filter(tenant=request.user)
-        unread_messages_count = 0
-        for conversation in tenant_conversations:
-            unread_messages_count += conversation.messages.filter(is_read=False).exclude(sender=request.user).count()
+        # Facet counts for the filter sidebar (one grouped query)
+        facets = tenant_facets(filters)
+        property_types = [item['value'] for item in facets['property_type']]
         
-        # Get unique property types for filter dropdown
-        property_types = Property.objects.filter(
-            status=Property.Status.AVAILABLE,
-            is_paid=True,
-            plan_expiry_date__gt=timezone.now()
-        ).values_list('property_type', flat=True).distinct().order_by('property_type')
+        # Query string of the current filters, used to request the next page
+        page_query = request.GET.copy()
+        page_query.pop('cursor', None)
         
-        context['available_properties'] = available_properties
-        context['total_available'] = available_properties.count()
+        context['available_properties'] = page_properties
+        context['total_available'] = tenant_results_count(available_properties, ordering, filters)
+        context['next_cursor'] = next_cursor
+        context['page_query'] = page_query.urlencode()
         context['wishlist_count'] = wishlist_items.count()
         context['wishlist_property_ids'] = wishlist_property_ids
-        context['unread_messages_count'] = unread_messages_count
+        context['unread_messages_count'] = request.user.unread_messages
         context['property_types'] = property_types
-        context['filters'] = {
-            'location': location,
-            'property_type': property_type,
-            'min_price': min_price,
-            'max_price': max_price,
-            'bhk': bhk,
-            'furnishing': furnishing,
-            'bachelors_allowed': bachelors_allowed,
-            'min_area': min_area,
-            'max_area': max_area,
-            'amenities': amenities,
-            'sort_by': sort_by,
-        }
+        context['facets'] = facets
+        context['facet_counts'] = facet_count_lookup(facets)
+        context['filters'] = filters
         return render(request, 'core/tenant_dashboard.html', context)
     
     return render(request, 'core/dashboard.html', context)
 
+@login_required
+def tenant_properties_api_view(request):
+    """Next page of tenant search results as rendered cards (infinite scroll)"""
+    if request.user.role != 'TENANT':
+        return JsonResponse({'success': False, 'message': 'Tenants only.'}, status=403)
+    
+    from .models import Wishlist
+    
+    filters = get_tenant_filters(request.GET)
+    available_properties, ordering = search_tenant_properties(filters)
+    
+    page_properties, next_cursor = tenant_results_page(
+        available_properties,
+        ordering,
+        filters,
+        cursor=request.GET.get('cursor'),
+        page_size=settings.TENANT_SEARCH_PAGE_SIZE
+    )
+    
+    # Only look up wishlist state for the properties on this page
+    wishlist_property_ids = set(Wishlist.objects.filter(
+        tenant=request.user,
+        property_id__in=[listing.pk for listing in page_properties]
+    ).values_list('property_id', flat=True))
+    
+    html = render_to_string('core/includes/tenant_property_cards.html', {
+        'available_properties': page_properties,
+        'wishlist_property_ids': wishlist_property_ids,
+    }, request=request)
+    
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'count': len(page_properties),
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+def tenant_facets_api_view(request):
+    """Facet counts for the current tenant filters (filter sidebar)"""
+    if request.user.role != 'TENANT':
+        return JsonResponse({'success': False, 'message': 'Tenants only.'}, status=403)
+    
+    filters = get_tenant_filters(request.GET)
+    
+    return JsonResponse({
+        'success': True,
+        'facets': tenant_facets(filters),
+    })
+
+@login_required
+def location_autocomplete_api_view(request):
+    """Location suggestions for the tenant search box (?q=kak)"""
+    if request.user.role != 'TENANT':
+        return JsonResponse({'success': False, 'message': 'Tenants only.'}, status=403)
+    
+    return JsonResponse({
+        'success': True,
+        'suggestions': location_index.suggest(request.GET.get('q', '')),
+    })
+
+@login_required
+def tenant_map_clusters_api_view(request):
+    """Clustered map markers for a viewport (?bbox=south,west,north,east&zoom=12)"""
+    if request.user.role != 'TENANT':
+        return JsonResponse({'success': False, 'message': 'Tenants only.'}, status=403)
+    
+    bbox = parse_bbox(request.GET.get('bbox', ''))
+    try:
+        zoom = int(request.GET.get('zoom', ''))
+    except ValueError:
+        zoom = None
+    if bbox is None or zoom is None:
+        return JsonResponse({'success': False, 'message': 'bbox and zoom are required.'}, status=400)
+    
+    clusters = map_clusters(get_tenant_filters(request.GET), bbox, zoom)
+    if clusters is None:
+        return JsonResponse({'success': False, 'message': 'Viewport too large, zoom in.'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'zoom': zoom,
+        'clusters': clusters,
+    })
+
+@login_required
+def admin_section_view(request, section):
+    """One page of an admin dashboard section as rendered rows - Admin only"""
+    if not (request.user.is_superuser or request.user.role == 'ADMIN'):
+        return JsonResponse({'success': False, 'message': 'Access denied.'}, status=403)
+    
+    page = admin_section_page(section, request.GET.get('q', ''), request.GET.get('cursor'))
+    if page is None:
+        return JsonResponse({'success': False, 'message': 'Unknown section.'}, status=404)
+    items, next_cursor = page
+    
+    try:
+        start = max(0, int(request.GET.get('start', 0)))
+    except ValueError:
+        start = 0
+    
+    html = render_to_string(ADMIN_SECTIONS[section]['template'], {
+        'items': items,
+        'start': start,
+    }, request=request)
+    
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'count': len(items),
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+def property_images_api_view(request, id):
+    """Photo URLs of a property in upload order, for the admin image gallery"""
+    property_obj = get_object_or_404(Property, id=id)
+    is_admin = request.user.is_superuser or request.user.role == 'ADMIN'
+    if not (is_admin or property_obj.owner_id == request.user.id):
+        return JsonResponse({'success': False, 'message': 'Access denied.'}, status=403)
+    
+    return JsonResponse({
+        'success': True,
+        'title': property_obj.title,
+        'images': image_urls(property_obj),
+    })
+
+@login_required
+def admin_export_view(request, name):
+    """
+    Streaming CSV / NDJSON download of payments, properties or users - Admin only
+    (?format=csv|ndjson&start=YYYY-MM-DD&end=YYYY-MM-DD&status=SUCCESS)
+    """
+    if not (request.user.is_superuser or request.user.role == 'ADMIN'):
+        return JsonResponse({'success': False, 'message': 'Access denied.'}, status=403)
+    
+    from django.utils import timezone
+    
+    export_format = request.GET.get('format', 'csv')
+    try:
+        chunks = stream_export(
+            name,
+            export_format,
+            start=request.GET.get('start'),
+            end=request.GET.get('end'),
+            status=request.GET.get('status'),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[export_format])
+    filename = f"{name}-{timezone.localdate():%Y%m%d}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@login_required
+def analytics_api_view(request):
+    """
+    Bucketed time series for admin charts - Admin only
+    (?series=signups,revenue&bucket=hour|day|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD)
+    """
+    if not (request.user.is_superuser or request.user.role == 'ADMIN'):
+        return JsonResponse({'success': False, 'message': 'Access denied.'}, status=403)
+    
+    from .analytics_utils import SERIES, analytics, parse_moment
+    
+    names = [name for name in request.GET.get('series', '').split(',') if name] or SERIES
+    try:
+        bucket, start, end, series = analytics(
+            names,
+            request.GET.get('bucket', 'day'),
+            start=parse_moment(request.GET.get('start')),
+            end=parse_moment(request.GET.get('end'), end_of_day=True),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'bucket': bucket,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': {
+            name: [{'t': moment.isoformat(), 'value': float(value)} for moment, value in points]
+            for name, points in series.items()
+        },
+    })
+
+@login_required
+def owner_analytics_api_view(request):
+    """
+    Daily views, wishlist adds and inquiries of the owner's listings - Owner only
+    (?start=YYYY-MM-DD&end=YYYY-MM-DD&property=<id>)
+    """
+    if request.user.role != 'OWNER':
+        return JsonResponse({'success': False, 'message': 'Access denied.'}, status=403)
+    
+    from .analytics_utils import owner_listing_analytics, parse_moment
+    
+    try:
+        start = parse_moment(request.GET.get('start'))
+        end = parse_moment(request.GET.get('end'))
+        property_id = request.GET.get('property')
+        if property_id is not None and not property_id.isdigit():
+            raise ValueError("Invalid property id.")
+        days, listings = owner_listing_analytics(
+            request.user,
+            start=start.date() if start else None,
+            end=end.date() if end else None,
+            property_id=int(property_id) if property_id else None,
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'start': days[0].isoformat(),
+        'end': days[-1].isoformat(),
+        'days': [day.isoformat() for day in days],
+        'listings': listings,
+    })
+
+@login_required
+def search_cache_stats_view(request):
+    """Hit/miss counters of the tenant search result cache - Admin only"""
+    if not (request.user.is_superuser or request.user.role == 'ADMIN'):
+        return JsonResponse({'success': False, 'message': 'Access denied.'}, status=403)
+    
+    return JsonResponse({
+        'success': True,
+        'stats': search_cache_stats(),
+    })
+
 @login_required
 def add_property_view(request):
     if request.user.role != 'OWNER':
@@ -461,64 +492,11 @@ def add_property_view(request):
     bypass_limit_check = request.session.get('bypass_limit_check', False)
     
     if not bypass_limit_check:
-        # Check property limits based on active properties with valid plans
-        from django.utils import timezone
-        active_properties = Property.objects.filter(
-            owner=request.user,
-            is_paid=True,
-            plan_expiry_date__gt=timezone.now()
-        )
-        
-        # Check if this is a completely new owner
-        total_properties_ever = Property.objects.filter(owner=request.user).count()
-        
-        # Count properties by plan type
-        basic_count = active_properties.filter(plan_type='basic').count()
-        standard_count = active_properties.filter(plan_type='standard').count()
-        premium_count = active_properties.filter(plan_type='premium').count()
-        
-        # Check if user has reached their limit
-        # Basic: 1 property, Standard: 3 properties, Premium: 10 properties
-        total_active = active_properties.count()
-        
-        # Determine if user can add more properties based on their highest plan
-        can_add_property = True
-        limit_message = ""
-        current_plan = None
-        
-        # Check limits based on the highest active plan
-        if premium_count > 0:
-            # User has premium plan
-            current_plan = 'premium'
-            if total_active >= 10:
-                can_add_property = False
-                limit_message = "Your listing limit is reached. You have reached your Premium Plan limit (10 properties). Subscribe to a new plan or wait for existing properties to expire."
-        elif standard_count > 0:
-            # User has standard plan
-            current_plan = 'standard'
-            if total_active >= 3:
-                can_add_property = False
-                limit_message = "Your listing limit is reached. You have reached your Standard Plan limit (3 properties). Subscribe to a new plan to list more properties."
-        elif basic_count > 0:
-            # User only has basic plan
-            current_plan = 'basic'
-            if total_active >= 1:
-                can_add_property = False
-                limit_message = "Your listing limit is reached. You have reached your Basic Plan limit (1 property). Subscribe to a new plan to list more properties."
-        else:
-            # User has no active properties/plans
-            if total_properties_ever == 0:
-                # Completely new owner - allow them to start
-                can_add_property = True
-            else:
-                # Existing owner with expired plans
-                can_add_property = False
-                limit_message = "Your listing limit is reached. You need an active subscription plan to list properties. Subscribe to a new plan to continue listing."
-        
-        if not can_add_property:
-            # Create a more detailed message with upgrade link
-            messages.error(request, limit_message)
+        # Check property limits based on the owner's highest active plan
+        entitlement = owner_entitlement(request.user)
+        if not entitlement.can_add_property:
             # Redirect back to dashboard with the error message
+            messages.error(request, entitlement.limit_message)
             return redirect('dashboard')
     else:
         # Clear the bypass flag after using it
@@ -611,8 +589,12 @@ def add_photos_view(request, id):
     if request.method == 'POST':
         images = request.FILES.getlist('images')
         if images:
-            for image in images:
-                PropertyImage.objects.create(property=property_obj, image=image)
+            # One INSERT for the batch, then one refresh of the cover photo
+            # and photo count (bulk_create skips the per-image signal)
+            PropertyImage.objects.bulk_create([
+                PropertyImage(property=property_obj, image=image) for image in images
+            ])
+            refresh_property_images(property_obj.id)
             
             # Update property timestamp to ensure fresh data for tenants
             property_obj.save(update_fields=['updated_at'])
@@ -668,9 +650,6 @@ def set_location_view(request, id):
 
 @login_required
 def select_plan_view(request, id):
-    from django.utils import timezone
-    from datetime import timedelta
-    
     property_obj = get_object_or_404(Property, id=id, owner=request.user)
     
     # Check if this is a re-listing (rented property), rejected property edit, or if payment is already completed
@@ -696,41 +675,12 @@ def select_plan_view(request, id):
         messages.info(request, "Payment already completed for this property.")
         return redirect('dashboard')
     
-    # Check if owner has an active plan with available slots
-    active_properties = Property.objects.filter(
-        owner=request.user,
-        is_paid=True,
-        plan_expiry_date__gt=timezone.now()
-    ).exclude(id=property_obj.id)  # Exclude current property
-    
-    # Count properties by plan type
-    premium_properties = active_properties.filter(plan_type='premium')
-    standard_properties = active_properties.filter(plan_type='standard')
-    basic_properties = active_properties.filter(plan_type='basic')
-    
-    premium_count = premium_properties.count()
-    standard_count = standard_properties.count()
-    basic_count = basic_properties.count()
-    total_active = active_properties.count()
-    
-    # Check if user can use existing plan
-    can_use_existing_plan = False
-    existing_plan_type = None
-    existing_plan_expiry = None
-    
-    # Check Premium plan (allows up to 10 properties)
-    if premium_count > 0 and total_active < 10:
-        can_use_existing_plan = True
-        existing_plan_type = 'premium'
-        # Use the earliest expiry date from premium properties
-        existing_plan_expiry = premium_properties.order_by('plan_expiry_date').first().plan_expiry_date
-    
-    # Check Standard plan (allows up to 3 properties)
-    elif standard_count > 0 and total_active < 3:
-        can_use_existing_plan = True
-        existing_plan_type = 'standard'
-        # Use the earliest expiry date from standard properties
-        existing_plan_expiry = standard_properties.order_by('plan_expiry_date').first().plan_expiry_date
+    # Check if owner has an active plan with available slots (the current
+    # property is not counted); the new property shares that plan's earliest expiry
+    entitlement = owner_entitlement(request.user)
+    reusable_plan = entitlement.reusable_plan(property_obj)
+    can_use_existing_plan = reusable_plan is not None
+    existing_plan_type, existing_plan_expiry = reusable_plan or (None, None)
     
     # If user can use existing plan and it's not a re-listing, auto-assign and skip payment
     if can_use_existing_plan and not is_relisting:
@@ -804,7 +754,7 @@ def select_plan_view(request, id):
         'plans': plans,
         'can_use_existing_plan': can_use_existing_plan,
         'existing_plan_type': existing_plan_type,
-        'total_active': total_active
+        'total_active': entitlement.total_active
     }
     
     return render(request, 'core/select_plan.html', context)
@@ -836,8 +786,10 @@ def payment_view(request, id):
         'premium': 'Premium Plan'
     }
     
-    amount_inr = plan_prices.get(selected_plan, 99)
-    plan_name = plan_names.get(selected_plan, 'Basic Plan')
+    if selected_plan not in plan_prices:
+        selected_plan = 'basic'
+    amount_inr = plan_prices[selected_plan]
+    plan_name = plan_names[selected_plan]
     
     # Check if Razorpay keys are configured
     if settings.RAZORPAY_KEY_ID.startswith('rzp_test_YOUR') or settings.RAZORPAY_KEY_ID == 'rzp_test_YOUR_KEY_ID':
@@ -870,6 +822,7 @@ def payment_view(request, id):
                 owner=request.user,
                 razorpay_order_id=razorpay_order['id'],
                 amount=amount_inr,
+                plan_type=selected_plan,
                 status=Payment.PaymentStatus.PENDING
             )
         else:
@@ -891,12 +844,16 @@ def payment_view(request, id):
                     razorpay_order = client.order.create(data=order_data)
                     
                     # Update existing payment record with new order
+                    before = payment_snapshot(payment)
                     payment.razorpay_order_id = razorpay_order['id']
                     payment.razorpay_payment_id = None
                     payment.razorpay_signature = None
                     payment.status = Payment.PaymentStatus.PENDING
                     payment.amount = amount_inr
+                    payment.plan_type = selected_plan
                     payment.save()
+                    # A failed attempt being retried leaves the revenue rollup
+                    record_payment_change(before, payment)
             except Payment.DoesNotExist:
                 # No payment exists, create new one
                 amount = int(amount_inr * 100)
@@ -916,6 +873,7 @@ def payment_view(request, id):
                     owner=request.user,
                     razorpay_order_id=razorpay_order['id'],
                     amount=amount_inr,
+                    plan_type=selected_plan,
                     status=Payment.PaymentStatus.PENDING
                 )
         
@@ -979,11 +937,12 @@ def verify_payment_view(request):
             # Test mode simulation - always succeed for testing
             print("🧪 TEST MODE: Simulating successful payment")
             
-            # Update payment status
-            payment.razorpay_payment_id = payment_data.get('razorpay_payment_id', 'pay_test_' + str(payment.id))
-            payment.razorpay_signature = payment_data.get('razorpay_signature', 'test_signature_' + str(payment.id))
-            payment.status = Payment.PaymentStatus.SUCCESS
-            payment.save()
+            # Update payment status (unless the webhook already completed it)
+            complete_payment(
+                payment, Payment.PaymentStatus.SUCCESS,
+                razorpay_payment_id=payment_data.get('razorpay_payment_id', 'pay_test_' + str(payment.id)),
+                razorpay_signature=payment_data.get('razorpay_signature', 'test_signature_' + str(payment.id)),
+            )
             
             # Update property with plan details
             from django.utils import timezone
@@ -992,20 +951,10 @@ def verify_payment_view(request):
             property_obj = payment.property
             property_obj.is_paid = True
             
-            # Map amount to plan type
-            if payment.amount == 99:
-                property_obj.plan_type = 'basic'
-                property_obj.plan_expiry_date = timezone.now() + timedelta(days=90)
-            elif payment.amount == 199:
-                property_obj.plan_type = 'standard'
-                property_obj.plan_expiry_date = timezone.now() + timedelta(days=180)
-            elif payment.amount == 399:
-                property_obj.plan_type = 'premium'
-                property_obj.plan_expiry_date = timezone.now() + timedelta(days=365)
-            else:
-                # Default to basic
-                property_obj.plan_type = 'basic'
-                property_obj.plan_expiry_date = timezone.now() + timedelta(days=90)
+            # The plan the owner paid for (recorded on the payment, as in the revenue rollup)
+            plan_type = payment.plan_type if payment.plan_type in PLAN_DURATION_DAYS else 'basic'
+            property_obj.plan_type = plan_type
+            property_obj.plan_expiry_date = timezone.now() + timedelta(days=PLAN_DURATION_DAYS[plan_type])
             
             # If property was rented and being re-listed, set to pending approval
             if property_obj.status == Property.Status.RENTED:
@@ -1038,11 +987,12 @@ def verify_payment_view(request):
             is_valid = client.utility.verify_payment_signature(signature_data)
             
             if is_valid:
-                # Signature verified successfully
-                payment.razorpay_payment_id = payment_data['razorpay_payment_id']
-                payment.razorpay_signature = payment_data['razorpay_signature']
-                payment.status = Payment.PaymentStatus.SUCCESS
-                payment.save()
+                # Signature verified successfully (the webhook may have completed the payment already)
+                complete_payment(
+                    payment, Payment.PaymentStatus.SUCCESS,
+                    razorpay_payment_id=payment_data['razorpay_payment_id'],
+                    razorpay_signature=payment_data['razorpay_signature'],
+                )
                 
                 # Update property with plan details
                 from django.utils import timezone
@@ -1051,20 +1001,10 @@ def verify_payment_view(request):
                 property_obj = payment.property
                 property_obj.is_paid = True
                 
-                # Map amount to plan type
-                if payment.amount == 99:
-                    property_obj.plan_type = 'basic'
-                    property_obj.plan_expiry_date = timezone.now() + timedelta(days=90)
-                elif payment.amount == 199:
-                    property_obj.plan_type = 'standard'
-                    property_obj.plan_expiry_date = timezone.now() + timedelta(days=180)
-                elif payment.amount == 399:
-                    property_obj.plan_type = 'premium'
-                    property_obj.plan_expiry_date = timezone.now() + timedelta(days=365)
-                else:
-                    # Default to basic
-                    property_obj.plan_type = 'basic'
-                    property_obj.plan_expiry_date = timezone.now() + timedelta(days=90)
+                # The plan the owner paid for (recorded on the payment, as in the revenue rollup)
+                plan_type = payment.plan_type if payment.plan_type in PLAN_DURATION_DAYS else 'basic'
+                property_obj.plan_type = plan_type
+                property_obj.plan_expiry_date = timezone.now() + timedelta(days=PLAN_DURATION_DAYS[plan_type])
                 
                 # If property was rented and being re-listed, set to pending approval
                 if property_obj.status == Property.Status.RENTED:
@@ -1079,8 +1019,7 @@ def verify_payment_view(request):
                 })
             else:
                 # Signature verification failed - CRITICAL: Do NOT mark as paid
-                payment.status = Payment.PaymentStatus.FAILED
-                payment.save()
+                complete_payment(payment, Payment.PaymentStatus.FAILED)
                 return JsonResponse({
                     'success': False,
                     'message': 'Payment verification failed. Invalid signature.'
@@ -1140,17 +1079,14 @@ def razorpay_webhook(request):
                 # Find the payment record
                 payment = Payment.objects.get(razorpay_order_id=razorpay_order_id)
                 
-                # Update payment status
-                payment.razorpay_payment_id = razorpay_payment_id
-                payment.status = Payment.PaymentStatus.SUCCESS
-                payment.save()
-                
-                # Mark property as paid
-                property_obj = payment.property
-                property_obj.is_paid = True
-                property_obj.save()
-                
-                print(f"Payment {razorpay_payment_id} marked as successful")
+                # Update payment status (unless the verify request already completed it)
+                if complete_payment(payment, Payment.PaymentStatus.SUCCESS, razorpay_payment_id=razorpay_payment_id):
+                    # Mark property as paid
+                    property_obj = payment.property
+                    property_obj.is_paid = True
+                    property_obj.save()
+                    
+                    print(f"Payment {razorpay_payment_id} marked as successful")
                 
             except Payment.DoesNotExist:
                 print(f"Payment record not found for order: {razorpay_order_id}")
@@ -1161,9 +1097,8 @@ def razorpay_webhook(request):
             
             try:
                 payment = Payment.objects.get(razorpay_order_id=razorpay_order_id)
-                payment.status = Payment.PaymentStatus.FAILED
-                payment.save()
-                print(f"Payment marked as failed for order: {razorpay_order_id}")
+                if complete_payment(payment, Payment.PaymentStatus.FAILED):
+                    print(f"Payment marked as failed for order: {razorpay_order_id}")
             except Payment.DoesNotExist:
                 print(f"Payment record not found for order: {razorpay_order_id}")
         
@@ -1181,36 +1116,10 @@ def upgrade_plan_view(request):
         messages.error(request, "Access denied. Owners only.")
         return redirect('dashboard')
     
-    from django.utils import timezone
-    
-    # Get user's current active properties
-    active_properties = Property.objects.filter(
-        owner=request.user,
-        is_paid=True,
-        plan_expiry_date__gt=timezone.now()
-    )
-    
-    # Count properties by plan type
-    basic_count = active_properties.filter(plan_type='basic').count()
-    standard_count = active_properties.filter(plan_type='standard').count()
-    premium_count = active_properties.filter(plan_type='premium').count()
-    total_active = active_properties.count()
-    
-    # Determine current plan tier
-    current_plan = None
-    current_limit = 0
-    if premium_count > 0:
-        current_plan = 'premium'
-        current_limit = 10
-    elif standard_count > 0:
-        current_plan = 'standard'
-        current_limit = 3
-    elif basic_count > 0:
-        current_plan = 'basic'
-        current_limit = 1
-    else:
-        current_plan = 'none'
-        current_limit = 0
+    # Current plan tier and usage
+    entitlement = owner_entitlement(request.user)
+    current_plan = entitlement.current_plan or 'none'
+    current_limit = PLAN_LIMITS.get(entitlement.current_plan, 0)
     
     # Define available upgrade plans
     plans = {
@@ -1260,10 +1169,10 @@ def upgrade_plan_view(request):
         'plans': plans,
         'current_plan': current_plan,
         'current_limit': current_limit,
-        'total_active': total_active,
-        'basic_count': basic_count,
-        'standard_count': standard_count,
-        'premium_count': premium_count,
+        'total_active': entitlement.total_active,
+        'basic_count': entitlement.plan_counts['basic'],
+        'standard_count': entitlement.plan_counts['standard'],
+        'premium_count': entitlement.plan_counts['premium'],
     }
     
     return render(request, 'core/upgrade_plan.html', context)
@@ -1294,8 +1203,11 @@ def approve_property_view(request, id):
         messages.error(request, "Access denied.")
         return redirect('dashboard')
         
+    from django.utils import timezone
+    
     property_obj = get_object_or_404(Property, id=id)
     property_obj.status = Property.Status.AVAILABLE
+    property_obj.approved_at = timezone.now()
     property_obj.save()
     messages.success(request, f"Property '{property_obj.title}' approved successfully!")
     return redirect('dashboard')
@@ -1345,6 +1257,45 @@ def reject_property_view(request, id):
     messages.error(request, "Invalid request method.")
     return redirect('dashboard')
 
+@login_required
+@require_POST
+def bulk_moderate_properties_view(request):
+    """
+    Approve or reject many pending properties at once - Admin only
+    JSON body: {"action": "approve" | "reject", "ids": [..],
+                "reasons": {"<id>": "..."}, "reason": "default reason"}
+    """
+    if not request.user.is_superuser and request.user.role != 'ADMIN':
+        return JsonResponse({'success': False, 'message': 'Access denied.'}, status=403)
+    
+    from .moderation_utils import bulk_moderate
+    
+    try:
+        data = json.loads(request.body)
+        property_ids = [int(pk) for pk in data.get('ids', [])]
+        reasons = {int(pk): str(reason) for pk, reason in (data.get('reasons') or {}).items()}
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'success': False, 'message': 'Invalid request.'}, status=400)
+    
+    try:
+        moderated = bulk_moderate(
+            data.get('action'),
+            property_ids,
+            reasons=reasons,
+            default_reason=str(data.get('reason') or ''),
+            dashboard_url=request.build_absolute_uri('/dashboard/'),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    verb = 'approved' if data['action'] == 'approve' else 'rejected'
+    return JsonResponse({
+        'success': True,
+        'message': f"{len(moderated)} propert{'y' if len(moderated) == 1 else 'ies'} {verb}.",
+        'moderated': moderated,
+        'skipped': len(property_ids) - len(moderated),
+    })
+
 @login_required
 def manage_property_view(request, id):
     property_obj = get_object_or_404(Property, id=id, owner=request.user)
@@ -1406,7 +1357,8 @@ def delete_property_image_view(request, id):
     if image.image:
         image.image.delete()
     
-    # Delete the image record
+    # Delete the image record (the post_delete signal refreshes the
+    # property's cover photo and photo count)
     image.delete()
     
     # Update property timestamp to ensure fresh data for tenants
@@ -1440,13 +1392,10 @@ def property_details_view(request, id):
     
     # Increment view counter (only for tenants viewing, not owners viewing their own property)
     if request.user.role == 'TENANT' or (request.user.role == 'OWNER' and property_obj.owner != request.user):
-        property_obj.views_count += 1
-        property_obj.save(update_fields=['views_count'])
+        view_counts.record(property_obj.id, request.user.id)
     
-    # Process amenities - split comma-separated string into list
-    amenities_list = []
-    if property_obj.amenities:
-        amenities_list = [amenity.strip() for amenity in property_obj.amenities.split(',') if amenity.strip()]
+    # Amenities are parsed into canonical names when the property is saved
+    amenities_list = [item.amenity.name for item in property_obj.property_amenities.select_related('amenity')]
     
     context = {
         'property': property_obj,
@@ -1493,47 +1442,20 @@ def owner_profile_view(request, id):
         messages.error(request, "You don't have permission to view this page.")
         return redirect('dashboard')
     
-    from django.utils import timezone
-    
     owner = get_object_or_404(User, id=id, role='OWNER')
     
-    # Get only paid properties by this owner
-    properties = Property.objects.filter(owner=owner, is_paid=True).order_by('-created_at')
+    from .stats_utils import owner_property_stats
     
-    # Add plan status to each property
-    for prop in properties:
-        if prop.plan_expiry_date:
-            prop.is_plan_active = prop.is_plan_active()
-            prop.days_left = prop.days_remaining()
-        else:
-            prop.is_plan_active = False
-            prop.days_left = 0
-    
-    # Calculate statistics (only for paid properties)
-    total_properties = properties.count()
-    active_properties = properties.filter(
-        status=Property.Status.AVAILABLE,
-        is_paid=True,
-        plan_expiry_date__gt=timezone.now()
-    ).count()
-    pending_properties = properties.filter(status=Property.Status.PENDING_APPROVAL, is_paid=True).count()
-    rented_properties = properties.filter(status=Property.Status.RENTED).count()
-    
-    # Count by plan type
-    basic_count = properties.filter(plan_type='basic', is_paid=True, plan_expiry_date__gt=timezone.now()).count()
-    standard_count = properties.filter(plan_type='standard', is_paid=True, plan_expiry_date__gt=timezone.now()).count()
-    premium_count = properties.filter(plan_type='premium', is_paid=True, plan_expiry_date__gt=timezone.now()).count()
+    # Get only paid properties by this owner, with their plan status
+    properties = Property.objects.filter(owner=owner, is_paid=True).with_plan_status().order_by('-created_at')
+    
+    # All counts in one conditional-aggregate query
+    stats = owner_property_stats(owner)
     
     context = {
         'owner': owner,
         'properties': properties,
-        'total_properties': total_properties,
-        'active_properties': active_properties,
-        'pending_properties': pending_properties,
-        'rented_properties': rented_properties,
-        'basic_count': basic_count,
-        'standard_count': standard_count,
-        'premium_count': premium_count,
+        **stats,
     }
     
     return render(request, 'core/owner_profile.html', context)
@@ -1550,12 +1472,10 @@ def conversations_view(request):
     else:
         conversations = Conversation.objects.all()
     
-    # Add unread count to each conversation
-    conversations_with_unread = []
-    for conversation in conversations:
-        unread_count = conversation.messages.filter(is_read=False).exclude(sender=request.user).count()
-        conversation.has_unread = unread_count > 0
-        conversations_with_unread.append(conversation)
+    # Unread flags come from the conversation's stored counters
+    conversations_with_unread = list(conversations.select_related('property', 'tenant', 'owner'))
+    for conversation in conversations_with_unread:
+        conversation.has_unread = conversation.unread_for(request.user) > 0
     
     context = {
         'conversations': conversations_with_unread
@@ -1574,8 +1494,8 @@ def conversation_detail_view(request, id):
         messages.error(request, "You don't have access to this conversation.")
         return redirect('conversations')
     
-    # Mark messages as read for the current user
-    Message.objects.filter(conversation=conversation).exclude(sender=request.user).update(is_read=True)
+    # Mark messages as read for the current user (and lower their unread counters)
+    mark_conversation_read(conversation, request.user)
     
     # Handle new message
     if request.method == 'POST':
@@ -1587,7 +1507,6 @@ def conversation_detail_view(request, id):
                 sender=request.user,
                 content=content
             )
-            conversation.save()  # Update the updated_at timestamp
             
             # Send email notification to the recipient
             recipient = conversation.owner if request.user == conversation.tenant else conversation.tenant
@@ -1744,19 +1663,11 @@ def wishlist_view(request):
         return redirect('dashboard')
     
     from .models import Wishlist
-    from django.utils import timezone
     
-    # Get all wishlist items with active properties
-    wishlist_items = Wishlist.objects.filter(tenant=request.user).select_related('property')
-    
-    # Filter to only show properties that are still available and have active plans
-    active_wishlist = []
-    for item in wishlist_items:
-        if (item.property.status == Property.Status.AVAILABLE and 
-            item.property.is_paid and 
-            item.property.plan_expiry_date and
-            item.property.plan_expiry_date > timezone.now()):
-            active_wishlist.append(item)
+    # Only properties that are still available and have active plans
+    active_wishlist = list(
+        Wishlist.objects.filter(tenant=request.user, property__in=Property.objects.visible()).select_related('property')
+    )
     
     context = {
         'wishlist_items': active_wishlist,